@@ -0,0 +1,98 @@
+import os
+import time
+from collections import namedtuple
+
+from expections import CircuitOpen
+
+# Окно, в течение которого повтор той же ошибки не отправляется, секунды.
+ALERT_WINDOW = 3600
+# Сколько разных ошибок перечисляется в сводке.
+MAX_DIGEST_ITEMS = 5
+
+# Уведомление о сбое: отпечаток ошибки и текст сообщения.
+Alert = namedtuple('Alert', ('fingerprint', 'message'))
+
+
+def get_origin(error):
+    """Место, где возникло исключение: файл и функция."""
+    traceback = error.__traceback__
+    if traceback is None:
+        return 'unknown'
+    while traceback.tb_next is not None:
+        traceback = traceback.tb_next
+    code = traceback.tb_frame.f_code
+    return f'{os.path.basename(code.co_filename)}:{code.co_name}'
+
+
+def get_fingerprint(error):
+    """Отпечаток ошибки: тип исключения и место его возникновения.
+
+    Текст ошибки в отпечаток не входит, поэтому меняющиеся в нем
+    значения не делают повтор новой ошибкой. У CircuitOpen отпечаток
+    сбоя, из-за которого запросы приостановлены.
+    """
+    if isinstance(error, CircuitOpen) and error.__cause__ is not None:
+        # Приостановка запросов — продолжение того же сбоя API.
+        error = error.__cause__
+    return f'{type(error).__name__}@{get_origin(error)}'
+
+
+def format_digest(alerts):
+    """Сводка подавленных повторов по ошибкам."""
+    items = sorted(
+        ((suppressed, fingerprint)
+         for fingerprint, (_, suppressed) in alerts.items() if suppressed),
+        reverse=True,
+    )
+    lines = [f'{fingerprint}: {suppressed}'
+             for suppressed, fingerprint in items[:MAX_DIGEST_ITEMS]]
+    if len(items) > MAX_DIGEST_ITEMS:
+        lines.append(f'и еще ошибок: {len(items) - MAX_DIGEST_ITEMS}')
+    return '\n'.join(lines)
+
+
+class AlertManager:
+    """Отсев повторных уведомлений о сбоях.
+
+    Состояние хранится в `state.alerts`: для каждого отпечатка время
+    последней отправки и число подавленных с тех пор повторов. Ошибка
+    отправляется при первом появлении и затем не чаще раза в `window`
+    секунд. Когда опрос снова проходит успешно, отправляется одно
+    сообщение о восстановлении со сводкой подавленных повторов.
+    """
+
+    def __init__(self, window=ALERT_WINDOW):
+        self.window = window
+
+    def on_error(self, state, error, now=None):
+        """Уведомление о сбое или None, если повтор подавлен."""
+        now = time.time() if now is None else now
+        fingerprint = get_fingerprint(error)
+        last_sent, suppressed = state.alerts.get(fingerprint, (None, 0))
+        if last_sent is not None and now - last_sent < self.window:
+            state.alerts[fingerprint] = [last_sent, suppressed + 1]
+            return None
+        message = f'Сбой в работе программы: {error}'
+        if suppressed:
+            message = (f'{message}\nПовторов с прошлого уведомления: '
+                       f'{suppressed}')
+        return Alert(fingerprint, message)
+
+    def mark_sent(self, state, alert, now=None):
+        """Учет отправленного уведомления о сбое."""
+        now = time.time() if now is None else now
+        state.alerts[alert.fingerprint] = [now, 0]
+
+    def on_success(self, state):
+        """Сообщение о восстановлении или None, если сбоев не было."""
+        if not state.alerts:
+            return None
+        message = 'Работа бота восстановлена после сбоя.'
+        digest = format_digest(state.alerts)
+        if digest:
+            message = f'{message}\nПодавлено повторов:\n{digest}'
+        return message
+
+    def clear(self, state):
+        """Сброс сбоев после отправки сообщения о восстановлении."""
+        state.alerts.clear()
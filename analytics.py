@@ -0,0 +1,234 @@
+"""Время проверки работ по журналу событий.
+
+Пример запуска:
+    python analytics.py review-time events.jsonl --by lesson
+"""
+import argparse
+import json
+import math
+import re
+import sys
+from array import array
+from collections import namedtuple
+from itertools import islice
+
+from event_log import decode_event, get_event
+
+VERDICTS = frozenset(('approved', 'rejected'))
+# Сколько первых слов комментария ревьюера составляют его шаблон.
+COMMENT_PATTERN_WORDS = 3
+NO_LESSON = 'урок не указан'
+NO_COMMENT = 'без комментария'
+# Доля проверок, которые завершаются быстрее прогноза для опроса.
+FORECAST_QUANTILE = 0.1
+# Меньше проверок в журнале — прогноз не строится.
+MIN_FORECAST_SAMPLES = 20
+# Сколько строк журнала разбирается за один вызов json.loads.
+CHUNK_SIZE = 65536
+WORD = re.compile(r'\w+')
+NUMBER = re.compile(r'\d+')
+
+# Сводка по группе проверок; длительности в секундах.
+ReviewStats = namedtuple('ReviewStats',
+                         ('group', 'count', 'mean', 'median', 'p90'))
+
+
+def get_comment_pattern(comment):
+    """Шаблон комментария: первые слова в нижнем регистре без чисел."""
+    words = WORD.findall((comment or '').lower())
+    if not words:
+        return NO_COMMENT
+    return NUMBER.sub('#', ' '.join(words[:COMMENT_PATTERN_WORDS]))
+
+
+def get_duration(started, finished):
+    """Длительность проверки по двум событиям работы.
+
+    Берется время изменения статуса на сервере, а если его нет — время,
+    когда бот заметил изменение.
+    """
+    if started.date_updated and finished.date_updated:
+        return finished.date_updated - started.date_updated
+    return finished.observed_at - started.observed_at
+
+
+def get_quantile(values, quantile):
+    """Квантиль отсортированной последовательности по ближайшему рангу."""
+    return values[max(math.ceil(quantile * len(values)) - 1, 0)]
+
+
+def get_stats(group, values):
+    """Сводка по длительностям одной группы."""
+    values = sorted(values)
+    return ReviewStats(group, len(values), math.fsum(values) / len(values),
+                       get_quantile(values, 0.5), get_quantile(values, 0.9))
+
+
+def read_events(path, chunk_size=CHUNK_SIZE):
+    """События журнала по порядку, без блокировки и правки файла.
+
+    Строки разбираются пачками по `chunk_size` одним вызовом json.loads:
+    это в несколько раз быстрее разбора по одной. Пачка с поврежденной
+    строкой разбирается построчно, такие строки и оборванная последняя
+    строка пропускаются.
+    """
+    with open(path, encoding='utf-8', errors='replace') as file:
+        while True:
+            lines = [line for line in islice(file, chunk_size)
+                     if line.endswith('\n')]
+            if not lines:
+                return
+            try:
+                items = json.loads(f'[{",".join(lines)}]')
+            except ValueError:
+                events = map(decode_event, lines)
+            else:
+                events = map(get_event, items)
+            yield from filter(None, events)
+
+
+class ReviewTimes:
+    """Длительности проверок от `reviewing` до вердикта.
+
+    Длительности лежат в плоском массиве, урок и шаблон комментария —
+    в параллельных массивах кодов, названия хранятся один раз. Так
+    миллионы проверок занимают десятки мегабайт, а группировка идет
+    одним проходом по массивам.
+    """
+
+    def __init__(self):
+        self.durations = array('d')
+        self.lessons = array('l')
+        self.patterns = array('l')
+        self.lesson_names = []
+        self.pattern_names = []
+        self._lesson_codes = {}
+        self._pattern_codes = {}
+
+    def __len__(self):
+        return len(self.durations)
+
+    def add(self, duration, lesson, pattern):
+        """Добавление одной проверки."""
+        lesson = lesson or NO_LESSON
+        code = self._lesson_codes.get(lesson)
+        if code is None:
+            code = self._lesson_codes[lesson] = len(self.lesson_names)
+            self.lesson_names.append(lesson)
+        self.lessons.append(code)
+        code = self._pattern_codes.get(pattern)
+        if code is None:
+            code = self._pattern_codes[pattern] = len(self.pattern_names)
+            self.pattern_names.append(pattern)
+        self.patterns.append(code)
+        self.durations.append(duration)
+
+    @classmethod
+    def from_events(cls, events):
+        """Проверки из событий в порядке записи.
+
+        Проверка начинается с первого события `reviewing` и завершается
+        ближайшим вердиктом той же работы той же подписки.
+        """
+        times = cls()
+        started = {}
+        for event in events:
+            key = (event.key, event.homework_id)
+            if event.status == 'reviewing':
+                started.setdefault(key, event)
+            elif event.status in VERDICTS:
+                start = started.pop(key, None)
+                if start is None:
+                    continue
+                duration = get_duration(start, event)
+                if duration < 0:
+                    continue
+                times.add(duration, event.lesson_name or start.lesson_name,
+                          get_comment_pattern(event.reviewer_comment))
+            else:
+                started.pop(key, None)
+        return times
+
+    def summarize(self, by='lesson'):
+        """Сводки по урокам или шаблонам комментариев, от частых к редким."""
+        if by == 'lesson':
+            codes, names = self.lessons, self.lesson_names
+        else:
+            codes, names = self.patterns, self.pattern_names
+        groups = [array('d') for _ in names]
+        for code, duration in zip(codes, self.durations):
+            groups[code].append(duration)
+        stats = [get_stats(name, values)
+                 for name, values in zip(names, groups) if values]
+        stats.sort(key=lambda item: item.count, reverse=True)
+        return stats
+
+    def quantile(self, quantile):
+        """Квантиль длительности по всем проверкам."""
+        return get_quantile(sorted(self.durations), quantile)
+
+
+def get_min_review_time(events):
+    """Время, раньше которого проверка почти никогда не завершается.
+
+    Нужно AdaptivePollingPolicy, чтобы не опрашивать API часто сразу
+    после начала проверки. None, если данных для прогноза мало.
+    """
+    times = ReviewTimes.from_events(events)
+    if len(times) < MIN_FORECAST_SAMPLES:
+        return None
+    return times.quantile(FORECAST_QUANTILE)
+
+
+def format_duration(seconds):
+    """Длительность в часах и минутах."""
+    minutes = round(seconds / 60)
+    return f'{minutes // 60}ч {minutes % 60:02d}м'
+
+
+def format_report(stats, limit=None):
+    """Таблица сводок для вывода в терминал."""
+    lines = [f'{"группа":<40} {"проверок":>8} {"среднее":>9} '
+             f'{"медиана":>9} {"90%":>9}']
+    for item in stats[:limit]:
+        lines.append(
+            f'{item.group[:40]:<40} {item.count:>8} '
+            f'{format_duration(item.mean):>9} '
+            f'{format_duration(item.median):>9} '
+            f'{format_duration(item.p90):>9}'
+        )
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    review_time = commands.add_parser(
+        'review-time', help='время от начала проверки до вердикта'
+    )
+    review_time.add_argument('path', help='файл журнала событий')
+    review_time.add_argument('--by', choices=('lesson', 'comment'),
+                             default='lesson',
+                             help='группировать по уроку или шаблону '
+                                  'комментария ревьюера')
+    review_time.add_argument('--limit', type=int, default=20,
+                             help='сколько групп показать')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Вывод сводки по журналу событий."""
+    args = parse_args(argv)
+    times = ReviewTimes.from_events(read_events(args.path))
+    if not len(times):
+        print('В журнале нет завершенных проверок.')
+        return 1
+    print(format_report(times.summarize(args.by), args.limit))
+    print(f'\nВсего проверок: {len(times)}, медиана '
+          f'{format_duration(times.quantile(0.5))}.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,478 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from functools import partial
+from http import HTTPStatus
+
+import aiohttp
+from aiohttp import web
+from telebot import asyncio_helper
+from telebot.apihelper import ApiException
+from telebot.async_telebot import AsyncTeleBot
+from telebot.types import Update
+
+import homework
+from commands import CommandHandler
+from conditional import ResponseValidators
+from expections import (EndpointUnavailable, UnavailableTokens,
+                        UnexpectedStatusCode, UnsuccessfulSendMessage)
+from metrics import (API_LATENCY, LOOP_DURATION, SEND_LATENCY,
+                     start_metrics_server)
+from polling import AdaptivePollingPolicy, parse_retry_after
+from scheduler import DELIVERY_WAIT, SEND_QUEUE_STOP_TIMEOUT
+from send_queue import MAX_MESSAGE_LENGTH, AsyncSendQueue
+from state import get_state_storage
+from subscriptions import load_subscriptions
+
+SUBSCRIPTIONS_PATH = os.getenv('SUBSCRIPTIONS_PATH')
+# Прием команд из чатов: polling (getUpdates) или webhook.
+TELEGRAM_UPDATES = os.getenv('TELEGRAM_UPDATES')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '127.0.0.1')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+
+MAX_CONCURRENT_POLLS = 500
+KEEPALIVE_TIMEOUT = 60
+STATE_FLUSH_INTERVAL = 5
+# Сколько последних уведомлений чата хранится для /history.
+HISTORY_SIZE = 10
+LONG_POLL_TIMEOUT = 30
+UPDATES_RETRY_DELAY = 5
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+async def async_fetch_homework_statuses(session, headers, timestamp,
+                                        validators=None, validator_key=None):
+    """Асинхронный запрос статусов домашних работ.
+
+    С валидаторами запрос условный, как в `fetch_homework_statuses`.
+    """
+    params = {'from_date': timestamp}
+    if validators is not None:
+        validator_key = validator_key or headers['Authorization']
+        headers = {**headers, **validators.request_headers(validator_key)}
+    try:
+        with API_LATENCY.time():
+            async with session.get(homework.ENDPOINT, headers=headers,
+                                   params=params) as response:
+                body = await response.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        raise EndpointUnavailable(f'Эндпоинт {homework.ENDPOINT} недоступен '
+                                  f'с параметрами {params}. '
+                                  f'Ошибка {error}.') from error
+
+    if validators is not None and validators.is_not_modified(
+        validator_key, response.status, response.headers, body,
+    ):
+        logging.debug('Ответ API не изменился, разбор пропущен.')
+        return None
+    if response.status != HTTPStatus.OK:
+        retry_after = None
+        if response.status == HTTPStatus.TOO_MANY_REQUESTS:
+            retry_after = parse_retry_after(
+                response.headers.get('Retry-After')
+            )
+        raise UnexpectedStatusCode(
+            f'Получен неожиданный статус-код: {response.status}. '
+            f'Ожидаемый статус-код: {HTTPStatus.OK}.',
+            status_code=response.status,
+            retry_after=retry_after,
+        )
+    return json.loads(body)
+
+
+async def async_get_api_answer(session, timestamp):
+    """Асинхронный аналог `get_api_answer`."""
+    return await async_fetch_homework_statuses(session, homework.HEADERS,
+                                               timestamp)
+
+
+async def async_send_chat_message(bot, chat_id, message):
+    """Асинхронная отправка сообщения в указанный чат."""
+    try:
+        with SEND_LATENCY.time():
+            await bot.send_message(chat_id=chat_id, text=message)
+    except (ApiException, aiohttp.ClientError,
+            asyncio.TimeoutError) as error:
+        logging.error(f'Сообщение {message} не отправлено. Ошибка {error}')
+        raise UnsuccessfulSendMessage(
+            f'Сообщение в чат {chat_id} не отправлено: {error}'
+        ) from error
+    logging.debug(f'Сообщение {message} отправлено')
+
+
+async def async_send_message(bot, message):
+    """Асинхронный аналог `send_message`."""
+    await async_send_chat_message(bot, homework.TELEGRAM_CHAT_ID, message)
+
+
+async def async_check_homeworks(state, fetch, notify, alerts=None,
+                                on_change=None, deliver=None):
+    """Асинхронный аналог `homework.check_homeworks`.
+
+    `fetch` и `notify` здесь корутинные функции с теми же аргументами,
+    `deliver` — обычная функция, как в `homework.deliver_batches`.
+    """
+    alerts = alerts or homework.ALERTS
+    changes = 0
+    try:
+        response = await fetch(state.timestamp)
+        if response is not None:
+            homeworks = homework.check_response(response)
+            batches = homework.get_notification_batches(state, homeworks)
+            timestamp = homework.get_next_timestamp(response,
+                                                    state.timestamp)
+            if deliver is not None and batches:
+                homework.deliver_batches(state, batches, timestamp, deliver,
+                                         on_change)
+                changes = sum(len(batch.seen) for batch in batches)
+            else:
+                for batch in batches:
+                    await notify(batch.text)
+                    homework.mark_seen(state, batch, on_change)
+                    changes += len(batch.seen)
+                state.timestamp = timestamp
+        recovered = alerts.on_success(state)
+        if recovered:
+            await notify(recovered)
+            alerts.clear(state)
+    except asyncio.CancelledError:
+        raise
+    except Exception as error:
+        logging.error(f'Ошибка при обращении к API сервису. Ошибка {error}',
+                      exc_info=True)
+        await async_send_alert(state, error, notify, alerts)
+        return homework.PollResult(changes, error)
+    return homework.PollResult(changes, None)
+
+
+async def async_send_alert(state, error, notify, alerts):
+    """Уведомление о сбое, если повтор ошибки не подавлен."""
+    alert = alerts.on_error(state, error)
+    if not alert:
+        return
+    try:
+        await notify(alert.message)
+        alerts.mark_sent(state, alert)
+    except UnsuccessfulSendMessage:
+        pass
+
+
+class AsyncPollingScheduler:
+    """Опрос всех подписок в одном цикле событий.
+
+    Каждая подписка опрашивается своей задачей, число одновременных
+    запросов ограничено семафором. Остановка — отмена `run()`.
+    Состояния подписок и последние уведомления чатов доступны в памяти
+    для ответов на команды. Названия работ для команд хранятся отдельно
+    от состояний, в `names`.
+
+    Уведомления уходят через AsyncSendQueue с лимитами Телеграма, и, как
+    в PollingScheduler, работы запоминаются только после доставки.
+    Пока у подписки есть недоставленные уведомления, она не опрашивается.
+    """
+
+    def __init__(self, subscriptions, bot, storage, session,
+                 period=homework.RETRY_PERIOD,
+                 max_concurrency=MAX_CONCURRENT_POLLS,
+                 policy_factory=AdaptivePollingPolicy, cache=None,
+                 breaker=None, events=None, send_queue=None):
+        self.subscriptions = subscriptions
+        self.events = events
+        self.cache = cache
+        self.breaker = breaker
+        self.policy_factory = policy_factory
+        self.bot = bot
+        self.send_queue = (send_queue if send_queue is not None
+                           else AsyncSendQueue(bot))
+        self.storage = storage
+        self.session = session
+        self.period = period
+        self.validators = ResponseValidators()
+        self.states = {}
+        self.chats = {}
+        self.history = {}
+        self.names = {}
+        self._undelivered = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks = None
+
+    def get_states(self, chat_id):
+        """Состояния всех подписок чата по ключам подписок."""
+        return {subscription.key: self.states[subscription.key]
+                for subscription in self.chats.get(str(chat_id), ())
+                if subscription.key in self.states}
+
+    def subscribe(self, subscription):
+        """Добавление подписки на ходу; False, если она уже есть."""
+        if subscription in self.subscriptions:
+            return False
+        self.subscriptions.append(subscription)
+        if self._tasks is not None:
+            self._tasks.append(asyncio.create_task(
+                self._poll_forever(subscription, delay=0)
+            ))
+        return True
+
+    def send(self, chat_id, message, on_sent=None):
+        """Постановка уведомления в очередь отправки.
+
+        После доставки оно записывается в историю чата.
+        """
+        def on_delivered(delivered):
+            if delivered:
+                self.history.setdefault(
+                    chat_id, deque(maxlen=HISTORY_SIZE)
+                ).append((time.time(), message))
+            if on_sent is not None:
+                on_sent(delivered)
+        self.send_queue.put(chat_id, message, on_delivered)
+
+    async def notify(self, chat_id, message):
+        """Отправка уведомления без ожидания доставки."""
+        self.send(chat_id, message)
+
+    def _deliver(self, subscription, state, message, on_delivered):
+        """Отправка пакета статусов с учетом недоставленных."""
+        key = subscription.key
+        self._undelivered[key] = self._undelivered.get(key, 0) + 1
+
+        def on_sent(delivered):
+            self._undelivered[key] -= 1
+            if not self._undelivered[key]:
+                del self._undelivered[key]
+            on_delivered(delivered)
+            if not delivered:
+                self.validators.forget(key)
+            self.storage.save(key, state)
+        self.send(subscription.chat_id, message, on_sent)
+
+    def on_change(self, key, seen, homeworks):
+        """Запоминание названий работ и запись изменений в журнал."""
+        for homework_id, item in homeworks.items():
+            if item.get('homework_name'):
+                self.names[homework_id] = item['homework_name']
+        if self.events is not None:
+            self.events.record(key, seen, homeworks)
+
+    async def poll(self, subscription, state):
+        """Проверка домашних работ одной подписки.
+
+        Возвращает PollResult или None, если цикл завершился сбоем.
+        """
+        fetch = partial(async_fetch_homework_statuses, self.session,
+                        subscription.headers, validators=self.validators,
+                        validator_key=subscription.key)
+        if self.breaker is not None:
+            fetch = partial(self.breaker.acall, fetch)
+        if self.cache is not None:
+            fetch = self.cache.wrap_async(fetch, subscription.token)
+        notify = partial(self.notify, subscription.chat_id)
+        deliver = partial(self._deliver, subscription, state)
+        on_change = partial(self.on_change, subscription.key)
+        result = None
+        async with self._semaphore:
+            try:
+                with LOOP_DURATION.time():
+                    result = await async_check_homeworks(
+                        state, fetch, notify, on_change=on_change,
+                        deliver=deliver,
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logging.error(f'Сбой при опросе подписки '
+                              f'{subscription.key}: {error}', exc_info=True)
+        if result is None or result.error is not None:
+            self.validators.forget(subscription.key)
+        self.storage.save(subscription.key, state)
+        return result
+
+    async def _poll_forever(self, subscription, delay=None):
+        state = homework.load_state(self.storage, subscription.key,
+                                    subscription.language, self.events)
+        self.states[subscription.key] = state
+        if self.events is not None:
+            self.names.update(self.events.names(subscription.key))
+        self.chats.setdefault(subscription.chat_id, []).append(subscription)
+        policy = self.policy_factory(self.period)
+        if delay is None:
+            delay = random.uniform(0, self.period)
+        await asyncio.sleep(delay)
+        while True:
+            if subscription.key in self._undelivered:
+                await asyncio.sleep(DELIVERY_WAIT)
+                continue
+            result = await self.poll(subscription, state)
+            await asyncio.sleep(policy.next_delay(state, result))
+
+    async def _flush_forever(self):
+        while True:
+            await asyncio.sleep(STATE_FLUSH_INTERVAL)
+            self.storage.flush()
+            if self.events is not None:
+                self.events.maybe_compact()
+
+    async def run(self, *services):
+        """Запуск опроса до отмены задачи.
+
+        Корутины `services`, например прием команд, работают в том же
+        цикле событий и останавливаются вместе с опросом.
+        """
+        self.send_queue.start()
+        tasks = self._tasks = [
+            asyncio.create_task(self._poll_forever(subscription))
+            for subscription in self.subscriptions
+        ]
+        tasks.append(asyncio.create_task(self._flush_forever()))
+        tasks.extend(asyncio.create_task(service) for service in services)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # Сюда же попадают задачи подписок, добавленных командой /start.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.send_queue.stop(SEND_QUEUE_STOP_TIMEOUT)
+            self.storage.close()
+            if self.events is not None:
+                self.events.close()
+
+
+async def answer_update(bot, handler, update):
+    """Ответ на одно входящее обновление Телеграма."""
+    message = update.message
+    if message is None or not message.text:
+        return
+    chat_id = message.chat.id
+    reply = handler.handle(chat_id, message.text)
+    if reply is None:
+        return
+    try:
+        if handler.is_secret(message.text):
+            try:
+                await bot.delete_message(chat_id, message.message_id)
+            except ApiException as error:
+                logging.warning(f'Сообщение с токеном в чате {chat_id} '
+                                f'не удалено: {error}')
+        await bot.send_message(chat_id=chat_id,
+                               text=reply[:MAX_MESSAGE_LENGTH])
+    except (ApiException, aiohttp.ClientError,
+            asyncio.TimeoutError) as error:
+        logging.error(f'Ответ на команду в чат {chat_id} не отправлен: '
+                      f'{error}')
+
+
+async def poll_updates(bot, handler, timeout=LONG_POLL_TIMEOUT):
+    """Прием команд через long polling метода getUpdates."""
+    await bot.delete_webhook()
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset, timeout=timeout, allowed_updates=['message'],
+                request_timeout=timeout + UPDATES_RETRY_DELAY,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            logging.error(f'Не удалось получить обновления: {error}')
+            await asyncio.sleep(UPDATES_RETRY_DELAY)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            await answer_update(bot, handler, update)
+
+
+def create_webhook_app(bot, handler, secret=None):
+    """Приложение aiohttp, принимающее обновления от Телеграма."""
+    async def receive(request):
+        if secret and request.headers.get(SECRET_HEADER) != secret:
+            return web.Response(status=HTTPStatus.FORBIDDEN)
+        try:
+            update = Update.de_json(await request.text())
+        except ValueError:
+            return web.Response(status=HTTPStatus.BAD_REQUEST)
+        await answer_update(bot, handler, update)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post('/', receive)
+    return app
+
+
+async def serve_webhook(bot, handler, url, host=WEBHOOK_HOST,
+                        port=WEBHOOK_PORT, secret=WEBHOOK_SECRET):
+    """Прием команд через webhook на локальном HTTP-сервере.
+
+    `url` — внешний адрес, который перенаправляет запросы на `host:port`.
+    """
+    runner = web.AppRunner(create_webhook_app(bot, handler, secret))
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        await bot.set_webhook(url=url, secret_token=secret,
+                              allowed_updates=['message'])
+        logging.info(f'Webhook {url} слушает {host}:{port}.')
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def configure_async_telegram_api(base_url):
+    """Отправка запросов асинхронного бота на другой адрес Bot API."""
+    homework.configure_telegram_api(base_url)
+    asyncio_helper.API_URL = f'{base_url.rstrip("/")}/bot{{0}}/{{1}}'
+
+
+async def async_main(subscriptions_path):
+    """Асинхронный запуск опроса всех подписок из реестра."""
+    if not homework.TELEGRAM_TOKEN or not subscriptions_path:
+        logging.critical('Не заданы TELEGRAM_TOKEN или SUBSCRIPTIONS_PATH.')
+        raise UnavailableTokens('Ошибка при проверке токенов')
+    if homework.METRICS_PORT:
+        start_metrics_server(homework.METRICS_PORT)
+    if homework.TELEGRAM_API_URL:
+        configure_async_telegram_api(homework.TELEGRAM_API_URL)
+    if TELEGRAM_UPDATES == 'webhook' and not WEBHOOK_URL:
+        logging.critical('Для TELEGRAM_UPDATES=webhook не задан WEBHOOK_URL.')
+        raise UnavailableTokens('Ошибка при проверке настроек webhook')
+    subscriptions = load_subscriptions(subscriptions_path)
+    bot = AsyncTeleBot(token=homework.TELEGRAM_TOKEN)
+    connector = aiohttp.TCPConnector(
+        limit=homework.HTTP_POOL_SIZE or MAX_CONCURRENT_POLLS,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    timeout = aiohttp.ClientTimeout(sock_connect=homework.CONNECT_TIMEOUT,
+                                    sock_read=homework.READ_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector,
+                                     timeout=timeout) as session:
+        scheduler = AsyncPollingScheduler(
+            subscriptions, bot, get_state_storage(homework.STATE_FILE_PATH),
+            session,
+            cache=(homework.create_response_cache()
+                   if homework.RESPONSE_CACHE_TTL else None),
+            breaker=homework.BREAKER,
+            events=homework.open_event_log(),
+        )
+        handler = CommandHandler(scheduler, homework.RENDERER,
+                                 subscriptions_path)
+        services = []
+        if TELEGRAM_UPDATES == 'polling':
+            services.append(poll_updates(bot, handler))
+        elif TELEGRAM_UPDATES == 'webhook':
+            services.append(serve_webhook(bot, handler, WEBHOOK_URL))
+        try:
+            await scheduler.run(*services)
+        finally:
+            await bot.close_session()
+
+
+if __name__ == '__main__':
+    homework.configure_logging()
+    asyncio.run(async_main(SUBSCRIPTIONS_PATH))
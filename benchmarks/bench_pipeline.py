@@ -0,0 +1,244 @@
+import itertools
+import json
+from functools import partial
+
+import homework
+from analytics import ReviewTimes
+from event_log import Event
+from metrics import ERRORS, count_exceptions
+from state import BotState, HomeworkRecord
+from streaming import CHUNK_SIZE, StreamedResponse
+from tests.check_utils import MockResponseGET, MockTelegramBot
+
+from .harness import benchmark
+
+SIZES = (1, 10, 100, 1000, 10000, 100000)
+USERS = (1, 10, 100, 1000)
+STATUSES = tuple(homework.HOMEWORK_VERDICTS)
+
+
+def make_homeworks(size):
+    """Список домашних работ заданной длины в формате API."""
+    return [
+        {
+            'id': number,
+            'homework_name': f'bobgoz__hw{number}.zip',
+            'status': STATUSES[number % len(STATUSES)],
+            'reviewer_comment': 'Принято!',
+            'date_updated': '2024-04-11T10:31:09Z',
+            'lesson_name': f'Спринт {number}',
+        }
+        for number in range(size)
+    ]
+
+
+def make_response(size):
+    """Ответ API с заданным числом домашних работ."""
+    return {'homeworks': make_homeworks(size), 'current_date': 1700000000}
+
+
+class FakeSession:
+    """Сессия, которая возвращает заготовленный ответ без сети."""
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def get(self, *args, **kwargs):
+        return MockResponseGET(data=next(self.responses))
+
+
+def bench_check_response(size):
+    """Проверка ответа API целиком."""
+    response = make_response(size)
+    return partial(homework.check_response, response), 1
+
+
+def bench_parse_status(size):
+    """Разбор статуса каждой работы в ответе."""
+    homeworks = make_homeworks(size)
+
+    def parse_all():
+        for item in homeworks:
+            homework.parse_status(item)
+    return parse_all, size
+
+
+@count_exceptions(ERRORS)
+def legacy_parse_status(homework_item):
+    """parse_status до появления шаблонов сообщений, для сравнения."""
+    try:
+        status = homework_item['status']
+    except KeyError:
+        raise
+    try:
+        verdict = homework.HOMEWORK_VERDICTS[status]
+    except KeyError:
+        raise
+    try:
+        homework_name = homework_item['homework_name']
+    except KeyError:
+        raise
+    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+
+
+def bench_parse_status_legacy(size):
+    """Разбор статусов прежней реализацией parse_status."""
+    homeworks = make_homeworks(size)
+
+    def parse_all():
+        for item in homeworks:
+            legacy_parse_status(item)
+    return parse_all, size
+
+
+@count_exceptions(ERRORS)
+def legacy_check_response(response):
+    """check_response до появления схемы ответа, для сравнения."""
+    try:
+        homeworks = response['homeworks']
+        if not isinstance(homeworks, list):
+            raise TypeError('Полученный тип данных не соответствует типу.')
+        return homeworks
+    except KeyError:
+        raise
+
+
+def seen_state(response):
+    """Состояние, в котором все работы ответа уже известны."""
+    return BotState(timestamp=0, homeworks={
+        homework.get_homework_key(item): HomeworkRecord.from_homework(item)
+        for item in response['homeworks']
+    })
+
+
+def bench_status_changes_legacy(size):
+    """Повторный опрос без изменений: проверки parse_status на каждой."""
+    response = make_response(size)
+    state = seen_state(response)
+
+    def poll():
+        changes = {}
+        for item in legacy_check_response(response):
+            key = homework.get_homework_key(item)
+            if key in changes:
+                continue
+            message = legacy_parse_status(item)
+            last_seen = HomeworkRecord.from_homework(item)
+            if state.homeworks.get(key) != last_seen:
+                changes[key] = (last_seen, message)
+    return poll, size
+
+
+def bench_status_changes(size):
+    """Повторный опрос без изменений: проверка ответа по схеме."""
+    response = make_response(size)
+    state = seen_state(response)
+
+    def poll():
+        homework.get_status_changes(state, homework.check_response(response))
+    return poll, size
+
+
+def bench_render_status(size, locale):
+    """Разбор статусов в сообщения на заданном языке."""
+    homeworks = make_homeworks(size)
+
+    def parse_all():
+        for item in homeworks:
+            homework.render_status(item, locale)
+    return parse_all, size
+
+
+def make_body(size):
+    """Тело ответа API в байтах."""
+    return json.dumps(make_response(size)).encode('utf-8')
+
+
+def iter_chunks(body):
+    """Тело ответа кусками, как его отдает `iter_content`."""
+    return (body[start:start + CHUNK_SIZE]
+            for start in range(0, len(body), CHUNK_SIZE))
+
+
+def bench_parse_body(size):
+    """Разбор тела ответа целиком и разбор статусов."""
+    body = make_body(size)
+
+    def parse():
+        for item in homework.check_response(json.loads(body)):
+            homework.parse_status(item)
+    return parse, size
+
+
+def bench_parse_body_stream(size):
+    """Потоковый разбор тела ответа и разбор статусов."""
+    body = make_body(size)
+
+    def parse():
+        response = StreamedResponse(iter_chunks(body))
+        for item in homework.check_response(response):
+            homework.parse_status(item)
+    return parse, size
+
+
+def bench_loop_iteration(users):
+    """Полный цикл проверки для каждого из пользователей."""
+    # Статус меняется на каждом опросе, чтобы каждая итерация
+    # проходила весь путь: запрос, разбор и отправку сообщения.
+    responses = itertools.cycle([
+        {'homeworks': [dict(item, status=status)],
+         'current_date': 1700000000}
+        for item in make_homeworks(1) for status in STATUSES
+    ])
+    session = FakeSession(responses)
+    bot = MockTelegramBot()
+    subscriptions = [
+        (BotState(timestamp=0),
+         partial(homework.fetch_homework_statuses,
+                 {'Authorization': f'OAuth token{number}'},
+                 session=session),
+         partial(homework.send_chat_message, bot, str(number)))
+        for number in range(users)
+    ]
+
+    def poll_all():
+        for state, fetch, notify in subscriptions:
+            homework.check_homeworks(state, fetch, notify)
+    return poll_all, users
+
+
+def bench_review_time(size):
+    """Время проверки по журналу событий с группировкой по урокам."""
+    events = []
+    for number in range(size // 2):
+        lesson = f'Спринт {number % 17}'
+        events += [
+            Event('chat', str(number), f'hw{number}.zip', 'reviewing',
+                  number, number, lesson),
+            Event('chat', str(number), f'hw{number}.zip', 'approved',
+                  number + 3600, number + 3600, lesson, 'Принято!'),
+        ]
+
+    def review_time():
+        ReviewTimes.from_events(events).summarize()
+
+    return review_time, max(len(events), 1)
+
+
+for size in SIZES:
+    benchmark('check_response', size=size)(bench_check_response)
+    benchmark('parse_status', size=size)(bench_parse_status)
+    benchmark('parse_status_legacy', size=size)(bench_parse_status_legacy)
+    benchmark('status_changes', size=size)(bench_status_changes)
+    benchmark('status_changes_legacy', size=size)(
+        bench_status_changes_legacy
+    )
+    for locale in ('ru', 'en'):
+        benchmark('render_status', size=size, locale=locale)(
+            bench_render_status
+        )
+    benchmark('parse_body', size=size)(bench_parse_body)
+    benchmark('parse_body_stream', size=size)(bench_parse_body_stream)
+    benchmark('review_time', size=size)(bench_review_time)
+for users in USERS:
+    benchmark('loop_iteration', users=users)(bench_loop_iteration)
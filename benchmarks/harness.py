@@ -0,0 +1,126 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+BENCHMARKS = []
+MIN_SAMPLE_TIME = 0.05
+REPEAT = 5
+
+
+def benchmark(name, **params):
+    """Регистрация функции-бенчмарка.
+
+    Функция получает параметры и возвращает пару: вызываемый объект без
+    аргументов для замера и число операций, которое он выполняет.
+    """
+    def decorator(func):
+        BENCHMARKS.append((name, params, func))
+        return func
+    return decorator
+
+
+def measure(func, operations=1, repeat=REPEAT,
+            min_sample_time=MIN_SAMPLE_TIME):
+    """Замер времени одной операции с автоматическим подбором числа вызовов."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_sample_time or loops >= 1 << 20:
+            break
+        loops *= 2
+    samples = [elapsed / loops / operations]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops / operations)
+    return {
+        'loops': loops,
+        'operations': operations,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'ops_per_sec': 1 / statistics.median(samples),
+    }
+
+
+def run_benchmarks(selected=None, quick=False):
+    """Запуск зарегистрированных бенчмарков."""
+    results = []
+    for name, params, setup in BENCHMARKS:
+        if selected and not any(part in name for part in selected):
+            continue
+        if quick and params.get('size', 0) > 1000:
+            continue
+        func, operations = setup(**params)
+        stats = measure(func, operations,
+                        repeat=3 if quick else REPEAT)
+        results.append({'name': name, 'params': params, **stats})
+        print(format_result(results[-1]))
+    return results
+
+
+def format_result(result):
+    """Строка отчета для одного результата."""
+    params = ', '.join(f'{key}={value}'
+                       for key, value in result['params'].items())
+    return (f'{result["name"]:<32} {params:<24} '
+            f'{result["median"] * 1e6:>12.2f} мкс/оп '
+            f'{result["ops_per_sec"]:>14.0f} оп/с')
+
+
+def get_commit():
+    """Текущий коммит репозитория или None."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(results, path):
+    """Сохранение результатов в JSON для сравнения между коммитами."""
+    report = {
+        'commit': get_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def result_key(result):
+    """Ключ результата для сопоставления между запусками."""
+    return result['name'], json.dumps(result['params'], sort_keys=True)
+
+
+def compare_results(baseline_path, results, threshold=0.1):
+    """Сравнение с сохраненным запуском.
+
+    Возвращает список замедлившихся более чем на `threshold` бенчмарков.
+    """
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = {result_key(result): result
+                    for result in json.load(file)['results']}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None:
+            continue
+        ratio = result['median'] / previous['median']
+        marker = ''
+        if ratio > 1 + threshold:
+            marker = '  <-- замедление'
+            regressions.append((result, ratio))
+        print(f'{result["name"]:<32} {ratio:>6.2f}x{marker}')
+    return regressions
@@ -0,0 +1,176 @@
+"""Нагрузочный прогон опроса против локального API Практикума.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.load_practicum --users 100 200 400 --period 1
+
+Без --endpoint поддельный API запускается в отдельном процессе.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import sys
+import time
+
+import aiohttp
+
+import homework
+from async_bot import AsyncPollingScheduler
+from fakes.practicum_api import create_server
+from fakes.practicum_api import parse_args as parse_server_args
+from metrics import API_LATENCY, LOOP_DURATION
+from polling import FixedPollingPolicy
+from scheduler import PollingScheduler
+from send_queue import SendQueue
+from state import MemoryStateStorage
+from subscriptions import Subscription
+
+DEFAULT_USERS = (50, 100, 200, 400, 800, 1600, 3200)
+SUSTAINABLE_RATIO = 0.95
+
+
+class NullBot:
+    """Бот, который ничего не отправляет."""
+
+    def send_message(self, chat_id=None, text=None):
+        """Отправка сообщения в никуда."""
+
+
+class NullAsyncBot:
+    """Асинхронный бот, который ничего не отправляет."""
+
+    async def send_message(self, chat_id=None, text=None):
+        """Отправка сообщения в никуда."""
+
+
+def serve_fake_api(server_argv, connection):
+    """Запуск поддельного API в дочернем процессе."""
+    server = create_server(parse_server_args(server_argv))
+    connection.send(server.endpoint)
+    server.serve_forever()
+
+
+def start_fake_api(server_argv):
+    """Запуск поддельного API и получение его адреса."""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=serve_fake_api, args=(server_argv, child), daemon=True
+    )
+    process.start()
+    return process, parent.recv()
+
+
+def make_subscriptions(users):
+    """Подписки с уникальными токенами."""
+    return [Subscription(f'load-token-{number}', str(number))
+            for number in range(users)]
+
+
+def run_sync(users, period, duration, pool_size):
+    """Прогон синхронного планировщика."""
+    send_queue = SendQueue(NullBot(), global_rate=1e9, chat_rate=1e9)
+    scheduler = PollingScheduler(
+        make_subscriptions(users), NullBot(), MemoryStateStorage(),
+        period=period, session=homework.create_http_session(pool_size),
+        send_queue=send_queue.start(), policy_factory=FixedPollingPolicy,
+    )
+    deadline = time.monotonic() + duration
+    while (remaining := deadline - time.monotonic()) > 0:
+        time.sleep(min(scheduler.run_pending(), remaining))
+    send_queue.stop(1)
+
+
+def run_async(users, period, duration, pool_size):
+    """Прогон асинхронного планировщика."""
+    async def run():
+        connector = aiohttp.TCPConnector(limit=pool_size)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            scheduler = AsyncPollingScheduler(
+                make_subscriptions(users), NullAsyncBot(),
+                MemoryStateStorage(), session, period=period,
+                policy_factory=FixedPollingPolicy,
+            )
+            try:
+                await asyncio.wait_for(scheduler.run(), duration)
+            except asyncio.TimeoutError:
+                pass
+    asyncio.run(run())
+
+
+def measure(mode, users, period, duration, pool_size):
+    """Прогон для заданного числа пользователей."""
+    polls, api_count, api_total = (LOOP_DURATION.count, API_LATENCY.count,
+                                   API_LATENCY.total)
+    runner = run_async if mode == 'async' else run_sync
+    runner(users, period, duration, pool_size)
+    polls = LOOP_DURATION.count - polls
+    requests_made = API_LATENCY.count - api_count
+    expected = users * duration / period
+    return {
+        'mode': mode,
+        'users': users,
+        'period': period,
+        'duration': duration,
+        'polls': polls,
+        'expected_polls': expected,
+        'ratio': polls / expected,
+        'polls_per_sec': polls / duration,
+        'mean_api_latency': ((API_LATENCY.total - api_total) / requests_made
+                             if requests_made else None),
+    }
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, nargs='+',
+                        default=DEFAULT_USERS)
+    parser.add_argument('--mode', choices=('sync', 'async'), default='async')
+    parser.add_argument('--period', type=float, default=1,
+                        help='период опроса одного пользователя, секунды')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--pool-size', type=int, default=100)
+    parser.add_argument('--endpoint', help='адрес уже запущенного API')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--server-args', default='',
+                        help='аргументы для fakes.practicum_api, например '
+                             '"--latency 0.05 --error-rate 0.01"')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Поиск максимального числа пользователей на процесс."""
+    args = parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    process = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        process, endpoint = start_fake_api(args.server_args.split())
+    homework.ENDPOINT = endpoint
+    results = []
+    try:
+        for users in args.users:
+            result = measure(args.mode, users, args.period, args.duration,
+                             args.pool_size)
+            results.append(result)
+            print(f'{users:>6} польз.  {result["polls_per_sec"]:>9.1f} '
+                  f'опросов/с  {result["ratio"]:>6.1%} от плана')
+            if result['ratio'] < SUSTAINABLE_RATIO:
+                break
+    finally:
+        if process is not None:
+            process.terminate()
+    sustainable = [result['users'] for result in results
+                   if result['ratio'] >= SUSTAINABLE_RATIO]
+    print(f'Максимум пользователей на процесс: '
+          f'{max(sustainable) if sustainable else 0}')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
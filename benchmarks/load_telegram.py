@@ -0,0 +1,128 @@
+"""Нагрузочный прогон отправки сообщений через локальный Bot API.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.load_telegram --messages 600 --chats 10 50 200
+
+Без --api-url поддельный Bot API запускается в отдельном процессе.
+Сообщения идут через SendQueue и настоящий TeleBot, поэтому в замер
+входят лимиты частоты, повторы после 429 и склейка сообщений.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+
+from telebot import TeleBot
+
+import homework
+from fakes.telegram_api import create_server
+from fakes.telegram_api import parse_args as parse_server_args
+from send_queue import CHAT_RATE, GLOBAL_RATE, SendQueue
+
+DEFAULT_CHATS = (1, 10, 50, 200)
+STOP_TIMEOUT = 600
+
+
+def serve_fake_api(server_argv, connection):
+    """Запуск поддельного Bot API в дочернем процессе.
+
+    На каждый запрос из канала отвечает статистикой сервера.
+    """
+    server = create_server(parse_server_args(server_argv))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    connection.send(server.base_url)
+    while connection.recv():
+        connection.send((len(server.api.messages), dict(server.api.stats)))
+
+
+def start_fake_api(server_argv):
+    """Запуск поддельного Bot API, его адрес и канал для статистики."""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=serve_fake_api, args=(server_argv, child), daemon=True
+    )
+    process.start()
+    return process, parent.recv(), parent
+
+
+def measure(bot, messages, chats, global_rate, chat_rate):
+    """Отправка `messages` сообщений в `chats` чатов и время до конца."""
+    send_queue = SendQueue(bot, global_rate=global_rate,
+                           chat_rate=chat_rate).start()
+    start = time.perf_counter()
+    for number in range(messages):
+        send_queue.put(str(number % chats + 1), f'Сообщение {number}')
+    send_queue.stop(STOP_TIMEOUT)
+    elapsed = time.perf_counter() - start
+    return {
+        'chats': chats,
+        'messages': messages,
+        'requests': send_queue.sent + send_queue.failed,
+        'sent': send_queue.sent,
+        'failed': send_queue.failed,
+        'seconds': elapsed,
+        'messages_per_sec': messages / elapsed,
+        'requests_per_sec': send_queue.sent / elapsed,
+    }
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=300)
+    parser.add_argument('--chats', type=int, nargs='+',
+                        default=DEFAULT_CHATS)
+    parser.add_argument('--global-rate', type=float, default=GLOBAL_RATE,
+                        help='общий лимит очереди, сообщений в секунду')
+    parser.add_argument('--chat-rate', type=float, default=CHAT_RATE,
+                        help='лимит очереди на чат, сообщений в секунду')
+    parser.add_argument('--api-url', help='адрес уже запущенного Bot API')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--server-args', default='',
+                        help='аргументы для fakes.telegram_api, например '
+                             '"--latency 0.05 --failure-rate 0.01"')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Замер пропускной способности отправки сообщений."""
+    args = parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    process = connection = None
+    api_url = args.api_url
+    if api_url is None:
+        process, api_url, connection = start_fake_api(
+            args.server_args.split()
+        )
+    homework.configure_telegram_api(api_url)
+    bot = TeleBot(token='load-test-token')
+    results = []
+    recorded = 0
+    try:
+        for chats in args.chats:
+            result = measure(bot, args.messages, chats, args.global_rate,
+                             args.chat_rate)
+            if connection is not None:
+                connection.send(True)
+                total, result['server_stats'] = connection.recv()
+                result['recorded'], recorded = total - recorded, total
+            results.append(result)
+            print(f'{chats:>6} чатов  {result["messages_per_sec"]:>9.1f} '
+                  f'сообщ./с  {result["requests_per_sec"]:>7.1f} запр./с  '
+                  f'ошибок {result["failed"]}')
+    finally:
+        if process is not None:
+            connection.send(False)
+            process.terminate()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Память на одну отслеживаемую домашнюю работу.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.memory_state --homeworks 100000
+
+Сравнивает прежнее представление состояния (список из строки статуса
+и строки даты) с записями HomeworkRecord. В замер входит и копия
+состояния в кеше хранилища, которую делает `save`. Кеш разобранных дат
+ограничен `DATE_CACHE_SIZE` записями на процесс, поэтому он печатается
+отдельно и в память на работу не входит.
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from state import (BotState, HomeworkRecord, MemoryStateStorage,
+                   parse_date_string)
+
+from .bench_pipeline import make_homeworks
+
+
+def make_body(size):
+    """Тело ответа API с разными датами изменения работ."""
+    homeworks = make_homeworks(size)
+    for item in homeworks:
+        item['date_updated'] = time.strftime(
+            '%Y-%m-%dT%H:%M:%SZ', time.gmtime(1700000000 + item['id'])
+        )
+    return json.dumps(homeworks)
+
+
+def legacy_state(homeworks):
+    """Состояние в прежнем виде: [статус, date_updated] на работу."""
+    return {str(item['id']): [item['status'], item['date_updated']]
+            for item in homeworks}
+
+
+def legacy_save(state):
+    """Копия прежнего состояния в кеше хранилища."""
+    return {key: list(value) for key, value in state.items()}
+
+
+def record_state(homeworks):
+    """Состояние из записей HomeworkRecord."""
+    return BotState(timestamp=0, homeworks={
+        str(item['id']): HomeworkRecord.from_homework(item)
+        for item in homeworks
+    })
+
+
+def record_save(state):
+    """Копия состояния в кеше хранилища."""
+    storage = MemoryStateStorage()
+    storage.save('1', state)
+    return storage
+
+
+def measure(build, save, body, size):
+    """Байты на одну работу: в состоянии и вместе с кешем хранилища.
+
+    Ответ API разбирается под замером и освобождается, поэтому в итог
+    попадает только то, что состояние удерживает после цикла опроса.
+    Третье значение — байты кеша разобранных дат.
+    """
+    parse_date_string.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        homeworks = json.loads(body)
+        state = build(homeworks)
+        del homeworks
+        gc.collect()
+        with_dates = tracemalloc.get_traced_memory()[0]
+        parse_date_string.cache_clear()
+        state_bytes = tracemalloc.get_traced_memory()[0]
+        cache = save(state)
+        total_bytes = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del state, cache
+    return state_bytes / size, total_bytes / size, with_dates - state_bytes
+
+
+def main(argv=None):
+    """Печать памяти на работу для обоих представлений."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--homeworks', type=int, default=100000)
+    args = parser.parse_args(argv)
+    body = make_body(args.homeworks)
+    for name, build, save in (
+        ('list', legacy_state, legacy_save),
+        ('HomeworkRecord', record_state, record_save),
+    ):
+        state_bytes, total_bytes, date_bytes = measure(build, save, body,
+                                                       args.homeworks)
+        print(f'{name:<16} {state_bytes:>7.1f} Б/работа в состоянии  '
+              f'{total_bytes:>7.1f} Б/работа с кешем хранилища  '
+              f'{max(date_bytes, 0) / 2 ** 20:>5.1f} МБ кеш дат')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
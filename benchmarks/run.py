@@ -0,0 +1,46 @@
+"""Бенчмарки цикла опроса: запрос, разбор ответа и отправка.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.run --output bench_results.json
+    python -m benchmarks.run --compare bench_results.json
+"""
+import argparse
+import logging
+import sys
+
+from . import bench_pipeline  # noqa: F401
+from .harness import compare_results, run_benchmarks, write_results
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='selected', action='append',
+                        help='запускать бенчмарки, имя которых содержит '
+                             'подстроку')
+    parser.add_argument('--quick', action='store_true',
+                        help='пропустить большие размеры ответов')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--compare', help='JSON предыдущего запуска')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='допустимое замедление, доля')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Запуск бенчмарков и сравнение с предыдущим запуском."""
+    args = parse_args(argv)
+    # Заглушки пишут в лог на каждом вызове, это исказило бы замеры.
+    logging.disable(logging.CRITICAL)
+    results = run_benchmarks(args.selected, quick=args.quick)
+    if args.output:
+        write_results(results, args.output)
+    if args.compare:
+        if compare_results(args.compare, results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
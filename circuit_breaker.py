@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+
+from expections import CircuitOpen, EndpointUnavailable, UnexpectedStatusCode
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+# Число сбоев подряд, после которого запросы приостанавливаются.
+FAILURE_THRESHOLD = 5
+# Через сколько секунд после размыкания пропускается пробный запрос.
+RECOVERY_TIMEOUT = 60
+
+
+def is_outage(error):
+    """Проверка, говорит ли ошибка о недоступности API.
+
+    Ответы 4xx относятся к конкретному запросу или токену и сервис
+    недоступным не считают.
+    """
+    if isinstance(error, UnexpectedStatusCode):
+        return error.status_code is None or error.status_code >= 500
+    return isinstance(error, EndpointUnavailable)
+
+
+class CircuitBreaker:
+    """Автомат, приостанавливающий запросы к недоступному API.
+
+    В состоянии closed запросы идут как обычно. После `failure_threshold`
+    сбоев подряд автомат размыкается (open) и сразу поднимает CircuitOpen,
+    не обращаясь к сети. Через `recovery_timeout` секунд он переходит в
+    half-open и пропускает один пробный запрос: успех замыкает его снова,
+    сбой размыкает еще на `recovery_timeout`. Один автомат разделяют все
+    подписки процесса. Порог 0 выключает автомат.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD,
+                 recovery_timeout=RECOVERY_TIMEOUT, is_failure=is_outage,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.is_failure = is_failure
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.last_error = None
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _reject(self, retry_after):
+        error = CircuitOpen('API Практикума недоступен, запросы '
+                            'приостановлены. Следующая попытка через '
+                            f'{retry_after:.0f} с.', retry_after=retry_after)
+        # Причина — последний сбой, по ней же группируются уведомления.
+        raise error from self.last_error
+
+    def before_call(self):
+        """Разрешение запроса или CircuitOpen, если он не нужен."""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = (self._opened_at + self.recovery_timeout
+                             - self.clock())
+                if remaining > 0:
+                    self._reject(remaining)
+                self.state = HALF_OPEN
+                logging.info('Пробный запрос к API после сбоев.')
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    self._reject(self.recovery_timeout)
+                self._probing = True
+
+    def on_success(self):
+        """Учет успешного ответа."""
+        with self._lock:
+            if self.state != CLOSED:
+                logging.info('API Практикума снова доступен.')
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def on_failure(self, error):
+        """Учет ошибки запроса."""
+        if not self.is_failure(error):
+            # API ответил, значит он доступен.
+            self.on_success()
+            return
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            self._probing = False
+            if self.state == HALF_OPEN or (
+                self.failure_threshold
+                and self.failures >= self.failure_threshold
+            ):
+                if self.state != OPEN:
+                    logging.warning(
+                        f'API Практикума недоступен после {self.failures} '
+                        f'сбоев подряд, запросы приостановлены на '
+                        f'{self.recovery_timeout} с.'
+                    )
+                self.state = OPEN
+                self._opened_at = self.clock()
+
+    def on_cancel(self):
+        """Освобождение пробного запроса, прерванного без результата."""
+        with self._lock:
+            self._probing = False
+
+    def call(self, fetch, *args, **kwargs):
+        """Запрос через автомат."""
+        self.before_call()
+        try:
+            result = fetch(*args, **kwargs)
+        except Exception as error:
+            self.on_failure(error)
+            raise
+        except BaseException:
+            self.on_cancel()
+            raise
+        self.on_success()
+        return result
+
+    async def acall(self, fetch, *args, **kwargs):
+        """Асинхронный аналог `call`; `fetch` — корутинная функция."""
+        self.before_call()
+        try:
+            result = await fetch(*args, **kwargs)
+        except Exception as error:
+            self.on_failure(error)
+            raise
+        except BaseException:
+            self.on_cancel()
+            raise
+        self.on_success()
+        return result
@@ -0,0 +1,153 @@
+import logging
+from datetime import datetime
+
+from subscriptions import Subscription, add_subscription
+
+# Сколько работ перечисляется в ответе на /status.
+MAX_STATUS_LINES = 20
+# Сколько событий из журнала перечисляется в ответе на /history.
+MAX_HISTORY_LINES = 20
+
+HELP = (
+    'Команды:\n'
+    '/status — текущие статусы работ\n'
+    '/history — последние уведомления\n'
+    '/start <токен Практикума> — подписка на уведомления'
+)
+NOT_SUBSCRIBED = ('Этот чат не подписан на уведомления. Отправьте '
+                  '/start <токен Практикума>.')
+
+
+def parse_command(text):
+    """Команда без слеша и имени бота и ее аргумент.
+
+    Для текста, который не является командой, команда — None.
+    """
+    if not text or not text.startswith('/'):
+        return None, ''
+    command, _, argument = text[1:].partition(' ')
+    return command.partition('@')[0].lower(), argument.strip()
+
+
+class CommandHandler:
+    """Ответы на команды из чата.
+
+    Ответы строятся по состоянию, которое планировщик держит в памяти,
+    поэтому команды не обращаются к API Практикума. `scheduler` должен
+    предоставлять `get_states(chat_id)`, `history`, `events` и
+    `subscribe()`. Если у планировщика есть журнал событий, история
+    берется из него, иначе — из последних уведомлений в памяти.
+    Новые подписки дописываются в реестр `registry_path`, если он задан.
+    """
+
+    def __init__(self, scheduler, renderer, registry_path=None):
+        self.scheduler = scheduler
+        self.renderer = renderer
+        self.registry_path = registry_path
+        self.commands = {
+            'start': self.start,
+            'help': self.help,
+            'status': self.status,
+            'history': self.history,
+        }
+
+    def handle(self, chat_id, text):
+        """Текст ответа на сообщение или None, если отвечать не нужно."""
+        command, argument = parse_command(text)
+        if command is None:
+            return None
+        method = self.commands.get(command)
+        if method is None:
+            return f'Неизвестная команда /{command}.\n{HELP}'
+        return method(str(chat_id), argument)
+
+    @staticmethod
+    def is_secret(text):
+        """Проверка, содержит ли сообщение токен, который стоит удалить."""
+        command, argument = parse_command(text)
+        return command == 'start' and bool(argument)
+
+    def help(self, chat_id, argument):
+        """Список команд."""
+        return HELP
+
+    def start(self, chat_id, argument):
+        """Подписка чата на уведомления по токену Практикума."""
+        if not argument:
+            if self.scheduler.get_states(chat_id):
+                return f'Чат уже подписан на уведомления.\n{HELP}'
+            return f'{NOT_SUBSCRIBED}\n{HELP}'
+        subscription = Subscription(token=argument, chat_id=chat_id)
+        if not self.scheduler.subscribe(subscription):
+            return 'Подписка с этим токеном уже есть.'
+        if self.registry_path:
+            try:
+                add_subscription(self.registry_path, subscription)
+            except Exception as error:
+                logging.error(f'Не удалось сохранить подписку '
+                              f'{subscription.key}: {error}', exc_info=True)
+        logging.info(f'Новая подписка {subscription.key}.')
+        return ('Подписка оформлена: бот сообщит, когда изменится статус '
+                'проверки работы. Сообщение с токеном лучше удалить.')
+
+    def status(self, chat_id, argument):
+        """Текущие статусы работ по данным последнего опроса."""
+        states = self.scheduler.get_states(chat_id)
+        if not states:
+            return NOT_SUBSCRIBED
+        records = sorted(
+            ((record, homework_id, state.language)
+             for state in states.values()
+             for homework_id, record in state.homeworks.items()),
+            key=lambda item: item[0].updated_at,
+            reverse=True,
+        )
+        if not records:
+            return 'Работ на проверке пока нет.'
+        lines = []
+        for record, homework_id, language in records[:MAX_STATUS_LINES]:
+            name = (self.scheduler.names.get(homework_id)
+                    or f'Работа {homework_id}')
+            verdict = self.renderer.verdict(record.status, language)
+            lines.append(f'{name}: {verdict or record.status}')
+        if len(records) > MAX_STATUS_LINES:
+            lines.append(f'И еще работ: {len(records) - MAX_STATUS_LINES}.')
+        return '\n'.join(lines)
+
+    def history(self, chat_id, argument):
+        """История изменений статусов работ чата."""
+        states = self.scheduler.get_states(chat_id)
+        if not states:
+            return NOT_SUBSCRIBED
+        if self.scheduler.events is not None:
+            return self.event_history(states)
+        history = self.scheduler.history.get(chat_id)
+        if not history:
+            return 'Уведомлений пока не было.'
+        return '\n\n'.join(
+            f'{datetime.fromtimestamp(sent_at):%d.%m %H:%M} {text}'
+            for sent_at, text in reversed(history)
+        )
+
+    def event_history(self, states):
+        """Последние изменения статусов работ по журналу событий.
+
+        `states` — состояния подписок чата по ключам подписок.
+        """
+        events = sorted(
+            (event
+             for key, state in states.items()
+             for homework_id in state.homeworks
+             for event in self.scheduler.events.history(key, homework_id)
+             if event is not None),
+            key=lambda event: event.observed_at,
+        )[-MAX_HISTORY_LINES:]
+        if not events:
+            return 'Изменений статусов пока не было.'
+        language = next(iter(states.values())).language
+        return '\n'.join(
+            f'{datetime.fromtimestamp(event.observed_at):%d.%m %H:%M} '
+            f'{event.homework_name or event.homework_id}: '
+            f'{self.renderer.verdict(event.status, language) or event.status}'
+            for event in events
+        )
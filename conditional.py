@@ -0,0 +1,66 @@
+import hashlib
+from http import HTTPStatus
+
+from metrics import CONDITIONAL_RESPONSES
+
+
+class ResponseValidators:
+    """Валидаторы последних ответов API для условных запросов.
+
+    Для каждого ключа хранятся ETag, Last-Modified и хеш тела ответа.
+    Ключ — подписка, которая разбирает ответ: ответ "не изменился" только
+    для того, кто уже разобрал прошлый, поэтому подписки с одним токеном
+    не должны делить валидаторы. Если сервер ответил 304 или прислал
+    то же тело, что и в прошлый раз, ответ считается неизменившимся и
+    его разбор пропускается. Исходы считаются в `requests` и
+    `not_modified` и в метрике CONDITIONAL_RESPONSES.
+    """
+
+    def __init__(self):
+        self._validators = {}
+        self.requests = 0
+        self.not_modified = 0
+
+    def request_headers(self, key):
+        """Заголовки условного запроса для ключа."""
+        etag, last_modified, _ = self._validators.get(key, (None,) * 3)
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def forget(self, key):
+        """Удаление валидаторов ключа.
+
+        Нужно, если ответ не удалось обработать до конца: иначе повтор
+        того же запроса будет считаться неизменившимся.
+        """
+        self._validators.pop(key, None)
+
+    def is_not_modified(self, key, status, headers, body):
+        """Проверка ответа и сохранение его валидаторов.
+
+        `body` — сырое тело ответа в байтах.
+        """
+        not_modified = self._check(key, status, headers, body)
+        self.requests += 1
+        if not_modified:
+            self.not_modified += 1
+        CONDITIONAL_RESPONSES.inc(
+            result='not_modified' if not_modified else 'modified'
+        )
+        return not_modified
+
+    def _check(self, key, status, headers, body):
+        if status == HTTPStatus.NOT_MODIFIED:
+            return True
+        if status != HTTPStatus.OK:
+            return False
+        body_hash = hashlib.sha256(body).hexdigest()
+        previous = self._validators.get(key)
+        self._validators[key] = (
+            headers.get('ETag'), headers.get('Last-Modified'), body_hash
+        )
+        return bool(previous) and previous[2] == body_hash
@@ -0,0 +1,275 @@
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from state import HomeworkRecord, get_status_code
+
+# Как часто журнал проверяется на устаревшие события, секунды.
+COMPACT_INTERVAL = 24 * 60 * 60
+# Сколько хранятся события, кроме последнего по каждой работе; 0 — всегда.
+RETENTION = 0
+
+# Наблюдение нового статуса работы; урок и комментарий ревьюера
+# записываются, если API их вернул.
+Event = namedtuple('Event', ('key', 'homework_id', 'homework_name',
+                             'status', 'date_updated', 'observed_at',
+                             'lesson_name', 'reviewer_comment'),
+                   defaults=(None, None))
+
+
+def encode_event(event):
+    """Строка журнала для события."""
+    data = {
+        'key': event.key,
+        'id': event.homework_id,
+        'name': event.homework_name,
+        'status': event.status,
+        'date_updated': event.date_updated,
+        'observed_at': event.observed_at,
+    }
+    if event.lesson_name is not None:
+        data['lesson'] = event.lesson_name
+    if event.reviewer_comment is not None:
+        data['comment'] = event.reviewer_comment
+    return json.dumps(data, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def get_event(data):
+    """Событие из разобранной строки журнала или None."""
+    try:
+        return Event(data['key'], data['id'], data.get('name'),
+                     data['status'], data['date_updated'],
+                     data['observed_at'], data.get('lesson'),
+                     data.get('comment'))
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+
+def decode_event(line):
+    """Событие из строки журнала или None для поврежденной строки."""
+    try:
+        return get_event(json.loads(line))
+    except ValueError:
+        return None
+
+
+class EventLog:
+    """Журнал изменений статусов работ в файле JSONL.
+
+    События только дописываются в конец файла. В памяти хранится индекс:
+    для каждой работы каждой подписки — смещения ее событий в файле,
+    поэтому история работы читается без просмотра всего журнала, а
+    последние состояния работ подписки восстанавливаются без повторного
+    чтения файла. Чтение идет через mmap. Повтор уже записанного статуса не
+    дописывается. `compact` удаляет поврежденные строки и события старше
+    `retention` секунд, оставляя последнее событие каждой работы.
+    """
+
+    def __init__(self, path, retention=RETENTION,
+                 compact_interval=COMPACT_INTERVAL):
+        self.path = path
+        self.retention = retention
+        self.compact_interval = compact_interval
+        self._offsets = {}
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._map = None
+        self._mapped_size = 0
+        self._compacted_at = time.monotonic()
+        self._file = open(path, 'ab')
+        self._size = self._file.tell()
+        self._repair_tail()
+        self._build_index()
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self._offsets.values())
+
+    def close(self):
+        """Закрытие файла журнала."""
+        with self._lock:
+            self._unmap()
+            self._file.close()
+
+    def _unmap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._mapped_size = 0
+
+    def _view(self):
+        """Отображение файла в память с учетом дописанных строк."""
+        if self._size == 0:
+            return b''
+        if self._mapped_size != self._size:
+            self._unmap()
+            with open(self.path, 'rb') as file:
+                self._map = mmap.mmap(file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._map)
+        return self._map
+
+    def _scan(self):
+        """Смещения и события всех строк журнала."""
+        view = self._view()
+        offset = 0
+        while offset < len(view):
+            end = view.find(b'\n', offset)
+            if end == -1:
+                return
+            yield offset, decode_event(view[offset:end])
+            offset = end + 1
+
+    def _repair_tail(self):
+        """Отрезание строки, оборванной при сбое записи."""
+        view = self._view()
+        end = view.rfind(b'\n') + 1 if len(view) else 0
+        if end < self._size:
+            logging.warning(f'В журнале {self.path} оборвана последняя '
+                            'строка, она удалена.')
+            self._unmap()
+            self._file.truncate(end)
+            self._size = end
+
+    def _index(self, offset, event):
+        self._offsets.setdefault(
+            (event.key, event.homework_id), array('q')
+        ).append(offset)
+        self._latest.setdefault(event.key, {})[event.homework_id] = (
+            event.status, event.date_updated, event.homework_name
+        )
+
+    def _build_index(self):
+        self._offsets.clear()
+        self._latest.clear()
+        for offset, event in self._scan():
+            if event is not None:
+                self._index(offset, event)
+
+    def append(self, events):
+        """Запись событий в конец журнала; возвращает число записанных."""
+        written = 0
+        with self._lock:
+            for event in events:
+                latest = self._latest.get(event.key, {}).get(event.homework_id)
+                if latest and latest[:2] == (event.status, event.date_updated):
+                    continue
+                line = encode_event(event)
+                self._file.write(line)
+                self._index(self._size, event)
+                self._size += len(line)
+                written += 1
+            self._file.flush()
+        return written
+
+    def record(self, key, records, homeworks=None, observed_at=None):
+        """Запись новых состояний работ одной подписки.
+
+        `homeworks` — работы из ответа API по тем же ключам, из них берутся
+        название, урок и комментарий ревьюера.
+        """
+        observed_at = int(time.time() if observed_at is None
+                          else observed_at)
+        homeworks = homeworks or {}
+        events = []
+        for homework_id, record in records.items():
+            homework = homeworks.get(homework_id, {})
+            events.append(Event(
+                key, homework_id, homework.get('homework_name'), record.status,
+                record.updated_at, observed_at,
+                homework.get('lesson_name'),
+                homework.get('reviewer_comment') or None,
+            ))
+        return self.append(events)
+
+    def history(self, key, homework_id):
+        """События одной работы подписки `key` в порядке записи."""
+        with self._lock:
+            view = self._view()
+            events = []
+            for offset in self._offsets.get((key, str(homework_id)), ()):
+                end = view.find(b'\n', offset)
+                events.append(decode_event(view[offset:end]))
+            return events
+
+    def replay(self):
+        """Все события журнала в порядке записи."""
+        with self._lock:
+            return [event for _, event in self._scan() if event is not None]
+
+    def rebuild(self, key):
+        """Последние состояния работ подписки по событиям журнала."""
+        with self._lock:
+            latest = dict(self._latest.get(key, {}))
+        return {
+            homework_id: HomeworkRecord(get_status_code(status), updated_at)
+            for homework_id, (status, updated_at, _) in latest.items()
+        }
+
+    def names(self, key):
+        """Названия работ подписки из журнала."""
+        with self._lock:
+            return {homework_id: name
+                    for homework_id, (_, _, name)
+                    in self._latest.get(key, {}).items() if name}
+
+    def compact(self, now=None):
+        """Перезапись журнала без устаревших и поврежденных строк.
+
+        Возвращает число удаленных строк.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            lines = list(self._scan())
+            last = {}
+            for index, (_, event) in enumerate(lines):
+                if event is not None:
+                    last[event.key, event.homework_id] = index
+            keep = [
+                event for index, (_, event) in enumerate(lines)
+                if event is not None and (
+                    not self.retention
+                    or now - event.observed_at < self.retention
+                    or last[event.key, event.homework_id] == index
+                )
+            ]
+            directory = os.path.dirname(os.path.abspath(self.path))
+            descriptor, tmp_path = tempfile.mkstemp(dir=directory,
+                                                    suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'wb') as file:
+                    for event in keep:
+                        file.write(encode_event(event))
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError:
+                os.unlink(tmp_path)
+                raise
+            self._unmap()
+            self._file.close()
+            self._file = open(self.path, 'ab')
+            self._size = self._file.tell()
+            self._build_index()
+            self._compacted_at = time.monotonic()
+        removed = len(lines) - len(keep)
+        if removed:
+            logging.info(f'Журнал событий сжат, удалено строк: {removed}.')
+        return removed
+
+    def maybe_compact(self):
+        """Сжатие журнала, если с прошлого прошло `compact_interval`."""
+        if time.monotonic() - self._compacted_at < self.compact_interval:
+            return 0
+        try:
+            return self.compact()
+        except OSError as error:
+            logging.error(f'Не удалось сжать журнал событий: {error}',
+                          exc_info=True)
+            return 0
@@ -3,3 +3,34 @@ class UnavailableTokens(Exception):
 
 class UnsuccessfulSendMessage(Exception):
     pass
+
+class EndpointUnavailable(Exception):
+    pass
+
+class UnexpectedStatusCode(Exception):
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class InvalidResponse(Exception):
+    # Без кавычек вокруг сообщения, которые добавляет KeyError.
+    __str__ = Exception.__str__
+
+    def __init__(self, message, path=None):
+        super().__init__(message)
+        self.path = path
+
+class MissingField(InvalidResponse, KeyError):
+    pass
+
+class WrongType(InvalidResponse, TypeError):
+    pass
+
+class InvalidValue(InvalidResponse, ValueError):
+    pass
+
+class CircuitOpen(EndpointUnavailable):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,229 @@
+"""Локальная замена API статусов домашних работ Практикума."""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PATH = '/api/user_api/homework_statuses/'
+VERDICTS = ('approved', 'rejected')
+DEFAULT_HOMEWORKS = 3
+DEFAULT_TRANSITION_INTERVAL = 60
+
+
+def format_date(timestamp):
+    """Дата в формате поля date_updated."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        '%Y-%m-%dT%H:%M:%SZ'
+    )
+
+
+class TokenHistory:
+    """История домашних работ одного студента.
+
+    Раз в `transition_interval` секунд самая старая работа на проверке
+    получает вердикт, а на проверку уходит новая работа.
+    """
+
+    def __init__(self, homeworks, transition_interval, now, rng):
+        self.transition_interval = transition_interval
+        self.rng = rng
+        self.items = []
+        for number in range(homeworks):
+            self._add(number, 'approved', now - (homeworks - number) * 3600)
+        if self.items:
+            self.items[-1]['status'] = 'reviewing'
+        self.next_transition = now + transition_interval
+
+    def _add(self, number, status, updated_at):
+        self.items.append({
+            'id': number + 1,
+            'homework_name': f'student__hw{number + 1}.zip',
+            'lesson_name': f'Спринт {number + 1}',
+            'reviewer_comment': '',
+            'status': status,
+            'updated_at': updated_at,
+        })
+
+    def advance(self, now):
+        """Применение переходов статусов, наступивших к моменту `now`."""
+        while self.transition_interval and self.next_transition <= now:
+            moment = self.next_transition
+            for item in self.items:
+                if item['status'] == 'reviewing':
+                    item['status'] = self.rng.choice(VERDICTS)
+                    item['updated_at'] = moment
+                    break
+            self._add(len(self.items), 'reviewing', moment)
+            self.next_transition += self.transition_interval
+
+    def changed_since(self, from_date):
+        """Работы, изменившиеся начиная с `from_date`, от новых к старым."""
+        return [
+            {**{key: value for key, value in item.items()
+                if key != 'updated_at'},
+             'date_updated': format_date(item['updated_at'])}
+            for item in sorted(self.items, key=lambda item: -item['updated_at'])
+            if item['updated_at'] >= from_date
+        ]
+
+
+class FakePracticumApi:
+    """Состояние и поведение поддельного API.
+
+    `latency` — задержка ответа в секундах, `error_rate` и
+    `rate_limit_rate` — доли ответов 500 и 429.
+    """
+
+    def __init__(self, homeworks=DEFAULT_HOMEWORKS,
+                 transition_interval=DEFAULT_TRANSITION_INTERVAL,
+                 latency=0, error_rate=0, rate_limit_rate=0, retry_after=1,
+                 seed=None):
+        self.homeworks = homeworks
+        self.transition_interval = transition_interval
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.histories = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def handle(self, authorization, query):
+        """Ответ на запрос: статус, заголовки и тело."""
+        if not authorization or not authorization.startswith('OAuth '):
+            return self._reply(HTTPStatus.UNAUTHORIZED, {
+                'code': 'not_authenticated',
+                'message': 'Учетные данные не были предоставлены.',
+                'source': '__response__',
+            })
+        try:
+            from_date = int(query.get('from_date', ['0'])[0])
+        except ValueError:
+            return self._reply(HTTPStatus.BAD_REQUEST, {
+                'code': 'UnknownError',
+                'error': {'error': 'Wrong from_date format'},
+            })
+        with self._lock:
+            roll = self.rng.random()
+            if roll < self.rate_limit_rate:
+                return self._reply(
+                    HTTPStatus.TOO_MANY_REQUESTS, {'detail': 'Throttled'},
+                    {'Retry-After': str(self.retry_after)},
+                )
+            if roll < self.rate_limit_rate + self.error_rate:
+                return self._reply(HTTPStatus.INTERNAL_SERVER_ERROR, {})
+            now = int(time.time())
+            token = authorization[len('OAuth '):]
+            history = self.histories.get(token)
+            if history is None:
+                history = self.histories[token] = TokenHistory(
+                    self.homeworks, self.transition_interval, now, self.rng
+                )
+            history.advance(now)
+            homeworks = history.changed_since(from_date)
+        return self._reply(HTTPStatus.OK, {
+            'homeworks': homeworks, 'current_date': now,
+        })
+
+    def _reply(self, status, data, headers=None):
+        with self._stats_lock:
+            self.stats[int(status)] = self.stats.get(int(status), 0) + 1
+        return status, headers or {}, json.dumps(data).encode('utf-8')
+
+
+class PracticumRequestHandler(BaseHTTPRequestHandler):
+    """HTTP-обработчик поддельного API."""
+
+    def do_GET(self):
+        """Ответ на запрос статусов домашних работ."""
+        url = urlsplit(self.path)
+        if url.path != API_PATH:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        api = self.server.api
+        if api.latency:
+            time.sleep(api.latency)
+        status, headers, body = api.handle(
+            self.headers.get('Authorization'), parse_qs(url.query)
+        )
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Запросы пишутся в лог только на уровне DEBUG."""
+        logging.debug(f'Поддельный API Практикума: {format % args}')
+
+
+class FakePracticumServer(ThreadingHTTPServer):
+    """HTTP-сервер поддельного API Практикума."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, api, host='127.0.0.1', port=0):
+        super().__init__((host, port), PracticumRequestHandler)
+        self.api = api
+
+    @property
+    def endpoint(self):
+        """Адрес, который подставляется в PRACTICUM_ENDPOINT."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}{API_PATH}'
+
+    def start(self):
+        """Запуск сервера в фоновом потоке."""
+        threading.Thread(target=self.serve_forever, daemon=True,
+                         name='fake-practicum-api').start()
+        return self
+
+    def stop(self):
+        """Остановка сервера."""
+        self.shutdown()
+        self.server_close()
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--homeworks', type=int, default=DEFAULT_HOMEWORKS)
+    parser.add_argument('--transition-interval', type=float,
+                        default=DEFAULT_TRANSITION_INTERVAL)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args(argv)
+
+
+def create_server(args):
+    """Создание сервера по аргументам командной строки."""
+    api = FakePracticumApi(
+        homeworks=args.homeworks,
+        transition_interval=args.transition_interval,
+        latency=args.latency, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after, seed=args.seed,
+    )
+    return FakePracticumServer(api, args.host, args.port)
+
+
+if __name__ == '__main__':
+    server = create_server(parse_args())
+    print(f'PRACTICUM_ENDPOINT={server.endpoint}')
+    server.serve_forever()
@@ -0,0 +1,216 @@
+"""Локальная замена метода sendMessage Telegram Bot API."""
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from send_queue import TokenBucket
+
+METHOD_PATH = re.compile(r'^/bot(?P<token>[^/]+)/(?P<method>\w+)$')
+DEFAULT_GLOBAL_RATE = 30
+DEFAULT_CHAT_RATE = 1
+
+
+class FakeTelegramApi:
+    """Состояние и поведение поддельного Bot API.
+
+    Лимиты задаются в сообщениях в секунду, 0 отключает лимит. При
+    превышении лимита отвечает 429 с parameters.retry_after, как
+    настоящий API. `failure_rate` — доля ответов 502, `latency` —
+    задержка ответа в секундах. Принятые сообщения копятся в `messages`.
+    """
+
+    def __init__(self, global_rate=DEFAULT_GLOBAL_RATE,
+                 chat_rate=DEFAULT_CHAT_RATE, latency=0, failure_rate=0,
+                 seed=None):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.messages = []
+        self.stats = {}
+        self._global_bucket = (TokenBucket(global_rate, capacity=global_rate)
+                               if global_rate else None)
+        self._chat_buckets = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def handle(self, method, params):
+        """Ответ на вызов метода: статус и тело."""
+        if method != 'sendMessage':
+            return self._reply(HTTPStatus.NOT_FOUND, {
+                'ok': False, 'error_code': 404, 'description': 'Not Found',
+            })
+        chat_id, text = params.get('chat_id'), params.get('text')
+        if not chat_id or not text:
+            return self._reply(HTTPStatus.BAD_REQUEST, {
+                'ok': False, 'error_code': 400,
+                'description': 'Bad Request: message text is empty',
+            })
+        with self._lock:
+            if self.rng.random() < self.failure_rate:
+                return self._reply(HTTPStatus.BAD_GATEWAY, {
+                    'ok': False, 'error_code': 502,
+                    'description': 'Bad Gateway',
+                })
+            retry_after = self._take_token(str(chat_id))
+            if retry_after:
+                return self._reply(HTTPStatus.TOO_MANY_REQUESTS, {
+                    'ok': False, 'error_code': 429,
+                    'description': 'Too Many Requests: retry after '
+                                   f'{retry_after}',
+                    'parameters': {'retry_after': retry_after},
+                })
+            now = time.time()
+            self.messages.append((str(chat_id), text, now))
+            message_id = len(self.messages)
+        return self._reply(HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': message_id,
+            'date': int(now),
+            'chat': {'id': int(chat_id), 'type': 'private'},
+            'text': text,
+        }})
+
+    def _take_token(self, chat_id):
+        """Расход токенов лимитов или пауза в секундах до свободного."""
+        buckets = []
+        if self._global_bucket is not None:
+            buckets.append(self._global_bucket)
+        if self.chat_rate:
+            buckets.append(self._chat_buckets.setdefault(
+                chat_id, TokenBucket(self.chat_rate)
+            ))
+        now = time.monotonic()
+        delay = max((bucket.delay(now) for bucket in buckets), default=0)
+        if delay:
+            # Настоящий API отвечает целым числом секунд, не меньше одной.
+            return max(int(delay + 0.999), 1)
+        for bucket in buckets:
+            bucket.consume(now)
+        return 0
+
+    def _reply(self, status, data):
+        with self._stats_lock:
+            self.stats[int(status)] = self.stats.get(int(status), 0) + 1
+        return status, json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def parse_params(query, content_type, body):
+    """Параметры вызова из строки запроса и тела любого формата."""
+    params = {key: values[0] for key, values in parse_qs(query).items()}
+    if not body:
+        return params
+    if content_type.startswith('application/json'):
+        params.update(json.loads(body))
+    else:
+        params.update({
+            key: values[0]
+            for key, values in parse_qs(body.decode('utf-8')).items()
+        })
+    return params
+
+
+class TelegramRequestHandler(BaseHTTPRequestHandler):
+    """HTTP-обработчик поддельного Bot API."""
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        match = METHOD_PATH.match(url.path)
+        if match is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        try:
+            params = parse_params(
+                url.query, self.headers.get('Content-Type', ''), body
+            )
+        except ValueError:
+            self.send_error(HTTPStatus.BAD_REQUEST)
+            return
+        api = self.server.api
+        if api.latency:
+            time.sleep(api.latency)
+        status, body = api.handle(match['method'], params)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """Вызов метода через GET."""
+        self._handle()
+
+    def do_POST(self):
+        """Вызов метода через POST."""
+        self._handle()
+
+    def log_message(self, format, *args):
+        """Запросы пишутся в лог только на уровне DEBUG."""
+        logging.debug(f'Поддельный Bot API: {format % args}')
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    """HTTP-сервер поддельного Bot API."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, api, host='127.0.0.1', port=0):
+        super().__init__((host, port), TelegramRequestHandler)
+        self.api = api
+
+    @property
+    def base_url(self):
+        """Адрес, который подставляется в TELEGRAM_API_URL."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Запуск сервера в фоновом потоке."""
+        threading.Thread(target=self.serve_forever, daemon=True,
+                         name='fake-telegram-api').start()
+        return self
+
+    def stop(self):
+        """Остановка сервера."""
+        self.shutdown()
+        self.server_close()
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8082)
+    parser.add_argument('--global-rate', type=float,
+                        default=DEFAULT_GLOBAL_RATE)
+    parser.add_argument('--chat-rate', type=float, default=DEFAULT_CHAT_RATE)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--failure-rate', type=float, default=0)
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args(argv)
+
+
+def create_server(args):
+    """Создание сервера по аргументам командной строки."""
+    api = FakeTelegramApi(
+        global_rate=args.global_rate, chat_rate=args.chat_rate,
+        latency=args.latency, failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    return FakeTelegramServer(api, args.host, args.port)
+
+
+if __name__ == '__main__':
+    server = create_server(parse_args())
+    print(f'TELEGRAM_API_URL={server.base_url}')
+    server.serve_forever()
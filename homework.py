@@ -1,23 +1,76 @@
 import os
 import sys
 import time
+import atexit
 import logging
+from collections import namedtuple
+from functools import partial
 
 from dotenv import load_dotenv
 import requests
-from telebot import TeleBot
+from requests.adapters import HTTPAdapter
+from telebot import TeleBot, apihelper
+from telebot.apihelper import ApiException
 from http import HTTPStatus
 
-from expections import UnavailableTokens, UnsuccessfulSendMessage
+from analytics import get_min_review_time
+from alerts import ALERT_WINDOW as DEFAULT_ALERT_WINDOW
+from alerts import AlertManager
+from circuit_breaker import (FAILURE_THRESHOLD, RECOVERY_TIMEOUT,
+                             CircuitBreaker)
+from conditional import ResponseValidators
+from event_log import EventLog
+from expections import (EndpointUnavailable, InvalidResponse,
+                        UnavailableTokens, UnexpectedStatusCode,
+                        UnsuccessfulSendMessage)
+from log_handlers import (JsonFormatter, create_file_handler,
+                          start_queue_logging)
+from messages import MessageRenderer
+from metrics import (API_LATENCY, ERRORS, LOOP_DURATION, SEND_LATENCY,
+                     count_exceptions, start_metrics_server)
+from schema import Array, Object, Value, compile_validator
+from response_cache import ResponseCache
+from polling import (AdaptivePollingPolicy, FixedPollingPolicy,
+                     parse_retry_after)
+from state import BotState, HomeworkRecord, get_state_storage
+from streaming import CHUNK_SIZE, StreamedResponse
+from subscriptions import Subscription
 
 load_dotenv()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+# Адрес Bot API без /bot<token>, например локального поддельного сервера.
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+# Язык уведомлений: ru или en.
+TELEGRAM_LANGUAGE = os.getenv('TELEGRAM_LANGUAGE')
+STATE_FILE_PATH = os.getenv('STATE_FILE_PATH')
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 0))
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+ADAPTIVE_POLLING = os.getenv('ADAPTIVE_POLLING', '').lower() in ('1', 'true')
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', '').lower() in ('1', 'true')
+# Условные запросы к API; с STREAM_RESPONSES не работают.
+CONDITIONAL_REQUESTS = os.getenv('CONDITIONAL_REQUESTS',
+                                 '').lower() in ('1', 'true')
+# Сбоев подряд до приостановки запросов к API; 0 — без приостановки.
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD',
+                                          FAILURE_THRESHOLD))
+CIRCUIT_RECOVERY_TIMEOUT = int(os.getenv('CIRCUIT_RECOVERY_TIMEOUT',
+                                         RECOVERY_TIMEOUT))
+# Время жизни ответа API в кеше, секунды; 0 — без кеша.
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 0))
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 1024))
+# Журнал изменений статусов в формате JSONL.
+EVENT_LOG_PATH = os.getenv('EVENT_LOG_PATH')
+# Сколько секунд хранятся события, кроме последнего по работе; 0 — всегда.
+EVENT_LOG_RETENTION = int(os.getenv('EVENT_LOG_RETENTION', 0))
 
 RETRY_PERIOD = 600
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+ENDPOINT = os.getenv(
+    'PRACTICUM_ENDPOINT',
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+)
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
 HOMEWORK_VERDICTS = {
@@ -25,11 +78,50 @@ HOMEWORK_VERDICTS = {
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+# Повтор той же ошибки отправляется не чаще раза в это число секунд.
+ALERT_WINDOW = int(os.getenv('ALERT_WINDOW', DEFAULT_ALERT_WINDOW))
+ALERTS = AlertManager(ALERT_WINDOW)
+BREAKER = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_TIMEOUT)
+
+# Шаблоны сообщений собираются один раз при запуске.
+RENDERER = MessageRenderer(HOMEWORK_VERDICTS)
+
+HOMEWORK_SCHEMA = Object({
+    'id': Value(int),
+    'homework_name': Value(str),
+    'status': Value(str, choices=HOMEWORK_VERDICTS),
+    'date_updated': Value(str),
+}, optional=('id', 'date_updated'))
+RESPONSE_SCHEMA = Object({'homeworks': Array(HOMEWORK_SCHEMA)})
+# Только структура ответа, без проверки отдельных работ.
+ENVELOPE_SCHEMA = Object({'homeworks': Value(list)})
+validate_response = compile_validator(RESPONSE_SCHEMA, 'response')
+validate_envelope = compile_validator(ENVELOPE_SCHEMA, 'response')
+validate_homework = compile_validator(HOMEWORK_SCHEMA, 'homework')
 
 LOG_FILE_PATH = os.path.join(os.path.dirname(__file__), 'app.log')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN')
+LOG_COMPRESS = os.getenv('LOG_COMPRESS', '').lower() in ('1', 'true')
 
 ONE_MONTH_IN_SECONDS = 2600000
 
+MAX_MESSAGE_LENGTH = 4096
+
+# Результат одного цикла проверки: число изменений и пойманная ошибка.
+PollResult = namedtuple('PollResult', ('changes', 'error'))
+# Пакет уведомлений: текст сообщения, новые состояния работ и сами работы
+# из ответа API по тем же ключам.
+NotificationBatch = namedtuple('NotificationBatch',
+                               ('text', 'seen', 'homeworks'))
+
+# Таймауты на установку соединения и на чтение ответа, в секундах.
+CONNECT_TIMEOUT = float(os.getenv('PRACTICUM_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('PRACTICUM_READ_TIMEOUT', 30))
+REQUEST_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
 
 def check_tokens():
     """Проверка наличия токенов, перед запуском бота."""
@@ -48,72 +140,364 @@ def check_tokens():
 
 def send_message(bot, message):
     """Отправка сообщения в Телеграмм."""
+    send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(bot, chat_id, message):
+    """Отправка сообщения в указанный чат Телеграмма."""
     try:
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
-        logging.debug(f'Сообщение {message} отправлено')
-    except UnsuccessfulSendMessage as error:
-        logging.debug(f'Сообщение {message} не отправлено. Ошибка {error}')
+        with SEND_LATENCY.time():
+            bot.send_message(chat_id=chat_id, text=message)
+    except (ApiException, requests.RequestException) as error:
+        logging.error(f'Сообщение {message} не отправлено. Ошибка {error}')
+        raise UnsuccessfulSendMessage(
+            f'Сообщение в чат {chat_id} не отправлено: {error}'
+        ) from error
+    logging.debug(f'Сообщение {message} отправлено')
 
 
 def get_api_answer(timestamp):
-    """Получение ответа на запрос и обработка исключений."""
+    """Получение ответа на запрос и обработка исключений.
+
+    Запрос идет через общий автомат BREAKER: пока API недоступен, вместо
+    запроса сразу поднимается CircuitOpen.
+    """
+    return BREAKER.call(fetch_homework_statuses, HEADERS, timestamp)
+
+
+def fetch_homework_statuses(headers, timestamp, session=None,
+                            validators=None, stream=False,
+                            validator_key=None):
+    """Запрос статусов домашних работ с заданными заголовками.
+
+    Если передана сессия, запрос идет через нее, иначе через `requests`.
+    С валидаторами запрос становится условным: для неизменившегося
+    ответа возвращается None. Валидаторы хранятся по `validator_key` —
+    ключу подписки, которая разбирает ответ; по умолчанию по заголовку
+    авторизации. С `stream` тело не загружается целиком, а возвращается
+    StreamedResponse; валидаторы при этом не используются, так как им
+    нужно все тело ответа.
+    """
     params = {'from_date': timestamp}
+    client = session or requests
+    if stream:
+        validators = None
+    if validators is not None:
+        validator_key = validator_key or headers['Authorization']
+        headers = {**headers, **validators.request_headers(validator_key)}
     try:
-        response = requests.get(
-            ENDPOINT,
-            headers=HEADERS,
-            params=params,
-        )
+        with API_LATENCY.time():
+            response = client.get(
+                ENDPOINT,
+                headers=headers,
+                params=params,
+                timeout=REQUEST_TIMEOUT,
+                stream=stream,
+            )
     except requests.RequestException as error:
-        raise error(f'Эндпоинт {ENDPOINT} недоступен с'
-                    f'параметрами {params}. Ошибка {error}.')
+        raise EndpointUnavailable(f'Эндпоинт {ENDPOINT} недоступен с '
+                                  f'параметрами {params}. Ошибка {error}.'
+                                  ) from error
 
+    if validators is not None and validators.is_not_modified(
+        validator_key, response.status_code, response.headers,
+        response.content,
+    ):
+        logging.debug('Ответ API не изменился, разбор пропущен.')
+        return None
     if response.status_code != HTTPStatus.OK:
-        raise requests.RequestException('Получен неожиданный статус-код: '
-                                        f'{response.status_code}. Ожидаемый '
-                                        f'статус-код: {HTTPStatus.OK}.')
+        retry_after = None
+        if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+            retry_after = parse_retry_after(
+                response.headers.get('Retry-After')
+            )
+        raise UnexpectedStatusCode('Получен неожиданный статус-код: '
+                                   f'{response.status_code}. Ожидаемый '
+                                   f'статус-код: {HTTPStatus.OK}.',
+                                   status_code=response.status_code,
+                                   retry_after=retry_after)
+    if stream:
+        return StreamedResponse(response.iter_content(CHUNK_SIZE),
+                                close=response.close)
     return response.json()
 
 
+def create_http_session(pool_size):
+    """Создание сессии с пулом постоянных соединений к API."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+@count_exceptions(ERRORS, name='check_response')
+def iter_valid_homeworks(homeworks):
+    """Проверенные работы по одной, в том числе из потокового ответа.
+
+    Работа с ошибкой формата, например с новым статусом, логируется,
+    учитывается в ERRORS и пропускается: она не должна мешать
+    уведомлениям об остальных работах.
+    """
+    for index, homework in enumerate(homeworks):
+        try:
+            homework = validate_homework(homework)
+        except InvalidResponse as error:
+            ERRORS.inc(function='check_response',
+                       exception=type(error).__name__)
+            logging.error(f'Работа {index} из ответа API пропущена: {error}')
+            continue
+        yield homework
+
+
+@count_exceptions(ERRORS)
 def check_response(response):
-    """Проверка запроса на соответствие критериям."""
+    """Проверка запроса на соответствие критериям.
+
+    Ошибка в структуре ответа поднимается, а работы с ошибками
+    пропускаются в `iter_valid_homeworks`.
+    """
+    if isinstance(response, StreamedResponse):
+        # Работы разбираются из тела по одной во время обхода, там же
+        # поднимаются ошибки структуры ответа.
+        return iter_valid_homeworks(response)
     try:
-        homeworks = response['homeworks']
-        if not isinstance(homeworks, list):
-            raise TypeError('Полученный тип данных не соответствует типу. '
-                            'Ожидаемый тип: list, '
-                            f'Получен тип: {type(homeworks)}')
-        return homeworks
-    except KeyError as error:
-        raise KeyError(f'Ключа {error} нет в коллекции '
-                       f'{type(response)}, response. '
-                       f'Доступные ключи в запросе: {response.keys()}.')
+        # Обычно ответ верен целиком и проверяется одним циклом.
+        return validate_response(response)['homeworks']
+    except InvalidResponse:
+        homeworks = validate_envelope(response)['homeworks']
+    return list(iter_valid_homeworks(homeworks))
+
+
+@count_exceptions(ERRORS)
+def render_status(homework, locale=None):
+    """Сообщение о новом статусе работы на языке чата."""
+    validate_homework(homework)
+    return RENDERER.render(homework['status'], homework['homework_name'],
+                           locale)
 
 
 def parse_status(homework):
     """Получение соответствующего вердикта."""
-    try:
-        status = homework['status']
-    except KeyError as error:
-        raise KeyError(f'Ключа {error} нет в коллекции '
-                       f'{type(homework)}, homework. Доступные ключи '
-                       f'в словаре: {homework.keys()}')
+    return render_status(homework)
 
-    try:
-        verdict = HOMEWORK_VERDICTS[status]
-    except KeyError as error:
-        raise KeyError(f'Вердикта {error} нет в коллекции '
-                       f'{type(verdict)}, verdict. Доступные ключи '
-                       f'в словаре: {verdict.keys()}')
 
+def get_next_timestamp(response, timestamp):
+    """Получение отметки времени для следующего запроса к API.
+
+    Сервер возвращает в поле `current_date` момент формирования ответа,
+    поэтому следующий запрос запрашивает только изменения после него.
+    """
+    current_date = response.get('current_date')
+    if not isinstance(current_date, int) or isinstance(current_date, bool):
+        logging.warning('В ответе API нет корректного ключа current_date: '
+                        f'{current_date}. Отметка времени не изменена.')
+        return timestamp
+    return current_date
+
+
+def get_homework_key(homework):
+    """Получение ключа, по которому отслеживается домашняя работа."""
+    return str(homework.get('id', homework.get('homework_name')))
+
+
+def load_state(storage, key, language=None, events=None):
+    """Загрузка сохраненного состояния или создание нового.
+
+    Язык из настроек подписки заменяет сохраненный. Если состояния нет,
+    известные статусы работ восстанавливаются из журнала `events`, чтобы
+    о них не пришли повторные уведомления.
+    """
+    state = storage.load(key)
+    if state is None:
+        state = BotState(timestamp=int(time.time()) - ONE_MONTH_IN_SECONDS)
+        if events is not None:
+            state.homeworks = events.rebuild(key)
+            logging.info(f'Из журнала событий восстановлено работ: '
+                         f'{len(state.homeworks)}.')
+    else:
+        logging.info(f'Состояние восстановлено, отметка времени '
+                     f'{state.timestamp}.')
+    if language:
+        state.language = language
+    return state
+
+
+def get_status_changes(state, homeworks):
+    """Поиск работ, статус которых изменился, за один проход по ответу.
+
+    Возвращает словарь: ключ работы -> (новое состояние, сообщение,
+    работа из ответа). Ответ может быть потоком, который читается один
+    раз, поэтому работа сохраняется здесь же. API отдает работы от новых
+    к старым, поэтому для повторяющегося ключа учитывается первая запись.
+    """
+    changes = {}
+    for homework in homeworks:
+        key = get_homework_key(homework)
+        if key in changes:
+            continue
+        last_seen = HomeworkRecord.from_homework(homework)
+        if state.homeworks.get(key) != last_seen:
+            # Работы уже проверены check_response, поэтому сообщение
+            # собирается без повторных проверок и только для изменений.
+            changes[key] = (last_seen, RENDERER.render(
+                homework['status'], homework['homework_name'],
+                state.language
+            ), homework)
+    return changes
+
+
+def get_notification_batches(state, homeworks):
+    """Группировка уведомлений об изменениях в пакеты для отправки.
+
+    Возвращает список NotificationBatch: текст сообщения не длиннее
+    лимита Телеграма, состояния работ, которые нужно запомнить после его
+    отправки, и сами работы. Состояние не изменяется, пока сообщения не
+    будут отправлены.
+    """
+    changes = get_status_changes(state, homeworks)
+    if not changes:
+        logging.debug(f'Новых статусов с {state.timestamp} нет.')
+        return []
+    batches = []
+    text, seen, changed = '', {}, {}
+    # Уведомления отправляются в хронологическом порядке.
+    for key, (last_seen, message, homework) in reversed(changes.items()):
+        if seen and len(text) + len(message) + 2 > MAX_MESSAGE_LENGTH:
+            batches.append(NotificationBatch(text, seen, changed))
+            text, seen, changed = '', {}, {}
+        text = f'{text}\n\n{message}' if text else message
+        seen[key] = last_seen
+        changed[key] = homework
+    if seen:
+        batches.append(NotificationBatch(text, seen, changed))
+    return batches
+
+
+def mark_seen(state, batch, on_change=None):
+    """Запоминание состояний работ, о которых отправлено уведомление."""
+    state.homeworks.update(batch.seen)
+    if on_change is not None:
+        on_change(batch.seen, batch.homeworks)
+
+
+def deliver_batches(state, batches, timestamp, deliver, on_change=None):
+    """Отправка пакетов уведомлений в фоне.
+
+    `deliver(message, on_delivered)` ставит сообщение в очередь и потом
+    вызывает `on_delivered(delivered)`. Работы запоминаются только после
+    доставки их пакета, а отметка времени сдвигается, когда доставлены
+    все пакеты: иначе следующий запрос снова вернет недоставленные
+    изменения.
+    """
+    remaining = len(batches)
+    failed = False
+
+    def on_delivered(batch, delivered):
+        nonlocal remaining, failed
+        remaining -= 1
+        if delivered:
+            mark_seen(state, batch, on_change)
+        else:
+            failed = True
+        if not remaining and not failed:
+            state.timestamp = timestamp
+
+    for batch in batches:
+        deliver(batch.text, partial(on_delivered, batch))
+
+
+def check_homeworks(state, fetch, notify, alerts=None, on_change=None,
+                    deliver=None):
+    """Один цикл проверки: запрос к API, разбор ответа и уведомления.
+
+    `fetch` получает отметку времени и возвращает ответ API или None,
+    если ответ не изменился; `notify` отправляет текст сообщения.
+    `alerts` решает, о каких сбоях сообщать. `on_change` получает новые
+    состояния работ после отправки уведомления о них и сами эти работы
+    из ответа API. С `deliver` уведомления о статусах отправляются в фоне
+    через `deliver_batches`, а состояние меняется после их доставки.
+    Возвращает PollResult для выбора паузы перед следующим циклом.
+    """
+    alerts = alerts or ALERTS
+    changes = 0
     try:
-        homework_name = homework['homework_name']
-    except KeyError as error:
-        raise KeyError(f'Требуемого ключа {error} нет в коллекции '
-                       f'{type(homework)}, homework. Доступные ключи '
-                       f'в словаре: {homework.keys()}')
+        response = fetch(state.timestamp)
+        if response is not None:
+            homeworks = check_response(response)
+            batches = get_notification_batches(state, homeworks)
+            # Следующий запрос вернет только изменения после ответа.
+            timestamp = get_next_timestamp(response, state.timestamp)
+            if deliver is not None and batches:
+                deliver_batches(state, batches, timestamp, deliver,
+                                on_change)
+                changes = sum(len(batch.seen) for batch in batches)
+            else:
+                for batch in batches:
+                    notify(batch.text)
+                    mark_seen(state, batch, on_change)
+                    changes += len(batch.seen)
+                state.timestamp = timestamp
+        recovered = alerts.on_success(state)
+        if recovered:
+            notify(recovered)
+            alerts.clear(state)
+    except Exception as error:
+        logging.error(
+            f'Ошибка при обращении к API сервису. Ошибка {error}',
+            exc_info=True)
+        # Отправка сообщения, если повтор ошибки не подавлен.
+        alert = alerts.on_error(state, error)
+        if alert:
+            try:
+                notify(alert.message)
+                alerts.mark_sent(state, alert)
+            except UnsuccessfulSendMessage:
+                # Ошибка уже залогирована, сообщение уйдет в следующий раз.
+                pass
+        return PollResult(changes, error)
+    return PollResult(changes, None)
 
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+
+def create_response_cache():
+    """Кеш ответов API по настройкам из окружения."""
+    return ResponseCache(RESPONSE_CACHE_TTL, RESPONSE_CACHE_SIZE)
+
+
+def open_event_log():
+    """Журнал событий по настройкам из окружения или None."""
+    if not EVENT_LOG_PATH:
+        return None
+    return EventLog(EVENT_LOG_PATH, retention=EVENT_LOG_RETENTION)
+
+
+def create_fetch():
+    """Функция запроса к API по настройкам из окружения.
+
+    Возвращает ее вместе с валидаторами условных запросов или None.
+    """
+    fetch = get_api_answer
+    validators = None
+    if CONDITIONAL_REQUESTS and STREAM_RESPONSES:
+        logging.warning('С STREAM_RESPONSES условные запросы '
+                        'не используются.')
+    elif CONDITIONAL_REQUESTS:
+        validators = ResponseValidators()
+    if HTTP_POOL_SIZE or validators or STREAM_RESPONSES:
+        fetch = partial(BREAKER.call, fetch_homework_statuses, HEADERS,
+                        session=(create_http_session(HTTP_POOL_SIZE)
+                                 if HTTP_POOL_SIZE else None),
+                        validators=validators, stream=STREAM_RESPONSES)
+    if RESPONSE_CACHE_TTL and not STREAM_RESPONSES:
+        # Потоковый ответ читается один раз, поэтому не кешируется.
+        fetch = create_response_cache().wrap(fetch, PRACTICUM_TOKEN)
+    return fetch, validators
+
+
+def configure_telegram_api(base_url):
+    """Отправка запросов бота на другой адрес Bot API."""
+    apihelper.API_URL = f'{base_url.rstrip("/")}/bot{{0}}/{{1}}'
+    logging.info(f'Запросы к Bot API идут на {base_url}')
 
 
 def main():
@@ -124,51 +508,75 @@ def main():
         raise UnavailableTokens('Ошибка при проверке токенов')
 
     # Создаем объект класса бота
+    if TELEGRAM_API_URL:
+        configure_telegram_api(TELEGRAM_API_URL)
     bot = TeleBot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time()) - ONE_MONTH_IN_SECONDS
-    current_status = None
-    last_error_message = None
+    storage = get_state_storage(STATE_FILE_PATH)
+    state_key = Subscription(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID).key
+    events = open_event_log()
+    state = load_state(storage, state_key, TELEGRAM_LANGUAGE, events)
+    on_change = (partial(events.record, state_key)
+                 if events is not None else None)
+    fetch, validators = create_fetch()
+    policy = FixedPollingPolicy(RETRY_PERIOD)
+    if ADAPTIVE_POLLING:
+        policy = AdaptivePollingPolicy(
+            RETRY_PERIOD,
+            min_review_time=(get_min_review_time(events.replay())
+                             if events is not None else None),
+        )
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
 
     while True:
+        result = None
         try:
-            homeworks = check_response(get_api_answer(timestamp))
-            if not homeworks:
-                message = 'Домашней работы нет.'
-                logging.debug(message)
-                send_message(bot, message)
-                continue
-
-            new_status = parse_status(homeworks[0])
-            if current_status != new_status:
-                current_status = new_status
-                send_message(bot, new_status)
-
-        except Exception as error:
-            logging.error(
-                f'Ошибка при обращении к API сервису. Ошибка {error}',
-                exc_info=True)
-            message = f'Сбой в работе программы: {error}'
-            # Отправка сообщения при новой ошибке.
-            if message != last_error_message:
-                send_message(bot, message)
-                last_error_message = message
+            with LOOP_DURATION.time():
+                result = check_homeworks(state, fetch,
+                                         partial(send_message, bot),
+                                         on_change=on_change)
         finally:
-            time.sleep(RETRY_PERIOD)
+            if validators and (result is None or result.error is not None):
+                # Необработанный ответ нужно запросить снова целиком.
+                validators.forget(HEADERS['Authorization'])
+            storage.save(state_key, state)
+            storage.flush()
+            if events is not None:
+                events.maybe_compact()
+            delay = policy.next_delay(state, result)
+            time.sleep(delay)
 
 
-if __name__ == '__main__':
-    logging.basicConfig(
-        handlers=[logging.StreamHandler(sys.stdout),
-                  logging.FileHandler(LOG_FILE_PATH,
-                                      encoding='utf-8')
-                  ],
-        format=(
-            'Дата и время события: %(asctime)s, '
-            'Уровень лога: %(levelname)s, '
-            'Имя функции: %(funcName)s, '
-            'Строка: %(lineno)d, '
-            'Сообщение:  %(message)s '
-        ),
-        level=logging.DEBUG,
+def configure_logging(records=None):
+    """Настройка логирования в консоль и файл.
+
+    Записи кладутся в очередь, а в консоль и файл их пишет фоновый поток,
+    поэтому медленный диск не задерживает цикл опроса. Через очередь
+    `records` в тот же лог пишут рабочие процессы supervisor.py.
+    """
+    handlers = [
+        logging.StreamHandler(sys.stdout),
+        create_file_handler(LOG_FILE_PATH, max_bytes=LOG_MAX_BYTES,
+                            when=LOG_ROTATE_WHEN,
+                            backup_count=LOG_BACKUP_COUNT,
+                            compress=LOG_COMPRESS),
+    ]
+    formatter = logging.Formatter(
+        'Дата и время события: %(asctime)s, '
+        'Уровень лога: %(levelname)s, '
+        'Имя функции: %(funcName)s, '
+        'Строка: %(lineno)d, '
+        'Сообщение:  %(message)s '
     )
+    if LOG_FORMAT == 'json':
+        formatter = JsonFormatter()
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    queue_handler, listener = start_queue_logging(handlers, records)
+    logging.basicConfig(handlers=[queue_handler], level=logging.DEBUG)
+    atexit.register(listener.stop)
+
+
+if __name__ == '__main__':
+    configure_logging()
     main()
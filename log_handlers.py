@@ -0,0 +1,97 @@
+import gzip
+import json
+import logging
+import os
+import copy
+import queue
+import shutil
+from logging.handlers import (QueueHandler, QueueListener,
+                              RotatingFileHandler, TimedRotatingFileHandler)
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON."""
+
+    def format(self, record):
+        """Сериализация записи лога в JSON."""
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'function': record.funcName,
+            'line': record.lineno,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class RecordQueueHandler(QueueHandler):
+    """QueueHandler, который не вклеивает трассировку в сообщение.
+
+    Стандартный `prepare` форматирует запись заранее и убирает exc_info,
+    поэтому JsonFormatter за очередью уже не видит исключения. Здесь в
+    очередь уходит только текст сообщения и трассировки в exc_text, а
+    форматирует запись обработчик на стороне QueueListener.
+    """
+
+    def prepare(self, record):
+        """Копия записи, которую можно передать в другой процесс."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+
+def gzip_namer(name):
+    """Имя сжатого архива лога."""
+    return f'{name}.gz'
+
+
+def gzip_rotator(source, destination):
+    """Сжатие файла лога при ротации."""
+    with open(source, 'rb') as source_file:
+        with gzip.open(destination, 'wb') as destination_file:
+            shutil.copyfileobj(source_file, destination_file)
+    os.remove(source)
+
+
+def create_file_handler(path, max_bytes=0, when=None, backup_count=0,
+                        compress=False):
+    """Файловый обработчик с ротацией по времени или по размеру."""
+    if when:
+        handler = TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding='utf-8'
+        )
+    else:
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count,
+            encoding='utf-8'
+        )
+    if compress:
+        handler.namer = gzip_namer
+        handler.rotator = gzip_rotator
+    return handler
+
+
+def start_queue_logging(handlers, records=None):
+    """Запуск записи логов в фоновом потоке.
+
+    Возвращает обработчик, который только кладет записи в очередь, и
+    запущенный QueueListener, который пишет их в переданные обработчики.
+    Очередь `records` можно передать, чтобы в те же обработчики писали
+    дочерние процессы.
+    """
+    if records is None:
+        records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return RecordQueueHandler(records), listener
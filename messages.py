@@ -0,0 +1,65 @@
+from functools import lru_cache
+
+DEFAULT_LOCALE = 'ru'
+# Число готовых сообщений, которые хранятся для повторных значений.
+CACHE_SIZE = 4096
+
+# Шаблоны сообщения: {name} — название работы, {verdict} — вердикт.
+TEMPLATES = {
+    'ru': 'Изменился статус проверки работы "{name}". {verdict}',
+    'en': 'Homework "{name}" review status changed. {verdict}',
+}
+# Вердикты на других языках; русские берутся из HOMEWORK_VERDICTS.
+TRANSLATIONS = {
+    'en': {
+        'approved': 'The reviewer liked everything. Hooray!',
+        'reviewing': 'The homework has been taken for review.',
+        'rejected': 'The reviewer left some comments.',
+    },
+}
+
+
+class MessageRenderer:
+    """Сообщения об изменении статуса по заранее собранным шаблонам.
+
+    Для каждой пары (статус, язык) шаблон один раз разбивается на части
+    до и после названия работы, так что сообщение собирается одной
+    конкатенацией. Готовые сообщения кешируются. Если для языка нет
+    шаблона или перевода, используется язык по умолчанию.
+    """
+
+    def __init__(self, verdicts, default_locale=DEFAULT_LOCALE,
+                 templates=TEMPLATES, translations=TRANSLATIONS,
+                 cache_size=CACHE_SIZE):
+        self.default_locale = default_locale
+        self._parts = {}
+        self._verdicts = {}
+        locales = {**translations, default_locale: verdicts}
+        for locale, template in templates.items():
+            for status, verdict in locales.get(locale, {}).items():
+                self._verdicts[status, locale] = verdict
+                prefix, _, suffix = template.replace(
+                    '{verdict}', verdict
+                ).partition('{name}')
+                self._parts[status, locale] = (prefix, suffix)
+        self.locales = frozenset(locale for _, locale in self._parts)
+        self.statuses = frozenset(status for status, _ in self._parts)
+        self.render = lru_cache(maxsize=cache_size)(self._render)
+
+    def _render(self, status, homework_name, locale=None):
+        """Текст сообщения о новом статусе работы."""
+        parts = self._parts.get((status, locale or self.default_locale))
+        if parts is None:
+            parts = self._parts.get((status, self.default_locale))
+        if parts is None:
+            raise KeyError(f'Вердикта для статуса {status!r} нет. '
+                           f'Известные статусы: {sorted(self.statuses)}.')
+        prefix, suffix = parts
+        return f'{prefix}{homework_name}{suffix}'
+
+    def verdict(self, status, locale=None):
+        """Вердикт для статуса на языке чата или None."""
+        verdict = self._verdicts.get((status, locale or self.default_locale))
+        if verdict is None:
+            verdict = self._verdicts.get((status, self.default_locale))
+        return verdict
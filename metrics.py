@@ -0,0 +1,220 @@
+import bisect
+import inspect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                   30, 60)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(names, values):
+    """Метки метрики в формате Prometheus."""
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{escape_label(value)}"' for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}'
+
+
+def escape_label(value):
+    """Экранирование значения метки."""
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+class Counter:
+    """Счетчик с необязательными метками."""
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Увеличение счетчика для набора меток."""
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        """Текущее значение счетчика для набора меток."""
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self):
+        """Строки метрики в текстовом формате Prometheus."""
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(
+                f'{self.name}{format_labels(self.labels, key)} {value}'
+            )
+        return lines
+
+
+class Histogram:
+    """Гистограмма длительностей в секундах."""
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Учет одного наблюдения."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """Замер длительности блока кода."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self):
+        """Число наблюдений."""
+        with self._lock:
+            return sum(self._counts)
+
+    @property
+    def total(self):
+        """Сумма наблюдений."""
+        with self._lock:
+            return self._sum
+
+    def render(self):
+        """Строки метрики в текстовом формате Prometheus."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} histogram']
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_sum {total}')
+        lines.append(f'{self.name}_count {cumulative}')
+        return lines
+
+
+API_LATENCY = Histogram(
+    'homework_api_request_seconds',
+    'Длительность запроса к API Практикума.',
+)
+SEND_LATENCY = Histogram(
+    'homework_send_message_seconds',
+    'Длительность отправки сообщения в Телеграм.',
+)
+LOOP_DURATION = Histogram(
+    'homework_loop_iteration_seconds',
+    'Длительность одного цикла проверки домашних работ.',
+)
+CACHE_REQUESTS = Counter(
+    'homework_response_cache_requests_total',
+    'Обращения к кешу ответов API: попадания и промахи.',
+    labels=('result',),
+)
+CONDITIONAL_RESPONSES = Counter(
+    'homework_conditional_responses_total',
+    'Ответы на условные запросы к API: изменившиеся и пропущенные.',
+    labels=('result',),
+)
+ERRORS = Counter(
+    'homework_errors_total',
+    'Число исключений по функциям и типам.',
+    labels=('function', 'exception'),
+)
+REGISTRY = [API_LATENCY, SEND_LATENCY, LOOP_DURATION, ERRORS,
+            CACHE_REQUESTS, CONDITIONAL_RESPONSES]
+
+
+def count_exceptions(counter, name=None):
+    """Декоратор, считающий исключения функции по их типам.
+
+    У генератора считаются исключения, поднятые во время обхода.
+    `name` заменяет имя функции в метке, например чтобы ошибки
+    вспомогательного генератора считались за вызвавшую его функцию.
+    """
+    def decorator(func):
+        function = name or func.__name__
+        if inspect.isgeneratorfunction(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                try:
+                    return (yield from func(*args, **kwargs))
+                except Exception as error:
+                    counter.inc(function=function,
+                                exception=type(error).__name__)
+                    raise
+            return wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:
+                counter.inc(function=function,
+                            exception=type(error).__name__)
+                raise
+        return wrapper
+    return decorator
+
+
+def render_metrics(registry=REGISTRY):
+    """Все метрики реестра в текстовом формате Prometheus."""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к /metrics."""
+
+    def do_GET(self):
+        """Отдача метрик в текстовом формате Prometheus."""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = render_metrics().encode('utf-8')
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Запросы к метрикам пишутся в лог только на уровне DEBUG."""
+        logging.debug(f'Метрики: {format % args}')
+
+
+def start_metrics_server(port, host='0.0.0.0'):
+    """Запуск HTTP-сервера метрик в фоновом потоке."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True,
+                              name='metrics-server')
+    thread.start()
+    logging.info(f'Метрики доступны на http://{host}:{port}/metrics')
+    return server
@@ -0,0 +1,115 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+from state import get_status_code
+
+# Период опроса, пока хотя бы одна работа находится на проверке.
+REVIEWING_PERIOD = 120
+# Верхняя граница паузы при ошибках и долгом простое.
+MAX_POLL_DELAY = 3600
+# Число опросов без изменений, после которого опрос замедляется.
+IDLE_POLLS_THRESHOLD = 6
+JITTER = 0.1
+
+
+def parse_retry_after(value):
+    """Число секунд из заголовка Retry-After или None.
+
+    Заголовок может содержать как число секунд, так и HTTP-дату.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at - time.time(), 0)
+
+
+class FixedPollingPolicy:
+    """Опрос через постоянный период независимо от результата."""
+
+    def __init__(self, period):
+        self.period = period
+
+    def next_delay(self, state, result):
+        """Пауза перед следующим опросом."""
+        return self.period
+
+
+class AdaptivePollingPolicy:
+    """Пауза между опросами, подстроенная под результат предыдущего.
+
+    Пока работа на проверке, опрос идет чаще. Если задано
+    `min_review_time` — за сколько секунд проверка почти никогда не
+    успевает завершиться, — частый опрос начинается только по его
+    истечении. При ошибках и долгом
+    отсутствии изменений пауза растет экспоненциально со случайным
+    разбросом, но не меньше, чем сервер просил в Retry-After.
+    """
+
+    def __init__(self, period, reviewing_period=REVIEWING_PERIOD,
+                 max_delay=MAX_POLL_DELAY,
+                 idle_threshold=IDLE_POLLS_THRESHOLD, jitter=JITTER,
+                 min_review_time=None):
+        self.period = period
+        self.reviewing_period = min(reviewing_period, period)
+        self.max_delay = max(max_delay, period)
+        self.idle_threshold = idle_threshold
+        self.jitter = jitter
+        self.min_review_time = min_review_time
+        self.errors = 0
+        self.idle_polls = 0
+
+    def next_delay(self, state, result):
+        """Пауза перед следующим опросом с учетом результата."""
+        if result is None or result.error is not None:
+            return self._error_delay(result)
+        self.errors = 0
+        self.idle_polls = 0 if result.changes else self.idle_polls + 1
+        if is_reviewing(state):
+            return self._with_jitter(self._reviewing_delay(state))
+        if self.idle_polls < self.idle_threshold:
+            return self._with_jitter(self.period)
+        stage = self.idle_polls // self.idle_threshold
+        return self._with_jitter(self._backoff(stage))
+
+    def _reviewing_delay(self, state):
+        if not self.min_review_time:
+            return self.reviewing_period
+        remaining = (get_review_start(state) + self.min_review_time
+                     - time.time())
+        return min(max(remaining, self.reviewing_period), self.period)
+
+    def _error_delay(self, result):
+        self.errors += 1
+        delay = self._with_jitter(self._backoff(self.errors - 1))
+        retry_after = getattr(result and result.error, 'retry_after', None)
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _backoff(self, stage):
+        return min(self.period * 2 ** min(stage, 32), self.max_delay)
+
+    def _with_jitter(self, delay):
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+def is_reviewing(state):
+    """Проверка, есть ли у получателя работы на проверке."""
+    reviewing = get_status_code('reviewing')
+    return any(record.status_code == reviewing
+               for record in state.homeworks.values())
+
+
+def get_review_start(state):
+    """Время начала самой ранней из текущих проверок."""
+    reviewing = get_status_code('reviewing')
+    return min(record.updated_at for record in state.homeworks.values()
+               if record.status_code == reviewing)
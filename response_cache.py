@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from metrics import CACHE_REQUESTS
+
+DEFAULT_TTL = 60
+DEFAULT_MAXSIZE = 1024
+
+
+class ResponseCache:
+    """Кеш ответов API по ключу (токен, from_date).
+
+    Запись живет `ttl` секунд; при переполнении вытесняется та, к которой
+    дольше всего не обращались. Пока ответ для ключа запрашивается, другие
+    вызовы с тем же ключом ждут этот же запрос, а не делают свой. Ошибки
+    и None не кешируются: None от условного запроса значит "не изменилось
+    для того, кто запрашивал", поэтому ждущие в этом случае делают свой
+    запрос. Закешированный ответ отдается всем вызывающим как есть,
+    поэтому изменять его нельзя.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._async_pending = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key):
+        """Поиск живой записи; вызывается под блокировкой."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        self._count('hit')
+        return True, value
+
+    def _store(self, key, value):
+        """Сохранение записи; вызывается под блокировкой."""
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _finish(self, pending, key, value):
+        """Снятие ожидания по ключу и сохранение ответа, кроме None."""
+        with self._lock:
+            if value is not None:
+                self._store(key, value)
+            del pending[key]
+
+    def _count(self, result):
+        if result == 'hit':
+            self.hits += 1
+        else:
+            self.misses += 1
+        CACHE_REQUESTS.inc(result=result)
+
+    def get(self, key, fetch):
+        """Ответ из кеша или результат `fetch()`, один на всех ждущих."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+            self._count('miss' if owner else 'hit')
+        if not owner:
+            value = future.result()
+            return fetch() if value is None else value
+        try:
+            value = fetch()
+        except BaseException as error:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(error)
+            raise
+        self._finish(self._pending, key, value)
+        future.set_result(value)
+        return value
+
+    async def aget(self, key, fetch):
+        """Асинхронный аналог `get`; `fetch` — корутинная функция."""
+        while True:
+            with self._lock:
+                found, value = self._lookup(key)
+                if found:
+                    return value
+                future = self._async_pending.get(key)
+                if future is None:
+                    future = asyncio.get_running_loop().create_future()
+                    self._async_pending[key] = future
+                    self._count('miss')
+                    break
+                self._count('hit')
+            try:
+                value = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Запрос отменен вместе с задачей, которая его начала:
+                # ждущие повторяют его сами.
+                if not future.cancelled():
+                    raise
+            else:
+                return await fetch() if value is None else value
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            with self._lock:
+                del self._async_pending[key]
+            future.cancel()
+            raise
+        except Exception as error:
+            with self._lock:
+                del self._async_pending[key]
+            future.set_exception(error)
+            # Ошибку получат ждущие; без них asyncio не должен о ней писать.
+            future.exception()
+            raise
+        self._finish(self._async_pending, key, value)
+        future.set_result(value)
+        return value
+
+    def wrap(self, fetch, token):
+        """Функция запроса по отметке времени, которая идет через кеш."""
+        def cached_fetch(timestamp):
+            return self.get((token, timestamp), lambda: fetch(timestamp))
+        return cached_fetch
+
+    def wrap_async(self, fetch, token):
+        """Асинхронный аналог `wrap`."""
+        async def cached_fetch(timestamp):
+            return await self.aget((token, timestamp),
+                                   lambda: fetch(timestamp))
+        return cached_fetch
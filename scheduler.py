@@ -0,0 +1,221 @@
+import heapq
+import itertools
+import logging
+import os
+import random
+import time
+from collections import deque
+from functools import partial
+
+from dotenv import load_dotenv
+from telebot import TeleBot
+
+import homework
+from conditional import ResponseValidators
+from expections import UnavailableTokens
+from metrics import LOOP_DURATION, start_metrics_server
+from polling import AdaptivePollingPolicy
+from send_queue import SendQueue
+from state import get_state_storage
+from subscriptions import load_subscriptions
+
+load_dotenv()
+
+SUBSCRIPTIONS_PATH = os.getenv('SUBSCRIPTIONS_PATH')
+DEFAULT_POOL_SIZE = 10
+SEND_QUEUE_STOP_TIMEOUT = 10
+# Через сколько секунд проверить снова подписку, чьи уведомления еще
+# не доставлены.
+DELIVERY_WAIT = 5
+
+
+class PollingScheduler:
+    """Опрос API Практикума для всех подписок в одном процессе.
+
+    Все подписки используют общую HTTP-сессию, общее хранилище валидаторов
+    условных запросов (у каждой подписки свои) и общую очередь отправки:
+    цикл опроса не ждет Телеграм.
+    Первый опрос каждой подписки сдвинут на случайную долю периода,
+    чтобы запросы к API не приходили одной пачкой. Дальше пауза для
+    каждой подписки выбирается ее AdaptivePollingPolicy. С кешем ответов
+    подписки с одним токеном не запрашивают одно и то же дважды.
+
+    Состояние работ меняется только после доставки уведомления о них:
+    исходы отправки копятся в `_delivered` и применяются в потоке опроса.
+    Пока у подписки есть недоставленные уведомления, она не опрашивается;
+    отброшенное очередью уведомление будет отправлено снова после
+    следующего опроса.
+    """
+
+    def __init__(self, subscriptions, bot, storage,
+                 period=homework.RETRY_PERIOD, session=None,
+                 send_queue=None, policy_factory=AdaptivePollingPolicy,
+                 cache=None, breaker=None, events=None):
+        self.bot = bot
+        self.events = events
+        self.cache = cache
+        self.breaker = breaker
+        self.policy_factory = policy_factory
+        self.send_queue = (send_queue if send_queue is not None
+                           else SendQueue(bot))
+        self.storage = storage
+        self.period = period
+        self.session = session or homework.create_http_session(
+            homework.HTTP_POOL_SIZE or DEFAULT_POOL_SIZE
+        )
+        self.validators = ResponseValidators()
+        self._delivered = deque()
+        self._undelivered = {}
+        self._queue = []
+        self._counter = itertools.count()
+        now = time.monotonic()
+        for subscription in subscriptions:
+            self.add(subscription, now + random.uniform(0, period))
+
+    def __len__(self):
+        return len(self._queue)
+
+    def add(self, subscription, due=None):
+        """Добавление подписки в расписание."""
+        state = homework.load_state(self.storage, subscription.key,
+                                    subscription.language, self.events)
+        if due is None:
+            due = time.monotonic()
+        policy = self.policy_factory(self.period)
+        heapq.heappush(
+            self._queue,
+            (due, next(self._counter), subscription, state, policy)
+        )
+
+    def poll(self, subscription, state):
+        """Проверка домашних работ одной подписки.
+
+        Возвращает PollResult или None, если цикл завершился сбоем.
+        """
+        fetch = partial(homework.fetch_homework_statuses,
+                        subscription.headers, session=self.session,
+                        validators=self.validators,
+                        validator_key=subscription.key)
+        if self.breaker is not None:
+            fetch = partial(self.breaker.call, fetch)
+        if self.cache is not None:
+            fetch = self.cache.wrap(fetch, subscription.token)
+        notify = partial(self.send_queue.put, subscription.chat_id)
+        deliver = partial(self._deliver, subscription, state)
+        on_change = None
+        if self.events is not None:
+            on_change = partial(self.events.record, subscription.key)
+        result = None
+        try:
+            with LOOP_DURATION.time():
+                result = homework.check_homeworks(state, fetch, notify,
+                                                  on_change=on_change,
+                                                  deliver=deliver)
+        except Exception as error:
+            # Сбой одной подписки не должен останавливать остальные.
+            logging.error(f'Сбой при опросе подписки {subscription.key}: '
+                          f'{error}', exc_info=True)
+        if result is None or result.error is not None:
+            self.validators.forget(subscription.key)
+        self.storage.save(subscription.key, state)
+        return result
+
+    def _deliver(self, subscription, state, message, on_delivered):
+        """Постановка уведомления в очередь отправки."""
+        key = subscription.key
+        self._undelivered[key] = self._undelivered.get(key, 0) + 1
+        self.send_queue.put(
+            subscription.chat_id, message,
+            lambda delivered: self._delivered.append(
+                (subscription, state, on_delivered, delivered)
+            ),
+        )
+
+    def apply_deliveries(self):
+        """Применение исходов отправки к состояниям подписок."""
+        while self._delivered:
+            subscription, state, on_delivered, delivered = (
+                self._delivered.popleft()
+            )
+            key = subscription.key
+            self._undelivered[key] -= 1
+            if not self._undelivered[key]:
+                del self._undelivered[key]
+            on_delivered(delivered)
+            if not delivered:
+                self.validators.forget(key)
+            self.storage.save(key, state)
+
+    def run_pending(self):
+        """Опрос подписок, для которых подошло время.
+
+        Возвращает число секунд до следующего запланированного опроса.
+        """
+        self.apply_deliveries()
+        now = time.monotonic()
+        pending = []
+        while self._queue and self._queue[0][0] <= now:
+            pending.append(heapq.heappop(self._queue))
+        for due, _, subscription, state, policy in pending:
+            if subscription.key in self._undelivered:
+                heapq.heappush(
+                    self._queue,
+                    (now + DELIVERY_WAIT, next(self._counter),
+                     subscription, state, policy)
+                )
+                continue
+            result = self.poll(subscription, state)
+            delay = policy.next_delay(state, result)
+            # Сдвиг подписки сохраняется, пока цикл успевает за периодом.
+            heapq.heappush(
+                self._queue,
+                (max(due + delay, now), next(self._counter),
+                 subscription, state, policy)
+            )
+        self.storage.flush()
+        if self.events is not None:
+            self.events.maybe_compact()
+        if not self._queue:
+            return self.period
+        return max(self._queue[0][0] - time.monotonic(), 0)
+
+    def run_forever(self):
+        """Бесконечный цикл опроса всех подписок."""
+        self.send_queue.start()
+        try:
+            while True:
+                time.sleep(self.run_pending())
+        finally:
+            self.send_queue.stop(SEND_QUEUE_STOP_TIMEOUT)
+            self.apply_deliveries()
+            self.storage.close()
+            if self.events is not None:
+                self.events.close()
+
+
+def main():
+    """Запуск опроса всех подписок из реестра."""
+    if not homework.TELEGRAM_TOKEN or not SUBSCRIPTIONS_PATH:
+        logging.critical('Не заданы TELEGRAM_TOKEN или SUBSCRIPTIONS_PATH.')
+        raise UnavailableTokens('Ошибка при проверке токенов')
+    if homework.METRICS_PORT:
+        start_metrics_server(homework.METRICS_PORT)
+    if homework.TELEGRAM_API_URL:
+        homework.configure_telegram_api(homework.TELEGRAM_API_URL)
+    subscriptions = load_subscriptions(SUBSCRIPTIONS_PATH)
+    logging.info(f'Загружено подписок: {len(subscriptions)}.')
+    scheduler = PollingScheduler(
+        subscriptions,
+        TeleBot(token=homework.TELEGRAM_TOKEN),
+        get_state_storage(homework.STATE_FILE_PATH),
+        cache=(homework.create_response_cache()
+               if homework.RESPONSE_CACHE_TTL else None),
+        breaker=homework.BREAKER,
+        events=homework.open_event_log(),
+    )
+    scheduler.run_forever()
+
+
+if __name__ == '__main__':
+    homework.configure_logging()
+    main()
@@ -0,0 +1,146 @@
+from expections import InvalidValue, MissingField, WrongType
+
+
+class Value:
+    """Значение одного из типов и, если заданы, из набора допустимых."""
+
+    def __init__(self, *types, choices=None):
+        self.types = types
+        self.choices = frozenset(choices) if choices is not None else None
+
+
+class Array:
+    """Список, каждый элемент которого проверяется схемой `items`."""
+
+    def __init__(self, items):
+        self.items = items
+
+
+class Object:
+    """Словарь с описанными полями; поля из `optional` могут отсутствовать.
+
+    Поля, которых нет в схеме, не проверяются.
+    """
+
+    def __init__(self, fields, optional=()):
+        self.fields = fields
+        self.optional = frozenset(optional)
+
+
+def describe_types(types):
+    """Названия типов для сообщения об ошибке."""
+    return ' или '.join(kind.__name__ for kind in types)
+
+
+def wrong_type(path, types, value):
+    """Ошибка типа значения."""
+    return WrongType(f'{path}: ожидался тип {describe_types(types)}, '
+                     f'получен {type(value).__name__}.', path)
+
+
+def missing_field(path, name, value):
+    """Ошибка отсутствующего ключа."""
+    return MissingField(f'{path}: нет ключа {name!r}. '
+                        f'Доступные ключи: {list(value)}.',
+                        f'{path}[{name!r}]')
+
+
+def invalid_value(path, choices, value):
+    """Ошибка недопустимого значения."""
+    return InvalidValue(f'{path}: недопустимое значение {value!r}. '
+                        f'Допустимые значения: {sorted(choices)}.', path)
+
+
+class _Compiler:
+    """Генерация исходного кода проверяющей функции по схеме."""
+
+    def __init__(self):
+        self.lines = []
+        self.constants = {}
+        self.counter = 0
+
+    def name(self, prefix):
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def constant(self, value):
+        name = self.name('c')
+        self.constants[name] = value
+        return name
+
+    def emit(self, indent, line):
+        self.lines.append('    ' * indent + line)
+
+    def node(self, schema, var, path, indent):
+        """Код проверки значения `var`; `path` — выражение пути к нему."""
+        if isinstance(schema, Value):
+            self.value(schema, var, path, indent)
+        elif isinstance(schema, Array):
+            self.array(schema, var, path, indent)
+        elif isinstance(schema, Object):
+            self.object(schema, var, path, indent)
+        else:
+            raise TypeError(f'Неизвестный узел схемы: {schema!r}')
+
+    def check_type(self, types, var, path, indent):
+        kinds = self.constant(types)
+        self.emit(indent, f'if not isinstance({var}, {kinds}):')
+        self.emit(indent + 1, f'raise wrong_type({path}, {kinds}, {var})')
+
+    def value(self, schema, var, path, indent):
+        if schema.types:
+            self.check_type(schema.types, var, path, indent)
+        if schema.choices is not None:
+            choices = self.constant(schema.choices)
+            self.emit(indent, f'if {var} not in {choices}:')
+            self.emit(indent + 1,
+                      f'raise invalid_value({path}, {choices}, {var})')
+
+    def array(self, schema, var, path, indent):
+        self.check_type((list,), var, path, indent)
+        index, item = self.name('i'), self.name('v')
+        self.emit(indent, f'for {index}, {item} in enumerate({var}):')
+        self.node(schema.items, item,
+                  f"f'{{{path}}}[{{{index}}}]'", indent + 1)
+
+    def object(self, schema, var, path, indent):
+        self.check_type((dict,), var, path, indent)
+        for field, field_schema in schema.fields.items():
+            item = self.name('v')
+            field_path = f"{path} + {self.constant(f'[{field!r}]')}"
+            if field in schema.optional:
+                self.emit(indent, f'if {field!r} in {var}:')
+                self.emit(indent + 1, f'{item} = {var}[{field!r}]')
+                self.node(field_schema, item, field_path, indent + 1)
+                continue
+            self.emit(indent, f'if {field!r} not in {var}:')
+            self.emit(indent + 1,
+                      f'raise missing_field({path}, {field!r}, {var})')
+            self.emit(indent, f'{item} = {var}[{field!r}]')
+            self.node(field_schema, item, field_path, indent)
+
+
+def compile_validator(schema, name='data'):
+    """Сборка функции, проверяющей данные по схеме.
+
+    Схема один раз превращается в исходный код без рекурсии и вызовов
+    на каждое поле, так что список из многих элементов проверяется одним
+    циклом. Функция возвращает проверенные данные, а при ошибке
+    поднимает MissingField, WrongType или InvalidValue с путем к
+    ошибочному значению.
+    """
+    compiler = _Compiler()
+    compiler.emit(0, 'def validate(data):')
+    compiler.node(schema, 'data', compiler.constant(name), 1)
+    compiler.emit(1, 'return data')
+    source = '\n'.join(compiler.lines)
+    namespace = {
+        'wrong_type': wrong_type,
+        'missing_field': missing_field,
+        'invalid_value': invalid_value,
+        **compiler.constants,
+    }
+    exec(compile(source, f'<schema {name}>', 'exec'), namespace)
+    validate = namespace['validate']
+    validate.source = source
+    return validate
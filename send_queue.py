@@ -0,0 +1,334 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+import aiohttp
+import requests
+from telebot import asyncio_helper
+from telebot.apihelper import ApiException, ApiTelegramException
+
+from metrics import SEND_LATENCY
+
+# Ограничения Bot API: около 30 сообщений в секунду всего
+# и не больше одного сообщения в секунду в один чат.
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+MAX_SEND_RETRIES = 5
+RETRY_DELAY = 1
+MAX_RETRY_DELAY = 60
+MAX_MESSAGE_LENGTH = 4096
+# У синхронного и асинхронного клиентов Bot API разные классы ошибок.
+TELEGRAM_ERRORS = (ApiTelegramException, asyncio_helper.ApiTelegramException)
+API_ERRORS = (ApiException, asyncio_helper.ApiException,
+              asyncio_helper.RequestTimeout)
+NETWORK_ERRORS = (requests.RequestException, aiohttp.ClientError,
+                  asyncio.TimeoutError)
+SEND_ERRORS = API_ERRORS + NETWORK_ERRORS
+
+
+class TokenBucket:
+    """Ограничитель частоты по алгоритму token bucket."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now=None):
+        """Число секунд до появления свободного токена."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now=None):
+        """Расход одного токена."""
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens -= 1
+
+
+def get_retry_after(error):
+    """Пауза из ответа 429 Телеграма или None для других ошибок."""
+    if not isinstance(error, TELEGRAM_ERRORS):
+        return None
+    if error.error_code != 429:
+        return None
+    parameters = (error.result_json or {}).get('parameters') or {}
+    return parameters.get('retry_after', RETRY_DELAY)
+
+
+def is_retryable(error):
+    """Проверка, имеет ли смысл повторять отправку после ошибки."""
+    if isinstance(error, NETWORK_ERRORS):
+        return True
+    if isinstance(error, TELEGRAM_ERRORS):
+        return error.error_code == 429 or error.error_code >= 500
+    return isinstance(error, API_ERRORS)
+
+
+def notify_sent(callbacks, delivered):
+    """Вызов обработчиков исхода отправки; их ошибки только логируются."""
+    for callback in callbacks:
+        try:
+            callback(delivered)
+        except Exception as error:
+            logging.error(f'Ошибка в обработчике отправки: {error}',
+                          exc_info=True)
+
+
+class BaseSendQueue:
+    """Расписание отправки, общее для очередей на потоке и на asyncio.
+
+    Соблюдает общий лимит частоты и лимит для каждого чата, склеивает
+    накопившиеся сообщения одного чата в одно и повторяет неудачные
+    отправки с растущей паузой. Блокировки и ожидание — в наследниках.
+    """
+
+    def __init__(self, bot, global_rate=GLOBAL_RATE, chat_rate=CHAT_RATE,
+                 max_retries=MAX_SEND_RETRIES, retry_delay=RETRY_DELAY):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.sent = 0
+        self.failed = 0
+        self._global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self._chat_buckets = {}
+        self._pending = {}
+        self._attempts = {}
+        # Чаты, которые ждут в расписании или отправляются прямо сейчас.
+        self._active = set()
+        self._ready = []
+        self._counter = itertools.count()
+        self._stopping = False
+
+    def __len__(self):
+        return sum(len(messages) for messages in self._pending.values())
+
+    def _add(self, chat_id, text, on_sent):
+        callbacks = [on_sent] if on_sent is not None else []
+        self._pending.setdefault(chat_id, deque()).append((text, callbacks))
+        if chat_id not in self._active:
+            self._schedule(chat_id, time.monotonic())
+
+    def _schedule(self, chat_id, not_before):
+        self._active.add(chat_id)
+        bucket = self._chat_buckets.setdefault(
+            chat_id, TokenBucket(self.chat_rate)
+        )
+        ready_at = max(not_before, time.monotonic() + bucket.delay())
+        heapq.heappush(self._ready, (ready_at, next(self._counter), chat_id))
+
+    def _take_batch(self, chat_id):
+        messages = self._pending[chat_id]
+        text, callbacks = messages.popleft()
+        callbacks = list(callbacks)
+        while messages and (len(text) + len(messages[0][0]) + 2
+                            <= MAX_MESSAGE_LENGTH):
+            next_text, next_callbacks = messages.popleft()
+            text = f'{text}\n\n{next_text}'
+            callbacks.extend(next_callbacks)
+        return text, callbacks
+
+    def _pop_batch(self):
+        """Пакет для отправки и 0 или None и число секунд ожидания.
+
+        Ожидание None — в расписании нет ни одного чата.
+        """
+        if not self._ready:
+            return None, None
+        now = time.monotonic()
+        ready_at, _, chat_id = self._ready[0]
+        wait = max(ready_at - now, self._global_bucket.delay(now))
+        if wait > 0:
+            return None, wait
+        heapq.heappop(self._ready)
+        self._global_bucket.consume(now)
+        self._chat_buckets[chat_id].consume(now)
+        return (chat_id, *self._take_batch(chat_id)), 0
+
+    def _finish(self, chat_id):
+        self._attempts.pop(chat_id, None)
+        if self._pending[chat_id]:
+            self._schedule(chat_id, time.monotonic())
+        else:
+            del self._pending[chat_id]
+            self._active.discard(chat_id)
+
+    def _on_success(self, chat_id, text):
+        logging.debug(f'Сообщение {text} отправлено')
+        self.sent += 1
+        self._finish(chat_id)
+
+    def _on_failure(self, chat_id, text, callbacks, error):
+        """Повтор отправки; True, если сообщение отброшено."""
+        attempts = self._attempts.get(chat_id, 0) + 1
+        if not is_retryable(error) or attempts > self.max_retries:
+            logging.error(f'Сообщение {text} не отправлено. '
+                          f'Ошибка {error}')
+            self.failed += 1
+            self._finish(chat_id)
+            return True
+        delay = get_retry_after(error)
+        if delay is None:
+            delay = min(self.retry_delay * 2 ** (attempts - 1),
+                        MAX_RETRY_DELAY)
+        logging.warning(f'Повтор отправки в чат {chat_id} через '
+                        f'{delay} с. Ошибка {error}')
+        self._attempts[chat_id] = attempts
+        self._pending[chat_id].appendleft((text, callbacks))
+        self._schedule(chat_id, time.monotonic() + delay)
+        return False
+
+
+class SendQueue(BaseSendQueue):
+    """Очередь отправки сообщений в Телеграм с фоновым обработчиком.
+
+    `put` не блокирует вызывающий код. Об исходе отправки сообщает
+    `on_sent(delivered)` из `put`; он вызывается в потоке обработчика.
+    """
+
+    def __init__(self, bot, **kwargs):
+        super().__init__(bot, **kwargs)
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Запуск фонового обработчика очереди."""
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='telegram-send-queue')
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Остановка обработчика после отправки накопленных сообщений."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def put(self, chat_id, text, on_sent=None):
+        """Постановка сообщения в очередь без ожидания отправки.
+
+        `on_sent` получит True после доставки или False, если сообщение
+        отброшено после всех попыток.
+        """
+        with self._condition:
+            self._add(chat_id, text, on_sent)
+            self._condition.notify()
+
+    def __len__(self):
+        with self._condition:
+            return super().__len__()
+
+    def _next_batch(self):
+        """Ожидание чата, которому можно отправить сообщение."""
+        with self._condition:
+            while True:
+                batch, wait = self._pop_batch()
+                if batch is not None:
+                    return batch
+                if wait is None and self._stopping:
+                    return None
+                self._condition.wait(wait)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            chat_id, text, callbacks = batch
+            try:
+                with SEND_LATENCY.time():
+                    self.bot.send_message(chat_id=chat_id, text=text)
+            except SEND_ERRORS as error:
+                with self._condition:
+                    dropped = self._on_failure(chat_id, text, callbacks,
+                                               error)
+                    self._condition.notify()
+                if dropped:
+                    notify_sent(callbacks, False)
+            else:
+                with self._condition:
+                    self._on_success(chat_id, text)
+                notify_sent(callbacks, True)
+
+
+class AsyncSendQueue(BaseSendQueue):
+    """Асинхронный аналог SendQueue для AsyncTeleBot.
+
+    Обработчик — задача в том же цикле событий, `on_sent(delivered)`
+    вызывается в нем же.
+    """
+
+    def __init__(self, bot, **kwargs):
+        super().__init__(bot, **kwargs)
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        """Запуск обработчика в текущем цикле событий."""
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self, timeout=None):
+        """Остановка обработчика после отправки накопленных сообщений."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f'Не отправлено сообщений: {len(self)}.')
+
+    def put(self, chat_id, text, on_sent=None):
+        """Постановка сообщения в очередь без ожидания отправки.
+
+        `on_sent` получит True после доставки или False, если сообщение
+        отброшено после всех попыток.
+        """
+        self._add(chat_id, text, on_sent)
+        self._wakeup.set()
+
+    async def _next_batch(self):
+        """Ожидание чата, которому можно отправить сообщение."""
+        while True:
+            batch, wait = self._pop_batch()
+            if batch is not None:
+                return batch
+            if wait is None and self._stopping:
+                return None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            if batch is None:
+                return
+            chat_id, text, callbacks = batch
+            try:
+                with SEND_LATENCY.time():
+                    await self.bot.send_message(chat_id=chat_id, text=text)
+            except SEND_ERRORS as error:
+                if self._on_failure(chat_id, text, callbacks, error):
+                    notify_sent(callbacks, False)
+            else:
+                self._on_success(chat_id, text)
+                notify_sent(callbacks, True)
@@ -0,0 +1,261 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+DATE_CACHE_SIZE = 65536
+
+# Статусы хранятся кодами — индексами в этом списке. Неизвестный статус
+# дописывается в конец при первой встрече.
+STATUSES = ['approved', 'reviewing', 'rejected']
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def get_status_code(status):
+    """Код статуса работы."""
+    code = STATUS_CODES.get(status)
+    if code is None:
+        code = STATUS_CODES[status] = len(STATUSES)
+        STATUSES.append(status)
+    return code
+
+
+def parse_date(value):
+    """Время в секундах из поля date_updated; 0, если его не разобрать."""
+    if isinstance(value, int):
+        return value
+    if not isinstance(value, str):
+        return 0
+    return parse_date_string(value)
+
+
+# Даты работ повторяются от опроса к опросу, поэтому разобранные
+# значения кешируются.
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date_string(value):
+    """Время в секундах из строки в формате ISO 8601."""
+    try:
+        return int(datetime.fromisoformat(
+            value.replace('Z', '+00:00')
+        ).timestamp())
+    except ValueError:
+        return 0
+
+
+class HomeworkRecord:
+    """Отслеживаемое состояние работы: код статуса и время изменения.
+
+    Запись не изменяется после создания, поэтому одну и ту же запись
+    без копирования разделяют состояние и кеш хранилища.
+    """
+
+    __slots__ = ('status_code', 'updated_at')
+
+    def __init__(self, status_code, updated_at):
+        self.status_code = status_code
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_homework(cls, homework):
+        """Запись по работе из ответа API."""
+        status = homework['status']
+        code = STATUS_CODES.get(status)
+        if code is None:
+            code = get_status_code(status)
+        return cls(code, parse_date(homework.get('date_updated')))
+
+    @classmethod
+    def from_list(cls, data):
+        """Запись из сохраненного списка [статус, время].
+
+        Название работы, которое писали некоторые версии, пропускается.
+        """
+        status, updated_at, *_ = data
+        return cls(get_status_code(status), parse_date(updated_at))
+
+    @property
+    def status(self):
+        """Статус работы строкой."""
+        return STATUSES[self.status_code]
+
+    def to_list(self):
+        """Список [статус, время] для сохранения в JSON."""
+        return [self.status, self.updated_at]
+
+    def __eq__(self, other):
+        if not isinstance(other, HomeworkRecord):
+            return NotImplemented
+        return (self.status_code == other.status_code
+                and self.updated_at == other.updated_at)
+
+    def __hash__(self):
+        return hash((self.status_code, self.updated_at))
+
+    def __repr__(self):
+        return f'HomeworkRecord({self.status!r}, {self.updated_at})'
+
+
+def encode_record(value):
+    """Сериализация записей работ для json.dump."""
+    if isinstance(value, HomeworkRecord):
+        return value.to_list()
+    raise TypeError(f'Объект {type(value)} не сериализуется в JSON')
+
+
+@dataclass
+class BotState:
+    """Состояние бота для одного получателя уведомлений."""
+
+    timestamp: int
+    homeworks: dict = field(default_factory=dict)
+    # Отпечаток ошибки -> [время отправки уведомления, число повторов].
+    alerts: dict = field(default_factory=dict)
+    language: str = None
+
+    def __post_init__(self):
+        self.homeworks = {
+            key: (record if isinstance(record, HomeworkRecord)
+                  else HomeworkRecord.from_list(record))
+            for key, record in self.homeworks.items()
+        }
+
+    def to_dict(self):
+        """Словарь для хранилища; записи работ не копируются."""
+        return {
+            'timestamp': self.timestamp,
+            'homeworks': dict(self.homeworks),
+            'alerts': {fingerprint: list(alert)
+                       for fingerprint, alert in self.alerts.items()},
+            'language': self.language,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Восстановление состояния из сохраненного словаря."""
+        return cls(
+            timestamp=data['timestamp'],
+            homeworks=data.get('homeworks', {}),
+            alerts=dict(data.get('alerts', {})),
+            language=data.get('language'),
+        )
+
+
+class MemoryStateStorage:
+    """Хранилище состояния в памяти процесса.
+
+    Используется, когда путь к файлу состояния не задан. Остальные
+    хранилища наследуют от него кеш и пакетную запись: `save` только
+    помечает ключ измененным, а на диск изменения попадают в `flush`.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._dirty = set()
+
+    def load(self, key):
+        """Получение сохраненного состояния или None."""
+        data = self._states.get(key)
+        return BotState.from_dict(data) if data is not None else None
+
+    def save(self, key, state):
+        """Запоминание состояния до ближайшей записи."""
+        self._states[key] = state.to_dict()
+        self._dirty.add(key)
+
+    def flush(self):
+        """Запись накопленных изменений."""
+        if not self._dirty:
+            return
+        try:
+            self._write(self._dirty)
+        except (OSError, sqlite3.Error) as error:
+            logging.error(f'Не удалось сохранить состояние: {error}',
+                          exc_info=True)
+            return
+        self._dirty.clear()
+
+    def close(self):
+        """Запись изменений и освобождение ресурсов."""
+        self.flush()
+
+    def _write(self, keys):
+        pass
+
+
+class JsonStateStorage(MemoryStateStorage):
+    """Хранилище состояния в JSON-файле с атомарной перезаписью."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as file:
+                self._states = json.load(file)
+        except FileNotFoundError:
+            logging.info(f'Файл состояния {path} не найден, '
+                         'бот запускается с пустым состоянием.')
+
+    def _write(self, keys):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, tmp_path = tempfile.mkstemp(dir=directory,
+                                                suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(self._states, file, ensure_ascii=False,
+                          default=encode_record)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+
+
+class SqliteStateStorage(MemoryStateStorage):
+    """Хранилище состояния в базе SQLite."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        # В одну базу пишут рабочие процессы supervisor.py.
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS bot_state '
+                '(key TEXT PRIMARY KEY, data TEXT NOT NULL)'
+            )
+        self._states = {
+            key: json.loads(data) for key, data in
+            self._connection.execute('SELECT key, data FROM bot_state')
+        }
+
+    def _write(self, keys):
+        # Все измененные ключи записываются одной транзакцией.
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO bot_state (key, data) '
+                'VALUES (?, ?)',
+                [(key, json.dumps(self._states[key], ensure_ascii=False,
+                                  default=encode_record))
+                 for key in keys]
+            )
+
+    def close(self):
+        """Запись изменений и закрытие соединения с базой."""
+        super().close()
+        self._connection.close()
+
+
+def get_state_storage(path):
+    """Выбор хранилища состояния по пути к файлу."""
+    if not path:
+        return MemoryStateStorage()
+    if path.endswith(SQLITE_EXTENSIONS):
+        return SqliteStateStorage(path)
+    return JsonStateStorage(path)
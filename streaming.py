@@ -0,0 +1,148 @@
+import codecs
+import json
+import re
+
+# Размер куска тела ответа, который читается из сокета за раз.
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+DECODER = json.JSONDecoder()
+
+
+class JsonStreamReader:
+    """Чтение значений JSON из потока кусков байтов.
+
+    В буфере хранится только еще не разобранная часть тела, поэтому
+    память не зависит от размера всего ответа.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self):
+        """Дочитывание следующего куска; False в конце потока."""
+        if self.eof:
+            return False
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self._decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        """Следующий значащий символ или пустая строка в конце потока."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more():
+                return ''
+
+    def expect(self, char):
+        """Пропуск ожидаемого символа разметки."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f'Ожидался символ {char!r}, получен {found!r} '
+                             'в ответе API.')
+        self.pos += 1
+
+    def skip(self, char):
+        """Пропуск символа, если он следующий; True, если пропущен."""
+        if self.peek() != char:
+            return False
+        self.pos += 1
+        return True
+
+    def value(self):
+        """Разбор следующего значения целиком."""
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._read_more():
+                    continue
+                raise
+            if end == len(self.buffer) and not self.eof:
+                # Число могло оборваться на границе куска.
+                self._read_more()
+                continue
+            self.pos = end
+            return value
+
+
+class StreamedResponse:
+    """Ответ API, список работ которого разбирается по мере обхода.
+
+    Итерация по объекту отдает элементы списка `key` по одному. Остальные
+    поля верхнего уровня доступны через `get` и `[]`; обращение к ним
+    дочитывает тело до конца. Обойти список можно только один раз.
+    """
+
+    def __init__(self, chunks, key='homeworks', close=None):
+        self.key = key
+        self._reader = JsonStreamReader(chunks)
+        self._close = close
+        self._fields = {}
+        self._items = self._parse()
+
+    def __iter__(self):
+        return self._items
+
+    def __getitem__(self, key):
+        self._finish()
+        return self._fields[key]
+
+    def get(self, key, default=None):
+        """Значение поля верхнего уровня."""
+        self._finish()
+        return self._fields.get(key, default)
+
+    def keys(self):
+        """Разобранные поля верхнего уровня."""
+        return self._fields.keys()
+
+    def _finish(self):
+        for _ in self._items:
+            pass
+
+    def _parse(self):
+        reader = self._reader
+        found = False
+        try:
+            if reader.peek() != '{':
+                raise TypeError('Ответ API не является словарем. '
+                                f'Начало ответа: {reader.peek()!r}')
+            reader.expect('{')
+            while not reader.skip('}'):
+                name = reader.value()
+                reader.expect(':')
+                if name == self.key and reader.peek() == '[':
+                    found = True
+                    reader.expect('[')
+                    while not reader.skip(']'):
+                        yield reader.value()
+                        reader.skip(',')
+                else:
+                    self._fields[name] = reader.value()
+                reader.skip(',')
+        finally:
+            if self._close is not None:
+                self._close()
+        if found:
+            return
+        if self.key in self._fields:
+            raise TypeError('Полученный тип данных не соответствует типу. '
+                            'Ожидаемый тип: list, '
+                            f'Получен тип: {type(self._fields[self.key])}')
+        raise KeyError(f'Ключа {self.key!r} нет в ответе API. '
+                       f'Доступные ключи в ответе: {self.keys()}.')
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+from dataclasses import dataclass, field
+
+from state import SQLITE_EXTENSIONS
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """Связка токена Практикума и чата, куда приходят уведомления."""
+
+    token: str
+    chat_id: str
+    # Язык уведомлений; не влияет на ключ и сравнение подписок.
+    language: str = field(default=None, compare=False)
+
+    @property
+    def key(self):
+        """Ключ подписки в хранилище состояния."""
+        digest = hashlib.sha256(self.token.encode('utf-8')).hexdigest()
+        return f'{self.chat_id}:{digest[:16]}'
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API от имени подписки."""
+        return {'Authorization': f'OAuth {self.token}'}
+
+
+def load_json_subscriptions(path):
+    """Загрузка подписок из JSON-файла со списком объектов."""
+    with open(path, encoding='utf-8') as file:
+        records = json.load(file)
+    return [
+        Subscription(token=record['token'], chat_id=str(record['chat_id']),
+                     language=record.get('language'))
+        for record in records
+    ]
+
+
+def load_sqlite_subscriptions(path):
+    """Загрузка подписок из таблицы subscriptions базы SQLite.
+
+    Столбец language необязателен.
+    """
+    connection = sqlite3.connect(path)
+    try:
+        columns = {row[1] for row in connection.execute(
+            'PRAGMA table_info(subscriptions)'
+        )}
+        language = 'language' if 'language' in columns else 'NULL'
+        rows = connection.execute(
+            f'SELECT token, chat_id, {language} FROM subscriptions'
+        ).fetchall()
+    finally:
+        connection.close()
+    return [Subscription(token=token, chat_id=str(chat_id), language=language)
+            for token, chat_id, language in rows]
+
+
+def load_subscriptions(path):
+    """Загрузка реестра подписок из файла или базы SQLite."""
+    if path.endswith(SQLITE_EXTENSIONS):
+        subscriptions = load_sqlite_subscriptions(path)
+    else:
+        subscriptions = load_json_subscriptions(path)
+    # Повторы в реестре не должны приводить к двойному опросу.
+    return list(dict.fromkeys(subscriptions))
+
+
+def add_json_subscription(path, subscription):
+    """Дописывание подписки в JSON-файл с атомарной перезаписью."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            records = json.load(file)
+    except FileNotFoundError:
+        records = []
+    record = {'token': subscription.token, 'chat_id': subscription.chat_id}
+    if subscription.language:
+        record['language'] = subscription.language
+    records.append(record)
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(records, file, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+def add_sqlite_subscription(path, subscription):
+    """Добавление подписки в таблицу subscriptions базы SQLite."""
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS subscriptions '
+                '(token TEXT NOT NULL, chat_id TEXT NOT NULL, language TEXT)'
+            )
+            connection.execute(
+                'INSERT INTO subscriptions (token, chat_id) VALUES (?, ?)',
+                (subscription.token, subscription.chat_id)
+            )
+    finally:
+        connection.close()
+
+
+def add_subscription(path, subscription):
+    """Сохранение новой подписки в реестре."""
+    if path.endswith(SQLITE_EXTENSIONS):
+        add_sqlite_subscription(path, subscription)
+    else:
+        add_json_subscription(path, subscription)
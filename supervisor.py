@@ -0,0 +1,288 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from multiprocessing.connection import wait
+
+from dotenv import load_dotenv
+from telebot import TeleBot
+
+import homework
+from expections import UnavailableTokens
+from log_handlers import RecordQueueHandler
+from scheduler import SUBSCRIPTIONS_PATH, PollingScheduler
+from state import SQLITE_EXTENSIONS, get_state_storage
+from subscriptions import load_subscriptions
+
+load_dotenv()
+
+WORKERS = int(os.getenv('WORKERS', os.cpu_count() or 1))
+# Точек на кольце для каждого процесса: чем больше, тем ровнее деление.
+REPLICAS = 128
+# Процесс, упавший быстрее этого срока, перезапускается не сразу.
+RESTART_DELAY = 5
+STOP_TIMEOUT = 15
+
+
+def get_hash(value):
+    """Положение значения на кольце хешей."""
+    digest = hashlib.md5(value.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class HashRing:
+    """Консистентное хеширование ключей по узлам.
+
+    Каждый узел занимает `replicas` точек на кольце, ключ принадлежит
+    ближайшей по часовой стрелке точке. При добавлении или удалении узла
+    меняют владельца только ключи его точек.
+    """
+
+    def __init__(self, nodes=(), replicas=REPLICAS):
+        self.replicas = replicas
+        self._points = []
+        self._nodes = {}
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self):
+        return len({node for node in self._nodes.values()})
+
+    def __contains__(self, node):
+        return node in self._nodes.values()
+
+    def add(self, node):
+        """Добавление узла на кольцо."""
+        for replica in range(self.replicas):
+            point = get_hash(f'{node}#{replica}')
+            if point not in self._nodes:
+                bisect.insort(self._points, point)
+            self._nodes[point] = node
+
+    def remove(self, node):
+        """Удаление узла с кольца."""
+        for replica in range(self.replicas):
+            point = get_hash(f'{node}#{replica}')
+            if self._nodes.get(point) == node:
+                del self._nodes[point]
+                self._points.remove(point)
+
+    def get(self, key):
+        """Узел, которому принадлежит ключ."""
+        if not self._points:
+            raise LookupError('На кольце нет ни одного узла.')
+        index = bisect.bisect(self._points, get_hash(key))
+        return self._nodes[self._points[index % len(self._points)]]
+
+
+def get_worker_name(index):
+    """Имя рабочего процесса и его узла на кольце."""
+    return f'worker-{index}'
+
+
+def assign(ring, subscriptions):
+    """Распределение подписок по узлам кольца по токену."""
+    shards = {}
+    for subscription in subscriptions:
+        shards.setdefault(ring.get(subscription.token), []).append(
+            subscription
+        )
+    return {node: frozenset(shard) for node, shard in shards.items()}
+
+
+def run_worker(name, subscriptions, records=None):
+    """Опрос своей доли подписок в рабочем процессе.
+
+    Состояние читается из общего хранилища при запуске и сбрасывается
+    в него после каждого цикла и при остановке по SIGTERM, поэтому
+    перезапуск и перенос подписок в другой процесс его не теряют.
+    """
+    if records is not None:
+        logging.basicConfig(handlers=[RecordQueueHandler(records)],
+                            level=logging.DEBUG, force=True)
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    logging.info(f'{name}: опрос {len(subscriptions)} подписок.')
+    scheduler = PollingScheduler(
+        subscriptions,
+        TeleBot(token=homework.TELEGRAM_TOKEN),
+        get_state_storage(homework.STATE_FILE_PATH),
+        # Подписки с одним токеном попадают в один процесс и делят кеш.
+        cache=(homework.create_response_cache()
+               if homework.RESPONSE_CACHE_TTL else None),
+        breaker=homework.BREAKER,
+    )
+    scheduler.run_forever()
+
+
+class Supervisor:
+    """Опрос подписок в нескольких рабочих процессах.
+
+    Подписки делятся между процессами консистентным хешированием токена.
+    При изменении числа процессов или реестра перезапускаются только
+    процессы, чья доля изменилась: старый владелец подписки успевает
+    сохранить ее состояние до того, как его прочитает новый. Упавший
+    процесс перезапускается с той же долей.
+    """
+
+    def __init__(self, subscriptions, workers=WORKERS, target=run_worker,
+                 records=None, context=None):
+        self.subscriptions = list(subscriptions)
+        self.target = target
+        self.records = records
+        self.context = context or multiprocessing.get_context()
+        self.ring = HashRing(get_worker_name(index)
+                             for index in range(workers))
+        self.workers = workers
+        self.shards = {}
+        self.processes = {}
+        self._started = {}
+
+    def _start(self, node):
+        process = self.context.Process(
+            target=self.target,
+            args=(node, sorted(self.shards[node], key=str), self.records),
+            name=node,
+            daemon=True,
+        )
+        process.start()
+        self.processes[node] = process
+        self._started[node] = time.monotonic()
+
+    def _stop(self, node):
+        process = self.processes.pop(node)
+        self._started.pop(node, None)
+        process.terminate()
+        process.join(STOP_TIMEOUT)
+        if process.is_alive():
+            logging.error(f'{node} не остановился за {STOP_TIMEOUT} с.')
+            process.kill()
+            process.join()
+
+    def rebalance(self):
+        """Приведение процессов к текущему кольцу и реестру.
+
+        Возвращает число подписок, сменивших процесс.
+        """
+        shards = assign(self.ring, self.subscriptions)
+        changed = {node for node in shards.keys() | self.shards.keys()
+                   if shards.get(node) != self.shards.get(node)}
+        owners = {subscription: node
+                  for node, shard in self.shards.items()
+                  for subscription in shard}
+        moved = sum(
+            1 for node, shard in shards.items()
+            for subscription in shard
+            if owners.get(subscription, node) != node
+        )
+        # Сначала останавливаются все старые владельцы, затем стартуют новые.
+        for node in changed & self.processes.keys():
+            self._stop(node)
+        self.shards = shards
+        for node in changed & shards.keys():
+            self._start(node)
+        if changed:
+            logging.info(f'Перераспределение: процессов {len(shards)}, '
+                         f'перенесено подписок {moved}.')
+        return moved
+
+    def resize(self, workers):
+        """Изменение числа рабочих процессов."""
+        workers = max(workers, 1)
+        for index in range(self.workers, workers):
+            self.ring.add(get_worker_name(index))
+        for index in range(workers, self.workers):
+            self.ring.remove(get_worker_name(index))
+        self.workers = workers
+        return self.rebalance()
+
+    def reload(self, subscriptions):
+        """Замена реестра подписок."""
+        self.subscriptions = list(subscriptions)
+        return self.rebalance()
+
+    def check(self):
+        """Перезапуск упавших процессов; возвращает их число."""
+        now = time.monotonic()
+        restarted = 0
+        for node, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            if now - self._started[node] < RESTART_DELAY:
+                continue
+            logging.error(f'{node} завершился с кодом {process.exitcode}, '
+                          'перезапуск.')
+            process.join()
+            self._start(node)
+            restarted += 1
+        return restarted
+
+    def stop(self):
+        """Остановка всех рабочих процессов."""
+        for node in list(self.processes):
+            self._stop(node)
+
+    def run_forever(self, load=None):
+        """Наблюдение за процессами до SIGTERM или SIGINT.
+
+        SIGTTIN и SIGTTOU добавляют и убирают рабочий процесс, SIGHUP
+        перечитывает реестр через `load`.
+        """
+        requests = []
+
+        def request(signum, frame):
+            requests.append(signum)
+
+        for signum in (signal.SIGTTIN, signal.SIGTTOU, signal.SIGHUP):
+            signal.signal(signum, request)
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        self.rebalance()
+        try:
+            while True:
+                wait([process.sentinel
+                      for process in self.processes.values()],
+                     timeout=RESTART_DELAY)
+                while requests:
+                    signum = requests.pop(0)
+                    if signum == signal.SIGTTIN:
+                        self.resize(self.workers + 1)
+                    elif signum == signal.SIGTTOU:
+                        self.resize(self.workers - 1)
+                    elif load is not None:
+                        self.reload(load())
+                self.check()
+        finally:
+            self.stop()
+
+
+def main(records=None):
+    """Запуск опроса подписок из реестра в нескольких процессах.
+
+    Через очередь `records` рабочие процессы пишут логи.
+    """
+    if not homework.TELEGRAM_TOKEN or not SUBSCRIPTIONS_PATH:
+        logging.critical('Не заданы TELEGRAM_TOKEN или SUBSCRIPTIONS_PATH.')
+        raise UnavailableTokens('Ошибка при проверке токенов')
+    if not (homework.STATE_FILE_PATH or '').endswith(SQLITE_EXTENSIONS):
+        # Только база SQLite безопасна для записи из нескольких процессов.
+        logging.critical('Для supervisor.py STATE_FILE_PATH должен '
+                         'указывать на базу SQLite.')
+        raise ValueError('Нужно хранилище состояния SQLite')
+    if homework.TELEGRAM_API_URL:
+        homework.configure_telegram_api(homework.TELEGRAM_API_URL)
+    subscriptions = load_subscriptions(SUBSCRIPTIONS_PATH)
+    logging.info(f'Загружено подписок: {len(subscriptions)}, '
+                 f'рабочих процессов: {WORKERS}.')
+    supervisor = Supervisor(subscriptions, WORKERS, records=records)
+    supervisor.run_forever(lambda: load_subscriptions(SUBSCRIPTIONS_PATH))
+
+
+if __name__ == '__main__':
+    # Рабочие процессы пишут логи через эту очередь в обработчики главного.
+    records = multiprocessing.Queue()
+    homework.configure_logging(records)
+    main(records)
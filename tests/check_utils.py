@@ -1,6 +1,9 @@
+import asyncio
+import json
 import logging
 import signal
 import re
+import time
 from collections import namedtuple
 from contextlib import contextmanager
 from functools import wraps
@@ -85,12 +88,13 @@ class MockResponseGET:
 
     def __init__(
             self, *args, random_timestamp=None, http_status=HTTPStatus.OK,
-            data=None, **kwargs
+            data=None, headers=None, **kwargs
     ):
         self.random_timestamp = random_timestamp
         self.status_code = http_status
         self.reason = ''
         self.text = ''
+        self.headers = headers or {}
         default_data = {
             'homeworks': [],
             'current_date': self.random_timestamp
@@ -101,6 +105,10 @@ class MockResponseGET:
     def json(self):
         return self.data
 
+    @property
+    def content(self):
+        return json.dumps(self.data).encode()
+
     def raise_for_status(self):
         if self.status_code >= 400:
             raise ValueError('Server or client error.')
@@ -116,6 +124,82 @@ class MockTelegramBot:
         self.text = text
 
 
+class MockSession:
+    def __init__(self, data, status=HTTPStatus.OK, headers=None):
+        self.data = data
+        self.status = status
+        self.response_headers = headers
+        self.calls = []
+        self.request_headers = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append((headers or {}).get('Authorization'))
+        self.request_headers.append(headers)
+        return MockResponseGET(data=self.data, http_status=self.status,
+                               headers=self.response_headers)
+
+
+class MockAsyncResponse:
+    def __init__(self, data, status=HTTPStatus.OK, headers=None):
+        self.data = data
+        self.status = status
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def read(self):
+        return json.dumps(self.data).encode()
+
+
+class MockAsyncSession(MockSession):
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append((headers or {}).get('Authorization'))
+        self.request_headers.append(headers)
+        return MockAsyncResponse(self.data, self.status,
+                                 self.response_headers)
+
+
+class MockAsyncTelegramBot:
+    def __init__(self, updates=()):
+        self.messages = []
+        self.deleted = []
+        self.updates = [list(updates)]
+
+    async def send_message(self, chat_id=None, text=None):
+        self.messages.append((chat_id, text))
+
+    async def delete_message(self, chat_id, message_id):
+        self.deleted.append((chat_id, message_id))
+
+    async def delete_webhook(self):
+        pass
+
+    async def get_updates(self, offset=None, **kwargs):
+        await asyncio.sleep(0.05)
+        if self.updates:
+            return self.updates.pop()
+        await asyncio.sleep(10)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_for(condition, timeout=1.5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
 class BreakInfiniteLoop(BaseException):
     pass
 
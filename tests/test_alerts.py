@@ -0,0 +1,113 @@
+from alerts import AlertManager, get_fingerprint
+from state import BotState
+
+
+def raise_error(error):
+    raise error
+
+
+def catch(error):
+    try:
+        raise_error(error)
+    except Exception as caught:
+        return caught
+
+
+def test_fingerprint_ignores_message_text():
+    first = catch(ValueError('Код ответа 500, params={"from_date": 1}'))
+    second = catch(ValueError('Код ответа 502, params={"from_date": 2}'))
+    assert get_fingerprint(first) == get_fingerprint(second), (
+        'Изменяющиеся значения в тексте не должны менять отпечаток ошибки.'
+    )
+    assert get_fingerprint(first) == 'ValueError@test_alerts.py:raise_error'
+    assert get_fingerprint(catch(KeyError('x'))) != get_fingerprint(first)
+
+
+def test_repeats_are_suppressed_within_window():
+    manager = AlertManager(window=600)
+    state = BotState(timestamp=0)
+    alert = manager.on_error(state, catch(ValueError('первая')), now=0)
+    manager.mark_sent(state, alert, now=0)
+    for now in (100, 500):
+        assert manager.on_error(state, catch(ValueError('b')), now=now) is None
+
+    alert = manager.on_error(state, catch(ValueError('четвертая')), now=700)
+    assert alert.message == (
+        'Сбой в работе программы: четвертая\n'
+        'Повторов с прошлого уведомления: 2'
+    )
+
+
+def test_alternating_errors_are_suppressed():
+    manager = AlertManager(window=600)
+    state = BotState(timestamp=0)
+    for now in range(0, 500, 100):
+        for error in (ValueError('a'), KeyError('b')):
+            alert = manager.on_error(state, catch(error), now=now)
+            if alert:
+                manager.mark_sent(state, alert, now=now)
+    assert sorted(suppressed for _, suppressed in state.alerts.values()) == [
+        4, 4
+    ]
+
+
+def test_unsent_alert_is_retried():
+    manager = AlertManager(window=600)
+    state = BotState(timestamp=0)
+    assert manager.on_error(state, catch(ValueError('a')), now=0)
+    assert manager.on_error(state, catch(ValueError('a')), now=10), (
+        'Неотправленное уведомление должно уйти при следующей ошибке.'
+    )
+
+
+def test_recovered_message_with_digest():
+    manager = AlertManager(window=600)
+    state = BotState(timestamp=0)
+    assert manager.on_success(state) is None
+    for error in (ValueError('a'), ValueError('a'), ValueError('a'),
+                  KeyError('b')):
+        alert = manager.on_error(state, catch(error), now=0)
+        if alert:
+            manager.mark_sent(state, alert, now=0)
+    assert manager.on_success(state) == (
+        'Работа бота восстановлена после сбоя.\n'
+        'Подавлено повторов:\n'
+        'ValueError@test_alerts.py:raise_error: 2'
+    )
+    manager.clear(state)
+    assert manager.on_success(state) is None
+
+
+def test_check_homeworks_sends_one_alert_and_recovers(homework_module):
+    state = homework_module.BotState(timestamp=0)
+    sent = []
+    responses = iter([
+        ConnectionError('Код ответа 500'),
+        ConnectionError('Код ответа 502'),
+        {'homeworks': [], 'current_date': 10},
+        {'homeworks': [], 'current_date': 20},
+    ])
+
+    def fetch(timestamp):
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    for _ in range(4):
+        homework_module.check_homeworks(state, fetch, sent.append)
+    assert sent == [
+        'Сбой в работе программы: Код ответа 500',
+        'Работа бота восстановлена после сбоя.\n'
+        'Подавлено повторов:\n'
+        'ConnectionError@test_alerts.py:fetch: 1',
+    ]
+    assert state.alerts == {}
+
+
+def test_alerts_survive_state_round_trip():
+    state = BotState(timestamp=0, alerts={'ValueError@a.py:f': [5, 1]})
+    restored = BotState.from_dict(state.to_dict())
+    assert restored.alerts == state.alerts
+    legacy = BotState.from_dict({'timestamp': 0, 'error_hash': 'abc'})
+    assert legacy.alerts == {}
@@ -0,0 +1,70 @@
+import analytics
+from analytics import ReviewTimes, get_comment_pattern, get_min_review_time
+from event_log import Event, EventLog
+
+HOUR = 3600
+
+
+def make_event(homework_id, status, date_updated, lesson='Спринт 1',
+               comment=None, key='chat'):
+    return Event(key, str(homework_id), f'hw{homework_id}.zip', status,
+                 date_updated, date_updated + 10, lesson, comment)
+
+
+def test_comment_pattern_ignores_case_and_numbers():
+    assert get_comment_pattern('Поправь строку 42, и все!') == (
+        'поправь строку #'
+    )
+    assert get_comment_pattern('ПОПРАВЬ строку 7') == 'поправь строку #'
+    assert get_comment_pattern('') == analytics.NO_COMMENT
+
+
+def test_review_time_is_grouped_by_lesson_and_comment():
+    times = ReviewTimes.from_events([
+        make_event(1, 'reviewing', 0),
+        make_event(2, 'reviewing', 0, lesson='Спринт 2'),
+        make_event(1, 'rejected', 2 * HOUR, comment='Поправь строку 1'),
+        make_event(1, 'reviewing', 3 * HOUR),
+        make_event(1, 'approved', 4 * HOUR, comment='Принято'),
+        make_event(2, 'approved', 6 * HOUR, comment='Принято',
+                   lesson=None),
+        make_event(3, 'approved', 5 * HOUR),
+    ])
+    assert len(times) == 3, 'Вердикт без начала проверки не учитывается.'
+    by_lesson = {item.group: item for item in times.summarize()}
+    assert by_lesson['Спринт 1'].count == 2
+    assert by_lesson['Спринт 1'].mean == 1.5 * HOUR
+    assert by_lesson['Спринт 1'].p90 == 2 * HOUR
+    assert by_lesson['Спринт 2'].median == 6 * HOUR, (
+        'Урок берется из события начала проверки, если в вердикте его нет.'
+    )
+    by_comment = {item.group: item.count
+                  for item in times.summarize('comment')}
+    assert by_comment == {'поправь строку #': 1, 'принято': 2}
+
+
+def test_min_review_time_needs_enough_reviews():
+    events = []
+    for number in range(analytics.MIN_FORECAST_SAMPLES):
+        events += [make_event(number, 'reviewing', 0),
+                   make_event(number, 'approved', (number + 1) * HOUR)]
+    assert get_min_review_time(events[:-2]) is None
+    assert get_min_review_time(events) == 2 * HOUR
+
+
+def test_cli_reports_review_time(tmp_path, capsys):
+    path = str(tmp_path / 'events.jsonl')
+    log = EventLog(path)
+    log.append([make_event(1, 'reviewing', 0),
+                make_event(1, 'approved', HOUR + 30 * 60)])
+    log.close()
+    with open(path, 'ab') as file:
+        file.write(b'{"key":"chat","id":"2","sta')
+
+    assert analytics.main(['review-time', path, '--by', 'lesson']) == 0
+    output = capsys.readouterr().out
+    assert 'Спринт 1' in output
+    assert '1ч 30м' in output
+    assert open(path, 'rb').read().endswith(b'"sta'), (
+        'Анализ не должен изменять журнал.'
+    )
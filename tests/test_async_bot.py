@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from telebot.asyncio_helper import ApiTelegramException
+
+from async_bot import (AsyncPollingScheduler, async_check_homeworks,
+                       async_fetch_homework_statuses)
+from expections import UnexpectedStatusCode
+from send_queue import AsyncSendQueue
+from state import BotState, MemoryStateStorage
+from subscriptions import Subscription
+from tests.check_utils import MockAsyncSession, MockAsyncTelegramBot
+
+
+def test_async_fetch_raises_on_unexpected_status():
+    session = MockAsyncSession({}, status=500)
+    with pytest.raises(UnexpectedStatusCode):
+        asyncio.run(async_fetch_homework_statuses(session, {}, 0))
+
+
+def test_async_check_homeworks_sends_new_status(data_with_new_hw_status):
+    state = BotState(timestamp=0)
+    sent = []
+
+    async def fetch(timestamp):
+        return data_with_new_hw_status
+
+    async def notify(message):
+        sent.append(message)
+
+    asyncio.run(async_check_homeworks(state, fetch, notify))
+    asyncio.run(async_check_homeworks(state, fetch, notify))
+    assert len(sent) == 1
+    assert state.timestamp == data_with_new_hw_status['current_date']
+
+
+def test_async_scheduler_polls_concurrently_and_cancels(
+        data_with_new_hw_status
+):
+    subscriptions = [Subscription(f'token{i}', str(i)) for i in range(200)]
+    session = MockAsyncSession(data_with_new_hw_status)
+    bot = MockAsyncTelegramBot()
+    storage = MemoryStateStorage()
+    scheduler = AsyncPollingScheduler(
+        subscriptions, bot, storage, session, period=0.01,
+        send_queue=AsyncSendQueue(bot, global_rate=10000),
+    )
+
+    async def run_briefly():
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run_briefly())
+    assert len(session.calls) >= 2 * len(subscriptions)
+    assert scheduler.validators.not_modified >= len(subscriptions)
+    assert len(bot.messages) == len(subscriptions)
+    assert storage.load(subscriptions[0].key) is not None
+
+
+class RejectingAsyncBot(MockAsyncTelegramBot):
+    def __init__(self):
+        super().__init__()
+        self.rejecting = True
+
+    async def send_message(self, chat_id=None, text=None):
+        if self.rejecting:
+            raise ApiTelegramException('sendMessage', None, {
+                'error_code': 403, 'description': 'Forbidden'
+            })
+        await super().send_message(chat_id, text)
+
+
+def test_async_scheduler_marks_seen_after_delivery(data_with_new_hw_status):
+    subscription = Subscription('token', '1')
+    bot = RejectingAsyncBot()
+    scheduler = AsyncPollingScheduler(
+        [subscription], bot, MemoryStateStorage(),
+        MockAsyncSession(data_with_new_hw_status),
+    )
+    state = BotState(timestamp=0)
+
+    async def poll_twice():
+        scheduler.send_queue.start()
+        await scheduler.poll(subscription, state)
+        await asyncio.sleep(0.05)
+        assert not state.homeworks and state.timestamp == 0, (
+            'Работы запоминаются только после доставки уведомления.'
+        )
+        assert subscription.key not in scheduler._undelivered
+        bot.rejecting = False
+        await scheduler.poll(subscription, state)
+        await scheduler.send_queue.stop(1)
+
+    asyncio.run(poll_twice())
+    assert len(bot.messages) == 1
+    assert state.homeworks
+    assert state.timestamp == data_with_new_hw_status['current_date']
+    assert scheduler.history[subscription.chat_id]
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+import requests
+
+from alerts import AlertManager
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from expections import (CircuitOpen, EndpointUnavailable,
+                        UnexpectedStatusCode)
+from state import BotState
+from tests.check_utils import Clock
+
+
+def fail():
+    raise EndpointUnavailable('Эндпоинт недоступен')
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60,
+                             clock=clock)
+    for _ in range(3):
+        with pytest.raises(EndpointUnavailable):
+            breaker.call(fail)
+    assert breaker.state == OPEN
+    calls = []
+    with pytest.raises(CircuitOpen) as error:
+        breaker.call(calls.append, 1)
+    assert calls == [], 'Разомкнутый автомат не должен пускать запросы.'
+    assert error.value.retry_after == 60
+    assert isinstance(error.value.__cause__, EndpointUnavailable)
+
+    clock.now = 60
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.call(calls.append, 1)
+    breaker.on_success()
+    assert breaker.state == CLOSED
+    assert breaker.call(lambda: 'ok') == 'ok'
+
+
+def test_failed_probe_reopens_breaker():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10,
+                             clock=clock)
+    with pytest.raises(EndpointUnavailable):
+        breaker.call(fail)
+    clock.now = 10
+    with pytest.raises(EndpointUnavailable):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    clock.now = 15
+    with pytest.raises(CircuitOpen):
+        breaker.call(fail)
+
+
+def test_client_errors_do_not_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    def unauthorized():
+        raise UnexpectedStatusCode('401', status_code=401)
+
+    with pytest.raises(UnexpectedStatusCode):
+        breaker.call(unauthorized)
+    assert breaker.state == CLOSED
+
+
+def test_zero_threshold_disables_breaker():
+    breaker = CircuitBreaker(failure_threshold=0)
+    for _ in range(10):
+        with pytest.raises(EndpointUnavailable):
+            breaker.call(fail)
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_async_probe_is_released():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0,
+                             clock=clock)
+    with pytest.raises(EndpointUnavailable):
+        breaker.call(fail)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(breaker.acall(hang))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        async def ok():
+            return 'ok'
+
+        return await breaker.acall(ok)
+
+    assert asyncio.run(run()) == 'ok'
+    assert breaker.state == CLOSED
+
+
+def test_request_exception_becomes_endpoint_unavailable(
+        monkeypatch, homework_module
+):
+    def broken_get(*args, **kwargs):
+        raise requests.ConnectionError('Нет соединения')
+
+    monkeypatch.setattr(requests, 'get', broken_get)
+    with pytest.raises(EndpointUnavailable) as error:
+        homework_module.fetch_homework_statuses({}, 0)
+    assert isinstance(error.value.__cause__, requests.ConnectionError)
+
+
+def test_subscribers_get_one_outage_notice(homework_module):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=600)
+    requests_sent = []
+
+    def fetch(timestamp):
+        requests_sent.append(timestamp)
+        raise EndpointUnavailable('Эндпоинт недоступен')
+
+    def guarded_fetch(timestamp):
+        return breaker.call(fetch, timestamp)
+
+    states = [BotState(timestamp=0) for _ in range(5)]
+    sent = {index: [] for index in range(len(states))}
+    alerts = AlertManager(window=3600)
+    for _ in range(3):
+        for index, state in enumerate(states):
+            homework_module.check_homeworks(state, guarded_fetch,
+                                            sent[index].append, alerts)
+    assert len(requests_sent) == 2, (
+        'После размыкания автомата запросы к API не должны отправляться.'
+    )
+    assert all(len(messages) == 1 for messages in sent.values()), (
+        'Каждый подписчик должен получить одно уведомление о сбое.'
+    )
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from telebot.types import Update
+
+from async_bot import (AsyncPollingScheduler, answer_update,
+                       create_webhook_app, poll_updates)
+from commands import CommandHandler, parse_command
+from event_log import EventLog
+from homework import RENDERER
+from state import MemoryStateStorage
+from subscriptions import Subscription, load_subscriptions
+from tests.check_utils import MockAsyncSession, MockAsyncTelegramBot
+
+
+def make_update(text, chat_id=1, update_id=1):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': 10 + update_id,
+            'date': 0,
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': text,
+        },
+    }
+
+
+def make_scheduler(data, chat_id='1'):
+    session = MockAsyncSession(data)
+    scheduler = AsyncPollingScheduler(
+        [Subscription('token', chat_id)], MockAsyncTelegramBot(),
+        MemoryStateStorage(), session, period=0.01,
+    )
+    return scheduler, session
+
+
+def run_scheduler(scheduler, *services):
+    async def run_briefly():
+        task = asyncio.create_task(scheduler.run(*services))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run_briefly())
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('/status', ('status', '')),
+    ('/start@homework_bot  abc ', ('start', 'abc')),
+    ('/History', ('history', '')),
+    ('привет', (None, '')),
+    ('', (None, '')),
+])
+def test_parse_command(text, expected):
+    assert parse_command(text) == expected
+
+
+def test_status_and_history_from_memory(data_with_new_hw_status):
+    scheduler, session = make_scheduler(data_with_new_hw_status)
+    run_scheduler(scheduler)
+    handler = CommandHandler(scheduler, RENDERER)
+    calls = len(session.calls)
+
+    name = data_with_new_hw_status['homeworks'][0]['homework_name']
+    assert handler.handle(1, '/status') == (
+        f'{name}: Работа проверена: ревьюеру всё понравилось. Ура!'
+    )
+    assert name in handler.handle(1, '/history')
+    assert len(session.calls) == calls, (
+        'Ответ на команду не должен обращаться к API Практикума.'
+    )
+    assert handler.handle(2, '/status').startswith('Этот чат не подписан')
+    assert handler.handle(1, 'просто текст') is None
+    assert handler.handle(1, '/unknown').startswith('Неизвестная команда')
+
+
+def test_history_from_event_log(tmp_path, data_with_new_hw_status):
+    scheduler, _ = make_scheduler(data_with_new_hw_status)
+    # Тот же токен подписан из второго чата.
+    scheduler.subscriptions.append(Subscription('token', '2'))
+    scheduler.events = EventLog(str(tmp_path / 'events.jsonl'))
+    run_scheduler(scheduler)
+    scheduler.events = EventLog(scheduler.events.path)
+    handler = CommandHandler(scheduler, RENDERER)
+    name = data_with_new_hw_status['homeworks'][0]['homework_name']
+    history = handler.handle(1, '/history')
+    assert '\n' not in history, (
+        'В истории чата не должно быть событий другой подписки.'
+    )
+    assert history.endswith(
+        f'{name}: Работа проверена: ревьюеру всё понравилось. Ура!'
+    )
+    scheduler.events.close()
+
+
+def test_start_subscribes_chat(tmp_path):
+    registry = tmp_path / 'subscriptions.json'
+    scheduler, _ = make_scheduler({'homeworks': []})
+    handler = CommandHandler(scheduler, RENDERER, str(registry))
+    assert handler.handle(5, '/start').startswith('Этот чат не подписан')
+    assert handler.handle(5, '/start secret').startswith('Подписка оформлена')
+    assert handler.handle(5, '/start secret').startswith('Подписка с этим')
+    assert load_subscriptions(str(registry)) == [Subscription('secret', '5')]
+    assert Subscription('secret', '5') in scheduler.subscriptions
+    assert CommandHandler.is_secret('/start secret')
+    assert not CommandHandler.is_secret('/start')
+
+
+def test_answer_update_deletes_token_message():
+    scheduler, _ = make_scheduler({'homeworks': []})
+    bot = MockAsyncTelegramBot()
+    handler = CommandHandler(scheduler, RENDERER)
+    update = Update.de_json(make_update('/start secret', chat_id=7))
+    asyncio.run(answer_update(bot, handler, update))
+    assert bot.deleted == [(7, 11)]
+    assert bot.messages[0][1].startswith('Подписка оформлена')
+
+
+def test_long_polling_runs_in_scheduler_loop(data_with_new_hw_status):
+    scheduler, _ = make_scheduler(data_with_new_hw_status)
+    bot = MockAsyncTelegramBot([Update.de_json(make_update('/status'))])
+    handler = CommandHandler(scheduler, RENDERER)
+    run_scheduler(scheduler, poll_updates(bot, handler))
+    assert bot.messages[0][0] == 1
+    assert bot.messages[0][1].endswith('Ура!')
+
+
+def test_webhook_checks_secret():
+    scheduler, _ = make_scheduler({'homeworks': []})
+    bot = MockAsyncTelegramBot()
+    app = create_webhook_app(bot, CommandHandler(scheduler, RENDERER),
+                             secret='s3cret')
+
+    async def post_updates():
+        async with TestClient(TestServer(app)) as client:
+            denied = await client.post('/', json=make_update('/help'))
+            accepted = await client.post(
+                '/', json=make_update('/help'),
+                headers={'X-Telegram-Bot-Api-Secret-Token': 's3cret'},
+            )
+            return denied.status, accepted.status
+
+    assert asyncio.run(post_updates()) == (403, 200)
+    assert len(bot.messages) == 1
+    assert bot.messages[0][1].startswith('Команды:')
@@ -0,0 +1,154 @@
+import time
+from functools import partial
+
+import pytest
+
+import tests.check_utils as check_utils
+from event_log import Event, EventLog
+from state import HomeworkRecord, MemoryStateStorage
+
+
+def make_event(homework_id, status, date_updated, observed_at, key='chat'):
+    return Event(key, str(homework_id), f'hw{homework_id}.zip', status,
+                 date_updated, observed_at)
+
+
+def test_events_are_appended_indexed_and_replayed(tmp_path):
+    path = str(tmp_path / 'events.jsonl')
+    log = EventLog(path)
+    assert log.append([
+        make_event(1, 'reviewing', 10, 100),
+        make_event(2, 'reviewing', 20, 110),
+        make_event(1, 'approved', 30, 120),
+        make_event(1, 'approved', 30, 130),
+    ]) == 3, 'Повтор того же статуса не должен дописываться.'
+    assert [event.status for event in log.history('chat', 1)] == [
+        'reviewing', 'approved'
+    ]
+    log.close()
+
+    reopened = EventLog(path)
+    assert len(reopened) == 3
+    assert [event.observed_at for event in reopened.replay()] == [
+        100, 110, 120
+    ]
+    assert reopened.rebuild('chat') == {
+        '1': HomeworkRecord.from_list(['approved', 30]),
+        '2': HomeworkRecord.from_list(['reviewing', 20]),
+    }
+    assert reopened.names('chat') == {'1': 'hw1.zip', '2': 'hw2.zip'}
+    assert reopened.rebuild('other') == {}
+    reopened.close()
+
+
+def test_broken_tail_is_cut_on_open(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    log = EventLog(str(path))
+    log.append([make_event(1, 'reviewing', 10, 100)])
+    log.close()
+    with open(path, 'ab') as file:
+        file.write(b'{"key":"chat","id":"1","sta')
+
+    log = EventLog(str(path))
+    log.append([make_event(1, 'approved', 20, 200)])
+    assert [event.status for event in log.replay()] == [
+        'reviewing', 'approved'
+    ]
+    assert path.read_bytes().count(b'\n') == 2
+    log.close()
+
+
+def test_compaction_keeps_latest_event(tmp_path):
+    log = EventLog(str(tmp_path / 'events.jsonl'), retention=50)
+    log.append([
+        make_event(1, 'reviewing', 10, 100),
+        make_event(1, 'approved', 20, 110),
+        make_event(2, 'reviewing', 30, 120),
+        make_event(2, 'rejected', 40, 190),
+    ])
+    assert log.compact(now=200) == 2
+    assert [(event.homework_id, event.status) for event in log.replay()] == [
+        ('1', 'approved'), ('2', 'rejected')
+    ]
+    assert [event.status for event in log.history('chat', 2)] == ['rejected']
+    log.append([make_event(2, 'approved', 50, 210)])
+    assert [event.status for event in log.history('chat', 2)] == [
+        'rejected', 'approved'
+    ]
+    log.close()
+
+
+def test_state_is_rebuilt_from_log(tmp_path, homework_module):
+    log = EventLog(str(tmp_path / 'events.jsonl'))
+    response = {
+        'homeworks': [{'id': 1, 'homework_name': 'hw1.zip',
+                       'status': 'approved',
+                       'lesson_name': 'Спринт 1',
+                       'reviewer_comment': 'Отлично!',
+                       'date_updated': '2024-01-01T00:00:00Z'}],
+        'current_date': 200,
+    }
+    sent = []
+    state = homework_module.load_state(MemoryStateStorage(), 'chat',
+                                       events=log)
+    homework_module.check_homeworks(
+        state, lambda timestamp: response, sent.append,
+        on_change=partial(log.record, 'chat'),
+    )
+    assert len(sent) == 1
+    [event] = log.history('chat', 1)
+    assert (event.status, event.lesson_name, event.reviewer_comment) == (
+        'approved', 'Спринт 1', 'Отлично!'
+    )
+
+    # Состояние потеряно, но журнал остался.
+    state = homework_module.load_state(MemoryStateStorage(), 'chat',
+                                       events=log)
+    homework_module.check_homeworks(state, lambda timestamp: response,
+                                    sent.append)
+    assert len(sent) == 1, (
+        'Статусы из журнала не должны приводить к повторным уведомлениям.'
+    )
+    log.close()
+
+
+def test_history_is_kept_per_subscription(tmp_path):
+    log = EventLog(str(tmp_path / 'events.jsonl'))
+    log.append([
+        make_event(1, 'reviewing', 10, 100, key='first'),
+        make_event(1, 'reviewing', 10, 100, key='second'),
+        make_event(1, 'approved', 20, 200, key='second'),
+    ])
+    assert [event.status for event in log.history('first', 1)] == [
+        'reviewing'
+    ], 'История не должна смешивать события разных подписок.'
+    assert [event.key for event in log.history('second', 1)] == [
+        'second', 'second'
+    ]
+    log.close()
+
+
+def test_main_records_events_to_empty_log(tmp_path, monkeypatch,
+                                          homework_module):
+    path = tmp_path / 'events.jsonl'
+    path.touch()
+    response = {
+        'homeworks': [{'id': 1, 'homework_name': 'hw1.zip',
+                       'status': 'approved',
+                       'date_updated': '2024-01-01T00:00:00Z'}],
+        'current_date': 200,
+    }
+    monkeypatch.setattr(homework_module, 'EVENT_LOG_PATH', str(path))
+    monkeypatch.setattr(homework_module, 'TeleBot',
+                        check_utils.MockTelegramBot)
+    monkeypatch.setattr(homework_module, 'get_api_answer',
+                        lambda timestamp: response)
+
+    def stop(seconds):
+        raise check_utils.BreakInfiniteLoop('break')
+    monkeypatch.setattr(time, 'sleep', stop)
+    with pytest.raises(check_utils.BreakInfiniteLoop):
+        homework_module.main()
+    assert [event.status for event in EventLog(str(path)).replay()] == [
+        'approved'
+    ], 'Бот должен писать события и в пустой журнал.'
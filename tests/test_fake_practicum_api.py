@@ -0,0 +1,46 @@
+import json
+
+from fakes.practicum_api import FakePracticumApi, FakePracticumServer
+
+
+def test_fake_api_honours_from_date_and_transitions(monkeypatch):
+    now = [1_700_000_000]
+    monkeypatch.setattr('fakes.practicum_api.time.time', lambda: now[0])
+    api = FakePracticumApi(homeworks=2, transition_interval=60, seed=1)
+
+    status, _, body = api.handle('OAuth token', {'from_date': ['0']})
+    assert status == 200
+    first = json.loads(body)
+    assert [item['status'] for item in first['homeworks']] == [
+        'reviewing', 'approved'
+    ]
+
+    now[0] += 61
+    delta = json.loads(api.handle(
+        'OAuth token', {'from_date': [str(first['current_date'])]}
+    )[2])
+    statuses = sorted(item['status'] for item in delta['homeworks'])
+    assert len(statuses) == 2
+    assert 'reviewing' in statuses
+    assert delta['current_date'] == now[0]
+
+
+def test_fake_api_errors():
+    api = FakePracticumApi(rate_limit_rate=1, retry_after=7)
+    assert api.handle(None, {})[0] == 401
+    assert api.handle('OAuth token', {'from_date': ['x']})[0] == 400
+    status, headers, _ = api.handle('OAuth token', {'from_date': ['0']})
+    assert status == 429
+    assert headers == {'Retry-After': '7'}
+
+
+def test_bot_polls_fake_server(homework_module, monkeypatch):
+    server = FakePracticumServer(FakePracticumApi(seed=1)).start()
+    try:
+        monkeypatch.setattr(homework_module, 'ENDPOINT', server.endpoint)
+        response = homework_module.fetch_homework_statuses(
+            {'Authorization': 'OAuth token'}, 0
+        )
+        assert homework_module.check_response(response)
+    finally:
+        server.stop()
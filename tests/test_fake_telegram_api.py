@@ -0,0 +1,53 @@
+import json
+
+from telebot import TeleBot
+
+from fakes.telegram_api import FakeTelegramApi, FakeTelegramServer
+from send_queue import SendQueue
+from tests.check_utils import wait_for
+
+
+def test_fake_api_limits_rate_per_chat():
+    api = FakeTelegramApi(global_rate=0, chat_rate=1)
+    assert api.handle('sendMessage', {'chat_id': '1', 'text': 'a'})[0] == 200
+    assert api.handle('sendMessage', {'chat_id': '2', 'text': 'b'})[0] == 200
+    status, body = api.handle('sendMessage', {'chat_id': '1', 'text': 'c'})
+    assert status == 429
+    assert json.loads(body)['parameters'] == {'retry_after': 1}
+    assert [text for _, text, _ in api.messages] == ['a', 'b']
+    assert api.handle('getMe', {})[0] == 404
+    assert api.handle('sendMessage', {'chat_id': '1'})[0] == 400
+
+
+def test_bot_sends_through_fake_server(homework_module, monkeypatch):
+    server = FakeTelegramServer(FakeTelegramApi(chat_rate=0)).start()
+    try:
+        monkeypatch.setattr('telebot.apihelper.API_URL', None)
+        homework_module.configure_telegram_api(server.base_url)
+        homework_module.send_chat_message(
+            TeleBot(token='1234:abc'), 12345, 'Привет'
+        )
+        assert server.api.messages[0][:2] == ('12345', 'Привет')
+    finally:
+        server.stop()
+
+
+def test_send_queue_retries_after_fake_429(homework_module, monkeypatch):
+    server = FakeTelegramServer(
+        FakeTelegramApi(global_rate=0, chat_rate=1)
+    ).start()
+    send_queue = SendQueue(TeleBot(token='1234:abc'), global_rate=1000,
+                           chat_rate=1000).start()
+    try:
+        monkeypatch.setattr('telebot.apihelper.API_URL', None)
+        homework_module.configure_telegram_api(server.base_url)
+        send_queue.put(1, 'первое')
+        assert wait_for(lambda: send_queue.sent == 1)
+        send_queue.put(1, 'второе')
+        assert wait_for(lambda: send_queue.sent == 2), (
+            'После ответа 429 сообщение должно быть отправлено повторно'
+        )
+        assert server.api.stats == {200: 2, 429: 1}
+    finally:
+        send_queue.stop(1)
+        server.stop()
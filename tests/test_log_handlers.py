@@ -0,0 +1,74 @@
+import gzip
+import json
+import logging
+
+from log_handlers import (JsonFormatter, create_file_handler,
+                          start_queue_logging)
+
+
+def make_record(message):
+    return logging.LogRecord('homework', logging.INFO, __file__, 10, message,
+                             None, None, func='main')
+
+
+def test_json_formatter_writes_one_line():
+    line = JsonFormatter().format(make_record('Статус\nизменился'))
+    data = json.loads(line)
+    assert '\n' not in line
+    assert data['message'] == 'Статус\nизменился'
+    assert data['level'] == 'INFO'
+    assert data['function'] == 'main'
+
+
+def test_size_rotation_compresses_old_logs(tmp_path):
+    path = tmp_path / 'app.log'
+    handler = create_file_handler(str(path), max_bytes=100, backup_count=2,
+                                  compress=True)
+    for number in range(10):
+        handler.emit(make_record(f'record {number} ' + 'x' * 40))
+    handler.close()
+    archives = sorted(tmp_path.glob('app.log.*.gz'))
+    assert archives, 'Старые логи должны сжиматься при ротации.'
+    assert len(archives) <= 2
+    with gzip.open(archives[0], 'rt', encoding='utf-8') as archive:
+        assert 'record' in archive.read()
+
+
+def test_queue_logging_writes_in_background(tmp_path):
+    path = tmp_path / 'app.log'
+    file_handler = create_file_handler(str(path))
+    queue_handler, listener = start_queue_logging([file_handler])
+    logger = logging.getLogger('tests.queue_logging')
+    logger.addHandler(queue_handler)
+    logger.setLevel(logging.INFO)
+    try:
+        logger.info('Новый статус')
+    finally:
+        logger.removeHandler(queue_handler)
+        listener.stop()
+        file_handler.close()
+    assert 'Новый статус' in path.read_text(encoding='utf-8')
+
+
+def test_json_exception_survives_queue(tmp_path):
+    path = tmp_path / 'app.log'
+    file_handler = create_file_handler(str(path))
+    file_handler.setFormatter(JsonFormatter())
+    queue_handler, listener = start_queue_logging([file_handler])
+    logger = logging.getLogger('tests.queue_json')
+    logger.addHandler(queue_handler)
+    logger.setLevel(logging.INFO)
+    try:
+        try:
+            raise ValueError('сбой')
+        except ValueError:
+            logger.error('Ошибка %s', 'опроса', exc_info=True)
+    finally:
+        logger.removeHandler(queue_handler)
+        listener.stop()
+        file_handler.close()
+    data = json.loads(path.read_text(encoding='utf-8'))
+    assert data['message'] == 'Ошибка опроса', (
+        'Трассировка не должна попадать в текст сообщения.'
+    )
+    assert 'ValueError: сбой' in data['exception']
@@ -0,0 +1,121 @@
+import pytest
+
+import tests.check_utils as check_utils
+
+
+@pytest.mark.parametrize('response, expected', [
+    ({'homeworks': [], 'current_date': 1700000000}, 1700000000),
+    ({'homeworks': []}, 100),
+    ({'homeworks': [], 'current_date': '1700000000'}, 100),
+    ({'homeworks': [], 'current_date': None}, 100),
+])
+def test_get_next_timestamp(homework_module, response, expected):
+    assert homework_module.get_next_timestamp(response, 100) == expected, (
+        'Отметка времени должна сдвигаться на `current_date` из ответа API.'
+    )
+
+
+def test_create_http_session_uses_pool(homework_module):
+    session = homework_module.create_http_session(25)
+    adapter = session.get_adapter(homework_module.ENDPOINT)
+    assert adapter._pool_maxsize == 25
+
+
+def test_fetch_passes_timeout(homework_module):
+    calls = []
+
+    class Session:
+        def get(self, *args, **kwargs):
+            calls.append(kwargs)
+            return check_utils.MockResponseGET()
+
+    homework_module.fetch_homework_statuses({}, 0, session=Session())
+    assert calls[0]['timeout'] == homework_module.REQUEST_TIMEOUT, (
+        'Запрос к API должен выполняться с таймаутом.'
+    )
+
+
+def make_homework(homework_id, status, date_updated='2024-01-01T00:00:00Z'):
+    return {
+        'id': homework_id,
+        'homework_name': f'hw{homework_id}.zip',
+        'status': status,
+        'date_updated': date_updated,
+    }
+
+
+def test_every_changed_homework_is_sent_in_one_message(homework_module):
+    state = homework_module.BotState(timestamp=0)
+    state.homeworks['2'] = homework_module.HomeworkRecord.from_list(
+        ['reviewing', '2024-01-01T00:00:00Z']
+    )
+    response = {
+        'homeworks': [
+            make_homework(3, 'approved'),
+            make_homework(2, 'reviewing'),
+            make_homework(1, 'rejected'),
+        ],
+        'current_date': 200,
+    }
+    sent = []
+    homework_module.check_homeworks(state, lambda timestamp: response,
+                                    sent.append)
+    assert len(sent) == 1, 'Изменения должны отправляться одним сообщением.'
+    assert sent[0].index('hw1.zip') < sent[0].index('hw3.zip')
+    assert 'hw2.zip' not in sent[0]
+    assert state.homeworks['1'].status == 'rejected'
+    assert state.homeworks['3'].status == 'approved'
+
+    homework_module.check_homeworks(state, lambda timestamp: response,
+                                    sent.append)
+    assert len(sent) == 1, 'Повторный ответ не должен рассылаться снова.'
+
+
+def test_batches_respect_message_length(homework_module, monkeypatch):
+    monkeypatch.setattr(homework_module, 'MAX_MESSAGE_LENGTH', 200)
+    state = homework_module.BotState(timestamp=0)
+    homeworks = [make_homework(i, 'approved') for i in range(10)]
+    batches = homework_module.get_notification_batches(state, homeworks)
+    assert len(batches) > 1
+    assert all(len(batch.text) <= 200 for batch in batches)
+    assert sum(len(batch.seen) for batch in batches) == 10
+
+
+def test_failed_send_keeps_homework_for_next_poll(homework_module):
+    state = homework_module.BotState(timestamp=100)
+    response = {'homeworks': [make_homework(1, 'approved')],
+                'current_date': 200}
+
+    def failing_notify(message):
+        raise homework_module.UnsuccessfulSendMessage('Telegram недоступен')
+
+    result = homework_module.check_homeworks(
+        state, lambda timestamp: response, failing_notify
+    )
+    assert isinstance(result.error, homework_module.UnsuccessfulSendMessage)
+    assert state.homeworks == {}
+    assert state.timestamp == 100, (
+        'Отметка времени не должна сдвигаться, если уведомление не ушло.'
+    )
+    assert state.alerts == {}
+
+
+def test_invalid_homework_does_not_block_others(homework_module):
+    response = {
+        'homeworks': [
+            {'id': 1, 'homework_name': 'hw1.zip', 'status': 'approved'},
+            {'id': 2, 'homework_name': 'hw2.zip', 'status': 'new_status'},
+            {'id': 3, 'status': 'rejected'},
+        ],
+        'current_date': 200,
+    }
+    state = homework_module.BotState(timestamp=0)
+    sent = []
+    result = homework_module.check_homeworks(
+        state, lambda timestamp: response, sent.append
+    )
+    assert result == (1, None), (
+        'Ошибочные работы должны пропускаться без сбоя опроса.'
+    )
+    assert 'hw1.zip' in sent[0]
+    assert state.timestamp == 200
@@ -0,0 +1,48 @@
+import pytest
+
+from messages import MessageRenderer
+from state import BotState
+from subscriptions import load_subscriptions
+
+VERDICTS = {'approved': 'Принято.', 'rejected': 'Есть замечания.'}
+
+
+def test_renderer_uses_chat_locale_and_falls_back():
+    renderer = MessageRenderer(VERDICTS, translations={
+        'en': {'approved': 'Approved.'},
+    })
+    assert renderer.render('approved', 'hw.zip') == (
+        'Изменился статус проверки работы "hw.zip". Принято.'
+    )
+    assert renderer.render('approved', 'hw.zip', 'en') == (
+        'Homework "hw.zip" review status changed. Approved.'
+    )
+    assert renderer.render('approved', 'hw.zip', 'de').endswith('Принято.')
+    assert renderer.render('rejected', 'hw.zip', 'en').endswith(
+        'Есть замечания.'
+    )
+
+
+def test_renderer_caches_and_reports_unknown_status():
+    renderer = MessageRenderer(VERDICTS)
+    renderer.render('approved', 'hw.zip')
+    renderer.render('approved', 'hw.zip')
+    assert renderer.render.cache_info().hits == 1
+    with pytest.raises(KeyError, match='Известные статусы'):
+        renderer.render('unknown', 'hw.zip')
+
+
+def test_notifications_follow_state_language(homework_module):
+    state = BotState(timestamp=0, language='en')
+    homeworks = [{'id': 1, 'homework_name': 'hw.zip', 'status': 'approved'}]
+    [batch] = homework_module.get_notification_batches(state, homeworks)
+    text = batch.text
+    assert text.startswith('Homework "hw.zip"')
+
+
+def test_subscription_language_is_loaded(tmp_path):
+    path = tmp_path / 'subscriptions.json'
+    path.write_text('[{"token": "a", "chat_id": 1, "language": "en"}]',
+                    encoding='utf-8')
+    [subscription] = load_subscriptions(str(path))
+    assert subscription.language == 'en'
@@ -0,0 +1,75 @@
+import json
+import urllib.request
+
+import pytest
+
+from metrics import (Counter, Histogram, count_exceptions, render_metrics,
+                     start_metrics_server)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('latency_seconds', 'Задержка.', buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+    text = '\n'.join(histogram.render())
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'latency_seconds_count 3' in text
+    assert histogram.count == 3
+
+
+def test_count_exceptions_by_type():
+    counter = Counter('errors_total', 'Ошибки.', labels=('function',
+                                                         'exception'))
+
+    @count_exceptions(counter)
+    def parse(value):
+        return {'a': 1}[value]
+
+    assert parse('a') == 1
+    with pytest.raises(KeyError):
+        parse('b')
+    assert counter.get(function='parse', exception='KeyError') == 1
+    assert 'errors_total{function="parse",exception="KeyError"} 1' in (
+        render_metrics([counter])
+    )
+
+
+def test_homework_functions_are_instrumented(homework_module):
+    from metrics import ERRORS
+
+    before = ERRORS.get(function='check_response', exception='WrongType')
+    with pytest.raises(TypeError):
+        homework_module.check_response({'homeworks': {}})
+    assert ERRORS.get(function='check_response',
+                      exception='WrongType') == before + 1
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    server = start_metrics_server(0, host='127.0.0.1')
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(
+            f'http://127.0.0.1:{port}/metrics', timeout=1
+        ) as response:
+            body = response.read().decode()
+        assert '# TYPE homework_api_request_seconds histogram' in body
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_streamed_invalid_homeworks_are_counted(homework_module):
+    from metrics import ERRORS
+    from streaming import StreamedResponse
+
+    body = json.dumps({'homeworks': [{'homework_name': 'hw.zip',
+                                      'status': 'unknown'}]}).encode()
+    before = ERRORS.get(function='check_response', exception='InvalidValue')
+    homeworks = homework_module.check_response(StreamedResponse([body]))
+    assert list(homeworks) == []
+    assert ERRORS.get(function='check_response',
+                      exception='InvalidValue') == before + 1, (
+        'Ошибки формата потокового ответа должны попадать в метрики.'
+    )
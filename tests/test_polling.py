@@ -0,0 +1,82 @@
+from email.utils import formatdate
+
+import pytest
+
+from expections import UnexpectedStatusCode
+from homework import PollResult
+from polling import (AdaptivePollingPolicy, FixedPollingPolicy,
+                     parse_retry_after)
+from state import BotState
+
+PERIOD = 600
+
+
+def make_policy():
+    return AdaptivePollingPolicy(PERIOD, reviewing_period=60, max_delay=4800,
+                                 idle_threshold=3, jitter=0)
+
+
+def test_fixed_policy_keeps_retry_period():
+    policy = FixedPollingPolicy(PERIOD)
+    assert policy.next_delay(BotState(timestamp=0), None) == PERIOD
+
+
+def test_polls_faster_while_reviewing():
+    state = BotState(timestamp=0, homeworks={'1': ['reviewing', None]})
+    assert make_policy().next_delay(state, PollResult(1, None)) == 60
+
+
+def test_polls_faster_only_near_expected_review_end(monkeypatch):
+    policy = AdaptivePollingPolicy(PERIOD, reviewing_period=60, jitter=0,
+                                   min_review_time=3600)
+    state = BotState(timestamp=0, homeworks={'1': ['reviewing', 1000]})
+    monkeypatch.setattr('polling.time.time', lambda: 1000)
+    assert policy.next_delay(state, PollResult(1, None)) == PERIOD
+    monkeypatch.setattr('polling.time.time', lambda: 4300)
+    assert policy.next_delay(state, PollResult(0, None)) == 300
+    monkeypatch.setattr('polling.time.time', lambda: 5000)
+    assert policy.next_delay(state, PollResult(0, None)) == 60
+
+
+def test_backs_off_exponentially_on_errors_and_resets():
+    policy = make_policy()
+    state = BotState(timestamp=0)
+    error = PollResult(0, ValueError())
+    delays = [policy.next_delay(state, error) for _ in range(5)]
+    assert delays == [600, 1200, 2400, 4800, 4800]
+    assert policy.next_delay(state, PollResult(0, None)) == PERIOD
+
+
+def test_backs_off_after_long_idle():
+    policy = make_policy()
+    state = BotState(timestamp=0)
+    delays = [policy.next_delay(state, PollResult(0, None))
+              for _ in range(6)]
+    assert delays == [600, 600, 1200, 1200, 1200, 2400]
+    assert policy.next_delay(state, PollResult(2, None)) == PERIOD
+
+
+def test_honours_retry_after():
+    policy = make_policy()
+    error = UnexpectedStatusCode('429', status_code=429, retry_after=3000)
+    assert policy.next_delay(BotState(timestamp=0),
+                             PollResult(0, error)) == 3000
+
+
+def test_jitter_stays_in_bounds():
+    policy = AdaptivePollingPolicy(PERIOD, jitter=0.1)
+    delays = {policy.next_delay(BotState(timestamp=0), PollResult(1, None))
+              for _ in range(20)}
+    assert len(delays) > 1
+    assert all(540 <= delay <= 660 for delay in delays)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('120', 120), (None, None), ('soon', None), ('-5', 0),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after(formatdate(usegmt=True)) <= 1
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+
+import pytest
+
+from response_cache import ResponseCache
+from tests.check_utils import Clock
+
+
+def test_cache_expires_after_ttl():
+    clock = Clock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    calls = []
+
+    def fetch():
+        calls.append(clock.now)
+        return {'homeworks': [], 'current_date': clock.now}
+
+    assert cache.get(('token', 0), fetch) is cache.get(('token', 0), fetch)
+    clock.now = 10
+    cache.get(('token', 0), fetch)
+    assert calls == [0, 10], 'Запись должна устаревать через ttl секунд.'
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(ttl=60, maxsize=2)
+    cache.get('a', lambda: 1)
+    cache.get('b', lambda: 2)
+    cache.get('a', lambda: 0)
+    cache.get('c', lambda: 3)
+    assert len(cache) == 2
+    assert cache.get('a', lambda: 0) == 1
+    assert cache.get('b', lambda: 0) == 0, (
+        'Вытесняться должна запись, к которой дольше всего не обращались.'
+    )
+
+
+def test_cache_does_not_store_errors():
+    cache = ResponseCache()
+
+    def failing_fetch():
+        raise ConnectionError('нет сети')
+
+    with pytest.raises(ConnectionError):
+        cache.get('a', failing_fetch)
+    assert cache.get('a', lambda: 1) == 1
+
+
+def test_concurrent_callers_share_one_request():
+    cache = ResponseCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow_fetch():
+        calls.append(1)
+        started.set()
+        release.wait(1)
+        return {'homeworks': []}
+
+    def call():
+        results.append(cache.get(('token', 0), slow_fetch))
+
+    owner = threading.Thread(target=call)
+    owner.start()
+    started.wait(1)
+    waiters = [threading.Thread(target=call) for _ in range(5)]
+    for thread in waiters:
+        thread.start()
+    release.set()
+    for thread in [owner, *waiters]:
+        thread.join(1)
+    assert len(calls) == 1, 'Одновременные вызовы должны делить один запрос.'
+    assert len(results) == 6
+    assert all(result is results[0] for result in results)
+    assert (cache.hits, cache.misses) == (5, 1)
+
+
+def test_async_callers_share_one_request():
+    cache = ResponseCache()
+    calls = []
+
+    async def fetch(timestamp):
+        calls.append(timestamp)
+        await asyncio.sleep(0.01)
+        return {'homeworks': [], 'current_date': timestamp}
+
+    cached_fetch = cache.wrap_async(fetch, 'token')
+
+    async def run():
+        return await asyncio.gather(*(cached_fetch(0) for _ in range(10)),
+                                    cached_fetch(1))
+
+    results = asyncio.run(run())
+    assert calls == [0, 1]
+    assert results[0] is results[9]
+    assert (cache.hits, cache.misses) == (9, 2)
+
+
+def test_async_waiters_get_error_of_shared_request():
+    cache = ResponseCache()
+    calls = []
+
+    async def failing_fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ConnectionError('нет сети')
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.aget('a', failing_fetch) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_unchanged_response_is_not_shared():
+    cache = ResponseCache()
+    assert cache.get('a', lambda: None) is None
+    assert cache.get('a', lambda: 1) == 1, (
+        'None от условного запроса не должен попадать в кеш.'
+    )
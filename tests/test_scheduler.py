@@ -0,0 +1,155 @@
+import json
+import sqlite3
+
+import pytest
+from telebot.apihelper import ApiTelegramException
+
+import tests.check_utils as check_utils
+from conditional import ResponseValidators
+from metrics import CONDITIONAL_RESPONSES
+from scheduler import PollingScheduler
+from state import MemoryStateStorage
+from subscriptions import Subscription, load_subscriptions
+
+
+def test_load_subscriptions_from_json_and_sqlite(tmp_path):
+    json_path = tmp_path / 'subscriptions.json'
+    json_path.write_text(json.dumps([
+        {'token': 'a', 'chat_id': 1},
+        {'token': 'a', 'chat_id': 1},
+        {'token': 'b', 'chat_id': '2'},
+    ]))
+    expected = [Subscription('a', '1'), Subscription('b', '2')]
+    assert load_subscriptions(str(json_path)) == expected
+
+    db_path = str(tmp_path / 'subscriptions.sqlite3')
+    connection = sqlite3.connect(db_path)
+    with connection:
+        connection.execute('CREATE TABLE subscriptions (token, chat_id)')
+        connection.executemany('INSERT INTO subscriptions VALUES (?, ?)',
+                               [('a', 1), ('b', 2)])
+    connection.close()
+    assert load_subscriptions(db_path) == expected
+
+
+def test_scheduler_polls_every_subscription_with_shared_clients(
+        data_with_new_hw_status
+):
+    subscriptions = [Subscription(f'token{i}', str(i)) for i in range(3)]
+    session = check_utils.MockSession(data_with_new_hw_status)
+    bot = check_utils.MockTelegramBot()
+    storage = MemoryStateStorage()
+    scheduler = PollingScheduler(subscriptions, bot, storage, period=0,
+                                 session=session)
+
+    assert scheduler.run_pending() == 0
+    assert sorted(session.calls) == [
+        'OAuth token0', 'OAuth token1', 'OAuth token2'
+    ]
+    assert len(scheduler.send_queue) == len(subscriptions), (
+        'Уведомления должны ставиться в очередь отправки.'
+    )
+    for subscription in subscriptions:
+        state = storage.load(subscription.key)
+        assert not state.homeworks, (
+            'До доставки уведомления состояние не должно меняться.'
+        )
+        assert state.timestamp != data_with_new_hw_status['current_date']
+    scheduler.send_queue.start().stop(1)
+    scheduler.apply_deliveries()
+    for subscription in subscriptions:
+        state = storage.load(subscription.key)
+        assert state.timestamp == data_with_new_hw_status['current_date']
+        assert state.homeworks
+
+
+def test_scheduler_spreads_first_polls_over_period():
+    subscriptions = [Subscription(f'token{i}', str(i)) for i in range(50)]
+    scheduler = PollingScheduler(subscriptions, check_utils.MockTelegramBot(),
+                                 MemoryStateStorage(), period=600,
+                                 session=check_utils.MockSession({}))
+    due_times = sorted(item[0] for item in scheduler._queue)
+    assert len(scheduler) == 50
+    assert due_times[-1] - due_times[0] > 60
+
+
+@pytest.mark.parametrize('status', [200, 304])
+def test_unchanged_response_skips_parsing(homework_module, monkeypatch,
+                                          data_with_new_hw_status, status):
+    session = check_utils.MockSession(data_with_new_hw_status,
+                                      headers={'ETag': '"v1"'})
+    validators = ResponseValidators()
+    headers = {'Authorization': 'OAuth token'}
+    assert homework_module.fetch_homework_statuses(
+        headers, 0, session=session, validators=validators
+    ) == data_with_new_hw_status
+
+    def fail_check_response(response):
+        raise AssertionError('Неизменившийся ответ не должен разбираться.')
+
+    monkeypatch.setattr(homework_module, 'check_response',
+                        fail_check_response)
+    session.status = status
+    before = CONDITIONAL_RESPONSES.get(result='not_modified')
+    state = homework_module.BotState(timestamp=0)
+    homework_module.check_homeworks(
+        state,
+        lambda timestamp: homework_module.fetch_homework_statuses(
+            headers, timestamp, session=session, validators=validators),
+        lambda message: None,
+    )
+    assert session.request_headers[-1]['If-None-Match'] == '"v1"'
+    assert validators.not_modified == 1
+    assert CONDITIONAL_RESPONSES.get(result='not_modified') == before + 1, (
+        'Пропущенные ответы должны попадать в метрики.'
+    )
+    assert state.timestamp == 0
+
+
+def test_subscriptions_with_one_token_keep_own_validators(
+        data_with_new_hw_status
+):
+    subscriptions = [Subscription('token', '1'), Subscription('token', '2')]
+    session = check_utils.MockSession(data_with_new_hw_status,
+                                      headers={'ETag': '"v1"'})
+    storage = MemoryStateStorage()
+    scheduler = PollingScheduler(subscriptions, check_utils.MockTelegramBot(),
+                                 storage, period=0, session=session)
+
+    scheduler.run_pending()
+    assert len(scheduler.send_queue) == 2, (
+        'Ответ, разобранный одной подпиской, не должен считаться '
+        'неизменившимся для другой с тем же токеном.'
+    )
+    assert all('If-None-Match' not in headers
+               for headers in session.request_headers)
+
+
+class RejectingBot:
+    def send_message(self, chat_id=None, text=None):
+        raise ApiTelegramException('sendMessage', None, {
+            'error_code': 403, 'description': 'Forbidden'
+        })
+
+
+def test_dropped_notification_is_sent_again(data_with_new_hw_status):
+    subscription = Subscription('token', '1')
+    session = check_utils.MockSession(data_with_new_hw_status)
+    storage = MemoryStateStorage()
+    scheduler = PollingScheduler([subscription], RejectingBot(), storage,
+                                 period=0, session=session)
+    scheduler.run_pending()
+    scheduler.run_pending()
+    assert len(session.calls) == 1, (
+        'Пока уведомление не доставлено, подписка не опрашивается.'
+    )
+
+    scheduler.send_queue.start().stop(1)
+    scheduler.apply_deliveries()
+    state = scheduler._queue[0][3]
+    assert not state.homeworks
+    assert state.timestamp != data_with_new_hw_status['current_date']
+    scheduler.poll(subscription, state)
+    assert len(scheduler.send_queue) == 1, (
+        'Отброшенное уведомление должно быть отправлено снова.'
+    )
@@ -0,0 +1,47 @@
+import pytest
+
+from expections import InvalidValue, MissingField, WrongType
+from schema import Array, Object, Value, compile_validator
+
+HOMEWORK = Object({
+    'id': Value(int),
+    'homework_name': Value(str),
+    'status': Value(str, choices=('approved', 'rejected')),
+}, optional=('id',))
+validate = compile_validator(Object({'homeworks': Array(HOMEWORK)}),
+                             'response')
+
+
+def test_valid_data_is_returned():
+    data = {'homeworks': [{'homework_name': 'hw', 'status': 'approved'},
+                          {'id': 2, 'homework_name': 'hw2',
+                           'status': 'rejected', 'extra': None}]}
+    assert validate(data) is data
+
+
+@pytest.mark.parametrize('data, error, path', [
+    ([], WrongType, 'response'),
+    ({}, MissingField, "response['homeworks']"),
+    ({'homeworks': {}}, WrongType, "response['homeworks']"),
+    ({'homeworks': [{'homework_name': 'hw', 'status': 'approved'}, 1]},
+     WrongType, "response['homeworks'][1]"),
+    ({'homeworks': [{'status': 'approved'}]},
+     MissingField, "response['homeworks'][0]['homework_name']"),
+    ({'homeworks': [{'homework_name': 'hw', 'status': 'unknown'}]},
+     InvalidValue, "response['homeworks'][0]['status']"),
+    ({'homeworks': [{'id': '1', 'homework_name': 'hw',
+                     'status': 'approved'}]},
+     WrongType, "response['homeworks'][0]['id']"),
+])
+def test_errors_point_to_the_invalid_value(data, error, path):
+    with pytest.raises(error) as info:
+        validate(data)
+    assert info.value.path == path
+    assert str(info.value).startswith(path.split('[')[0])
+
+
+def test_schema_errors_keep_builtin_types():
+    assert issubclass(MissingField, KeyError)
+    assert issubclass(WrongType, TypeError)
+    assert issubclass(InvalidValue, ValueError)
+    assert str(MissingField('нет ключа')) == 'нет ключа'
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+from telebot import asyncio_helper
+from telebot.apihelper import ApiTelegramException
+
+from send_queue import AsyncSendQueue, SendQueue, TokenBucket
+from tests.check_utils import wait_for
+
+
+class RecordingBot:
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.messages.append((chat_id, text, time.monotonic()))
+
+
+def too_many_requests(retry_after):
+    return ApiTelegramException('sendMessage', None, {
+        'error_code': 429,
+        'description': 'Too Many Requests',
+        'parameters': {'retry_after': retry_after},
+    })
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=10, capacity=1)
+    now = time.monotonic()
+    assert bucket.delay(now) == 0
+    bucket.consume(now)
+    assert 0.09 < bucket.delay(now) <= 0.1
+    assert bucket.delay(now + 0.11) == 0
+
+
+def test_burst_for_one_chat_is_coalesced():
+    bot = RecordingBot()
+    queue = SendQueue(bot, chat_rate=5)
+    for number in range(5):
+        queue.put('1', f'message {number}')
+    queue.put('2', 'other chat')
+    queue.start()
+    assert wait_for(lambda: queue.sent == 2)
+    queue.stop(1)
+    texts = {chat_id: text for chat_id, text, _ in bot.messages}
+    assert texts['1'].split('\n\n') == [f'message {i}' for i in range(5)]
+    assert texts['2'] == 'other chat'
+
+
+def test_chat_rate_is_respected():
+    bot = RecordingBot()
+    queue = SendQueue(bot, chat_rate=20).start()
+    for number in range(3):
+        queue.put('1', str(number))
+        assert wait_for(lambda: queue.sent == number + 1)
+    queue.stop(1)
+    times = [sent_at for _, _, sent_at in bot.messages]
+    assert all(later - earlier >= 0.04
+               for earlier, later in zip(times, times[1:]))
+
+
+def test_rate_limited_send_is_retried():
+    bot = RecordingBot(failures=[too_many_requests(0.05)])
+    queue = SendQueue(bot, chat_rate=100).start()
+    queue.put('1', 'verdict')
+    assert wait_for(lambda: queue.sent == 1)
+    queue.stop(1)
+    assert [text for _, text, _ in bot.messages] == ['verdict']
+    assert queue.failed == 0
+
+
+def test_permanent_error_is_dropped():
+    forbidden = ApiTelegramException('sendMessage', None, {
+        'error_code': 403, 'description': 'Forbidden'
+    })
+    bot = RecordingBot(failures=[forbidden])
+    queue = SendQueue(bot).start()
+    queue.put('1', 'verdict')
+    assert wait_for(lambda: queue.failed == 1)
+    queue.stop(1)
+    assert bot.messages == []
+    assert len(queue) == 0
+
+
+def test_delivery_outcome_is_reported():
+    forbidden = ApiTelegramException('sendMessage', None, {
+        'error_code': 403, 'description': 'Forbidden'
+    })
+    bot = RecordingBot(failures=[forbidden])
+    queue = SendQueue(bot, chat_rate=100).start()
+    outcomes = []
+    queue.put('1', 'first', outcomes.append)
+    assert wait_for(lambda: outcomes == [False])
+    queue.put('1', 'second', outcomes.append)
+    queue.put('1', 'third', outcomes.append)
+    assert wait_for(lambda: len(outcomes) == 3)
+    queue.stop(1)
+    assert outcomes == [False, True, True]
+
+
+class RecordingAsyncBot(RecordingBot):
+    async def send_message(self, chat_id=None, text=None):
+        super().send_message(chat_id, text)
+
+
+def test_async_queue_retries_after_429_and_coalesces():
+    bot = RecordingAsyncBot([asyncio_helper.ApiTelegramException(
+        'sendMessage', None, {
+            'error_code': 429, 'description': 'Too Many Requests',
+            'parameters': {'retry_after': 0.05},
+        }
+    )])
+    delivered = []
+
+    async def send():
+        queue = AsyncSendQueue(bot, chat_rate=100).start()
+        started = time.monotonic()
+        for number in range(3):
+            queue.put('1', f'message {number}', delivered.append)
+        await queue.stop(1)
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(send())
+    assert elapsed >= 0.05, 'Повтор должен ждать retry_after из ответа 429.'
+    [(_, text, _)] = bot.messages
+    assert text.split('\n\n') == [f'message {i}' for i in range(3)]
+    assert delivered == [True] * 3
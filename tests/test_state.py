@@ -0,0 +1,71 @@
+import pytest
+
+from state import (BotState, HomeworkRecord, JsonStateStorage,
+                   MemoryStateStorage, SqliteStateStorage, get_state_storage)
+
+
+@pytest.mark.parametrize('filename, storage_class', [
+    ('state.json', JsonStateStorage),
+    ('state.sqlite3', SqliteStateStorage),
+])
+def test_state_survives_restart(tmp_path, filename, storage_class):
+    path = str(tmp_path / filename)
+    storage = get_state_storage(path)
+    assert isinstance(storage, storage_class)
+    state = BotState(timestamp=100, homeworks={'1': ['approved', None]},
+                     alerts={'KeyError@x.py:f': [1, 2]})
+    storage.save('12345', state)
+    storage.close()
+
+    restored = get_state_storage(path).load('12345')
+    assert restored == state, (
+        'Состояние должно восстанавливаться после перезапуска.'
+    )
+
+
+def test_save_is_written_only_on_flush(tmp_path):
+    path = tmp_path / 'state.json'
+    storage = JsonStateStorage(str(path))
+    storage.save('1', BotState(timestamp=1))
+    storage.save('1', BotState(timestamp=2))
+    assert not path.exists()
+    storage.flush()
+    assert JsonStateStorage(str(path)).load('1').timestamp == 2
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_memory_storage_returns_copies():
+    storage = MemoryStateStorage()
+    storage.save('1', BotState(timestamp=1))
+    storage.load('1').homeworks['2'] = ['approved', None]
+    assert storage.load('1').homeworks == {}
+    assert get_state_storage(None).load('1') is None
+
+
+def test_homework_record_is_compact():
+    record = HomeworkRecord.from_homework(
+        {'status': 'rejected', 'date_updated': '2024-04-11T10:31:09Z'}
+    )
+    assert record.status == 'rejected'
+    assert record.updated_at == 1712831469
+    assert not hasattr(record, '__dict__')
+    assert record == HomeworkRecord.from_list(['rejected', 1712831469])
+
+
+def test_legacy_state_file_is_loaded(tmp_path):
+    path = tmp_path / 'state.json'
+    path.write_text('{"1": {"timestamp": 5, "homeworks": '
+                    '{"7": ["approved", "2024-04-11T10:31:09Z"]}}}',
+                    encoding='utf-8')
+    state = JsonStateStorage(str(path)).load('1')
+    assert state.homeworks['7'] == HomeworkRecord.from_list(
+        ['approved', 1712831469]
+    )
+
+
+def test_homework_record_skips_saved_name():
+    record = HomeworkRecord.from_list(['approved', 5, 'hw.zip'])
+    assert record == HomeworkRecord.from_list(['approved', 5])
+    assert record.to_list() == ['approved', 5], (
+        'Название работы не должно храниться в состоянии.'
+    )
@@ -0,0 +1,101 @@
+import json
+import tracemalloc
+
+import pytest
+
+from fakes.practicum_api import FakePracticumApi, FakePracticumServer
+from state import BotState
+from streaming import StreamedResponse
+
+
+def chunked(data, size=1):
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+def make_homeworks(size):
+    return [{'id': number, 'homework_name': f'hw{number}.zip',
+             'status': 'approved', 'date_updated': '2024-04-11T10:31:09Z'}
+            for number in range(size)]
+
+
+@pytest.mark.parametrize('size', [1, 3, 7])
+def test_streamed_response_splits_on_any_boundary(size):
+    data = {'current_date': 1700000000, 'homeworks': make_homeworks(3),
+            'note': 'Привет'}
+    response = StreamedResponse(chunked(data, size))
+    assert list(response) == data['homeworks']
+    assert response['current_date'] == 1700000000
+    assert response.get('note') == 'Привет'
+
+
+def test_fields_after_homeworks_are_read_on_demand():
+    response = StreamedResponse(chunked(
+        {'homeworks': make_homeworks(2), 'current_date': 1700000000}, 5
+    ))
+    assert response.get('current_date') == 1700000000
+    assert list(response) == []
+
+
+@pytest.mark.parametrize('data, error', [
+    ({'current_date': 1}, KeyError),
+    ({'homeworks': {}}, TypeError),
+    ([{'homeworks': []}], TypeError),
+])
+def test_streamed_response_format_errors(data, error):
+    with pytest.raises(error):
+        list(StreamedResponse(chunked(data, 4)))
+
+
+def test_streamed_response_memory_does_not_grow_with_body():
+    body = json.dumps({'homeworks': make_homeworks(3000)}).encode('utf-8')
+    chunks = [body[start:start + 4096]
+              for start in range(0, len(body), 4096)]
+    tracemalloc.start()
+    try:
+        assert sum(1 for _ in StreamedResponse(chunks)) == 3000
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < len(body) / 4, (
+        'Потоковый разбор не должен держать в памяти все тело ответа'
+    )
+
+
+def test_check_homeworks_with_streamed_fetch(homework_module, monkeypatch):
+    server = FakePracticumServer(FakePracticumApi(homeworks=2)).start()
+    try:
+        monkeypatch.setattr(homework_module, 'ENDPOINT', server.endpoint)
+        state = BotState(timestamp=0)
+        messages = []
+
+        def fetch(timestamp):
+            return homework_module.fetch_homework_statuses(
+                {'Authorization': 'OAuth token'}, timestamp, stream=True
+            )
+        result = homework_module.check_homeworks(state, fetch,
+                                                 messages.append)
+        assert result == (2, None)
+        assert len(messages) == 1
+        assert state.timestamp > 0
+    finally:
+        server.stop()
+
+
+def test_streamed_changes_keep_homework_details(homework_module):
+    homeworks = make_homeworks(2)
+    homeworks[0].update(lesson_name='Спринт 1', reviewer_comment='Отлично!')
+    response = StreamedResponse(chunked(
+        {'homeworks': homeworks, 'current_date': 1700000000}, 7
+    ))
+    changes = []
+    result = homework_module.check_homeworks(
+        BotState(timestamp=0), lambda timestamp: response, lambda text: None,
+        on_change=lambda seen, changed: changes.append(changed),
+    )
+    assert result == (2, None)
+    [changed] = changes
+    assert [(item['lesson_name'], item['reviewer_comment'])
+            for item in changed.values() if 'lesson_name' in item] == [
+        ('Спринт 1', 'Отлично!')
+    ], 'Урок и комментарий должны доходить до журнала и в потоковом режиме.'
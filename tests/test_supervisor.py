@@ -0,0 +1,132 @@
+import multiprocessing
+import time
+from collections import Counter
+
+import supervisor
+from subscriptions import Subscription
+
+
+def make_subscriptions(count):
+    return [Subscription(token=f'token-{index}', chat_id=str(index))
+            for index in range(count)]
+
+
+class FakeProcess:
+    def __init__(self, target, args, name, daemon):
+        self.name = name
+        self.subscriptions = args[1]
+        self.alive = False
+        self.exitcode = None
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.alive = False
+        self.exitcode = 0
+
+    def join(self, timeout=None):
+        pass
+
+
+class FakeContext:
+    def __init__(self):
+        self.started = []
+
+    def Process(self, **kwargs):
+        process = FakeProcess(**kwargs)
+        self.started.append(process)
+        return process
+
+
+def test_ring_splits_keys_evenly():
+    ring = supervisor.HashRing(['a', 'b', 'c', 'd'])
+    counts = Counter(ring.get(f'token-{index}') for index in range(10000))
+    assert set(counts) == {'a', 'b', 'c', 'd'}
+    assert min(counts.values()) > 1500, (
+        'Ключи должны делиться между узлами примерно поровну.'
+    )
+
+
+def test_ring_moves_only_keys_of_changed_node():
+    keys = [f'token-{index}' for index in range(5000)]
+    ring = supervisor.HashRing(['a', 'b', 'c'])
+    before = {key: ring.get(key) for key in keys}
+    ring.add('d')
+    after = {key: ring.get(key) for key in keys}
+    moved = [key for key in keys if before[key] != after[key]]
+    assert all(after[key] == 'd' for key in moved), (
+        'При добавлении узла ключи должны переходить только к нему.'
+    )
+    assert len(moved) < len(keys) / 2
+    ring.remove('d')
+    assert {key: ring.get(key) for key in keys} == before
+
+
+def test_supervisor_restarts_only_affected_workers():
+    context = FakeContext()
+    subscriptions = make_subscriptions(200)
+    manager = supervisor.Supervisor(subscriptions, workers=3,
+                                    context=context)
+    assert manager.rebalance() == 0
+    assert len(context.started) == 3
+    assert sorted(
+        (subscription
+         for process in manager.processes.values()
+         for subscription in process.subscriptions),
+        key=str,
+    ) == sorted(subscriptions, key=str)
+
+    first = dict(manager.processes)
+    moved = manager.resize(4)
+    assert 0 < moved < 200
+    restarted = {node for node, process in manager.processes.items()
+                 if first.get(node) is not process}
+    assert 'worker-3' in restarted
+    assert len(context.started) == 3 + len(restarted)
+    assert moved == len(manager.shards['worker-3'])
+
+    assert manager.resize(3) == moved
+    assert 'worker-3' not in manager.processes
+    assert {node: process.subscriptions
+            for node, process in manager.processes.items()} == {
+        node: process.subscriptions for node, process in first.items()
+    }
+
+
+def test_supervisor_restarts_crashed_worker(monkeypatch):
+    monkeypatch.setattr(supervisor, 'RESTART_DELAY', 0)
+    context = FakeContext()
+    manager = supervisor.Supervisor(make_subscriptions(10), workers=2,
+                                    context=context)
+    manager.rebalance()
+    crashed = manager.processes['worker-0']
+    crashed.alive = False
+    crashed.exitcode = 1
+    assert manager.check() == 1
+    restarted = manager.processes['worker-0']
+    assert restarted is not crashed and restarted.alive
+    assert restarted.subscriptions == crashed.subscriptions, (
+        'Перезапущенный процесс должен получить ту же долю подписок.'
+    )
+    assert manager.check() == 0
+
+
+def sleep_worker(name, subscriptions, records):
+    time.sleep(30)
+
+
+def test_supervisor_stops_real_processes():
+    manager = supervisor.Supervisor(
+        make_subscriptions(4), workers=2, target=sleep_worker,
+        context=multiprocessing.get_context('fork'),
+    )
+    manager.rebalance()
+    processes = list(manager.processes.values())
+    assert all(process.is_alive() for process in processes)
+    manager.stop()
+    assert not any(process.is_alive() for process in processes)
+    assert manager.processes == {}